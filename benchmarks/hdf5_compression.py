@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the HDF5 compression libraries available for the output of radproc.
+
+A synthetic month folder of hourly RW composites (see month_ingest.py, about 10 % of the cells are wet)
+is written with every compression library in the storage layouts of :func:`radproc.raw.radolan_binaries_to_hdf5`
+and read again with :func:`radproc.core.load_month`. For storage='chunked' and 'sparse', Blosc codecs are measured with
+byte shuffle and with bit shuffle (parameter bitshuffle).
+The write time is the write stage of the ingest report (see :class:`radproc.raw.IngestReport`), so reading the binary files is excluded.
+Write and read throughput of the uncompressed data and file size are printed.
+
+Usage::
+
+    python hdf5_compression.py [number of rows] [number of columns] [number of Blosc threads]
+"""
+from __future__ import division, print_function
+
+import os, shutil, sys, tempfile, time, warnings
+import numpy as np
+import tables
+
+import radproc.raw as _raw
+import radproc.core as _core
+from month_ingest import write_month
+
+COMPLIBS = ['zlib', 'blosc:lz4', 'blosc:lz4hc', 'blosc:zstd', 'blosc:blosclz']
+STORAGES = ['frame', 'chunked', 'sparse']
+
+
+def measure(monthFolder, HDFFile, storage, complib, complevel, bitshuffle=False):
+    """Write the month with radolan_binaries_to_hdf5() and load it again. Returns write and read MB/s, file size in MB and compression ratio."""
+    if os.path.exists(HDFFile):
+        os.remove(HDFFile)
+    report = _raw.IngestReport()
+    _raw.radolan_binaries_to_hdf5(monthFolder, HDFFile, complevel=complevel, storage=storage, complib=complib, bitshuffle=bitshuffle, report=report)
+    tWrite = report.summary()['stages']['write']
+    t = time.time()
+    df = _core.load_month(HDFFile, 2020, 5)
+    tRead = time.time() - t
+    # float32 values of the month, also for the sparse layout
+    nbytes = df.size * 4
+    size = os.path.getsize(HDFFile)
+    return nbytes / tWrite / 2**20, nbytes / tRead / 2**20, size / 2**20, nbytes / size
+
+
+def main(nrow=300, ncol=300, threads=1):
+    warnings.filterwarnings('ignore')
+    tables.set_blosc_max_threads(threads)
+    tmp = tempfile.mkdtemp()
+    try:
+        monthFolder = os.path.join(tmp, '2020', '5')
+        n = write_month(monthFolder, 'RW', nrow, ncol)
+        HDFFile = os.path.join(tmp, "benchmark.h5")
+        print("%i intervals x %i cells, %.0f MB uncompressed, %i Blosc threads" % (n, nrow * ncol, n * nrow * ncol * 4 / 2**20, threads))
+        print("%-8s %-14s %-6s %12s %12s %10s %7s" % ("layout", "complib", "shuffle", "write MB/s", "read MB/s", "size MB", "ratio"))
+        for complib in COMPLIBS:
+            for complevel in ([1, 9] if complib == 'zlib' else [5, 9]):
+                for storage in STORAGES:
+                    # pandas DataFrames (storage='frame') only support byte shuffle
+                    bitshuffles = [False, True] if complib.startswith('blosc') and storage != 'frame' else [False]
+                    for bitshuffle in bitshuffles:
+                        result = measure(monthFolder, HDFFile, storage, complib, complevel, bitshuffle)
+                        print("%-8s %-14s %-6s %12.0f %12.0f %10.1f %7.1f"
+                              % ((storage, "%s(%i)" % (complib, complevel), "bit" if bitshuffle else "byte") + result))
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the ingest of one month folder of RADOLAN binary files.
+
+Synthetic month folders with all intervals of May 2020 as gzip compressed RW (744 hourly) and YW (8928 5-minute) composites
+are written to a temporary directory. The grid is small by default, because both ways hold the whole month in memory.
+Every folder is ingested in two ways and the run times are printed:
+
+    - former: the file loop of radproc 0.1.4, which opens every file with :func:`radproc.wradlib_io.get_radolan_filehandle`,
+      reads the header byte by byte with :func:`radproc.wradlib_io.read_radolan_header`, locates the header tokens with one
+      str.rfind per token and flips, clips and copies every decoded grid into the output array.
+    - current: :func:`radproc.raw.radolan_binaries_to_dataframe`, which reads headers blockwise, locates the tokens in one regex pass
+      and decodes all files directly into the rows of the output array with :func:`radproc.wradlib_io.read_RADOLAN_stack`.
+
+The header stage (open, read and parse the header of every file) is timed separately, too.
+
+Usage::
+
+    python month_ingest.py [number of rows] [number of columns]
+"""
+from __future__ import division, print_function
+
+import gzip, os, shutil, sys, tempfile, time, warnings
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+
+import radproc.wradlib_io as _wrl_io
+import radproc.raw as _raw
+
+
+def composite(product, when, counts, interval):
+    """RADOLAN composite with header, ETX and 16-bit data block."""
+    nrow, ncol = counts.shape
+    data = counts.astype('<u2').tobytes()
+    head = product + when.strftime('%d%H%M') + '10000' + when.strftime('%m%y')
+    rest = 'VS 3SW   2.13.1PR E-02INT%4iGP%4ix%4iMS 10<boo,ros>' % (interval, nrow, ncol)
+    header = head + 'BY%7i' % (len(head) + 9 + len(rest) + 1 + len(data)) + rest
+    return header.encode() + b'\x03' + data
+
+
+def write_month(folder, product, nrow, ncol, seed=0):
+    """gzip compressed composites of all intervals of May 2020, about 10 % of the cells are wet. Returns the number of files."""
+    interval = 60 if product == 'RW' else 5
+    rng = np.random.RandomState(seed)
+    os.makedirs(folder)
+    when = datetime(2020, 5, 1, 0, 50) if product == 'RW' else datetime(2020, 5, 1, 0, 0)
+    n = 31 * 24 * 60 // interval
+    for i in range(n):
+        counts = (rng.rand(nrow, ncol) < 0.1) * rng.randint(1, 500, (nrow, ncol))
+        # a strip of NoData cells at the edge of the grid
+        counts[:, :ncol // 10] = 0x2000
+        name = 'raa01-%s_10000-%s-dwd---bin.gz' % (product.lower(), when.strftime('%y%m%d%H%M'))
+        with gzip.open(os.path.join(folder, name), 'wb', compresslevel=6) as f:
+            f.write(composite(product, when, counts, interval))
+        when += timedelta(minutes=interval)
+    return n
+
+
+def former_token_pos(header):
+    """get_radolan_header_token_pos() of radproc 0.1.4: one str.rfind per token."""
+    head_dict = _wrl_io.get_radolan_header_token()
+    for token in head_dict.keys():
+        d = header.rfind(token)
+        if d > -1:
+            head_dict[token] = d
+    head = {}
+    result_dict = dict((k, v) for k, v in head_dict.items() if v is not None)
+    for k, v in head_dict.items():
+        if v is not None:
+            filt = [x for x in result_dict.values() if x > v]
+            head[k] = (v + len(k), min(filt) if filt else len(header))
+        else:
+            head[k] = v
+    return head
+
+
+def former_composite(path):
+    """read_RADOLAN_composite() of radproc 0.1.4 for 12-bit products (header read byte by byte)."""
+    f = _wrl_io.get_radolan_filehandle(path)
+    try:
+        attrs = _wrl_io.parse_DWD_quant_composite_header(_wrl_io.read_radolan_header(f))
+        attrs['nodataflag'] = -9999
+        indat = _wrl_io.read_radolan_binary_array(f, attrs['datasize'])
+    finally:
+        f.close()
+    arr = np.frombuffer(indat, np.uint16).astype(np.uint16)
+    nodata = np.where(arr & 0x2000)[0]
+    arr &= 0xFFF
+    arr = arr * attrs['precision']
+    arr[nodata] = attrs['nodataflag']
+    return arr.reshape((attrs['nrow'], attrs['ncol'])), attrs
+
+
+def former_ingest(files):
+    """File loop of radolan_binaries_to_dataframe() of radproc 0.1.4 without clipping."""
+    data, metadata = former_composite(files[0])
+    gridSize = data.size
+    idArr = np.arange(gridSize)
+    dataArr = np.zeros((len(files), gridSize), dtype=np.float32)
+    ind = []
+    for i, path in enumerate(files):
+        data, metadata = former_composite(path)
+        ind.append(metadata['datetime'])
+        data = data[::-1].reshape(gridSize,)
+        data[data == metadata['nodataflag']] = np.nan
+        dataArr[i, :] = data[idArr]
+    df = pd.DataFrame(dataArr, index=ind, columns=idArr)
+    df.index = df.index.tz_localize('UTC')
+    return df
+
+
+def former_headers(files):
+    for path in files:
+        f = _wrl_io.get_radolan_filehandle(path)
+        _wrl_io.parse_DWD_quant_composite_header(_wrl_io.read_radolan_header(f))
+        f.close()
+
+
+def current_headers(files):
+    for path in files:
+        f = _wrl_io.get_radolan_filehandle(path)
+        _wrl_io.parse_DWD_quant_composite_header(_wrl_io.read_radolan_header_block(f)[0])
+        f.close()
+
+
+def timeit(func, *args):
+    t = time.time()
+    result = func(*args)
+    return time.time() - t, result
+
+
+def main(nrow=100, ncol=100):
+    warnings.filterwarnings('ignore')
+    tmp = tempfile.mkdtemp()
+    current = _wrl_io.get_radolan_header_token_pos
+    print("%-8s %6s %12s %12s %12s %12s %8s" % ("product", "files", "former hdr", "current hdr", "former s", "current s", "speedup"))
+    try:
+        for product in ['RW', 'YW']:
+            folder = os.path.join(tmp, product, '2020', '5')
+            n = write_month(folder, product, nrow, ncol)
+            files = sorted(os.path.join(folder, f) for f in os.listdir(folder))
+            # the former token parser is used while the former path is timed
+            _wrl_io.get_radolan_header_token_pos = former_token_pos
+            try:
+                tFormerHeaders, dummy = timeit(former_headers, files)
+                tFormer, old = timeit(former_ingest, files)
+            finally:
+                _wrl_io.get_radolan_header_token_pos = current
+            tHeaders, dummy = timeit(current_headers, files)
+            tCurrent, (new, metadata) = timeit(_raw.radolan_binaries_to_dataframe, folder)
+            if not (new.index.equals(old.index) and np.array_equal(new.values, old.values, equal_nan=True)):
+                print("%s: DataFrames differ!" % product)
+            print("%-8s %6i %12.3f %12.3f %12.3f %12.3f %7.1fx" % (product, n, tFormerHeaders, tHeaders, tFormer, tCurrent, tFormer / tCurrent))
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the run-length decoders for PG/PC composites in :mod:`radproc.wradlib_io`.
+
+Synthetic run-length coded data blocks (460 x 460 cells like the PG product, precipitation classes in runs
+of random width, lines with NoData offsets) are decoded with the former line-by-line decoder
+:func:`radproc.wradlib_io.decode_radolan_runlength_array` and the vectorized decoder
+:func:`radproc.wradlib_io.decode_radolan_runlength_buffer`.
+The decoded arrays are compared and the time per grid of both decoders is printed.
+
+Offsets are at most 255 columns, so both decoders must return identical arrays.
+Larger offsets, coded with several continuation bytes (255), overflow in the line-by-line decoder.
+
+Usage::
+
+    python runlength_decoder.py [number of grids] [number of columns]
+"""
+from __future__ import division, print_function
+
+import sys, time
+import numpy as np
+
+import radproc.wradlib_io as _wrl_io
+
+
+def runlength_line(lineNumber, offset, runs):
+    """One coded line: line number, offset byte(s), one byte per run (width << 4 | value) and line feed."""
+    line = [32 + lineNumber % 200]
+    while offset >= 239:
+        line.append(255)
+        offset -= 239
+    line.append(offset + 16)
+    line += [(width << 4) | value for width, value in runs]
+    return bytes(bytearray(line)) + b'\n'
+
+
+def synthetic_block(nrow=460, ncol=460, maxOffset=255, seed=0):
+    """Run-length coded data block of a PG/PC composite with random runs, terminated by EOT."""
+    rng = np.random.RandomState(seed)
+    lines = []
+    for i in range(nrow):
+        # some lines are empty (only NoData), most lines start with a NoData offset
+        if rng.rand() < 0.05:
+            lines.append(bytes(bytearray([32 + i % 200])) + b'\n')
+            continue
+        offset = rng.randint(0, min(maxOffset, ncol) + 1)
+        runs = []
+        remaining = ncol - offset
+        while remaining > 0:
+            width = min(rng.randint(1, 16), remaining)
+            runs.append((width, rng.randint(0, 10)))
+            remaining -= width
+        lines.append(runlength_line(i, offset, runs))
+    return b''.join(lines) + b'\x04'
+
+
+def timeit(decode, blocks, attrs):
+    t = time.time()
+    arrays = [decode(block, attrs) for block in blocks]
+    return (time.time() - t) / len(blocks), arrays
+
+
+def main(nGrids=10, ncol=460):
+    attrs = {'ncol': ncol, 'nrow': 460, 'nodataflag': 255}
+    blocks = [synthetic_block(460, ncol, seed=i) for i in range(nGrids)]
+    print("%i grids of 460 x %i cells, %.0f kB run-length coded per grid" % (nGrids, ncol, np.mean([len(b) for b in blocks]) / 2**10))
+    tOld, old = timeit(_wrl_io.decode_radolan_runlength_array, blocks, attrs)
+    tNew, new = timeit(_wrl_io.decode_radolan_runlength_buffer, blocks, attrs)
+    identical = all(a.dtype == b.dtype and np.array_equal(a, b) for a, b in zip(old, new))
+    print("%-28s %12s" % ("decoder", "s per grid"))
+    print("%-28s %12.4f" % ("line by line (former)", tOld))
+    print("%-28s %12.4f" % ("vectorized", tNew))
+    print("speedup %.0fx, identical output: %s" % (tOld / tNew, identical))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
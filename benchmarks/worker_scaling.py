@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the number of threads reading the binary files of one month (parameter workers of the ingest functions).
+
+A synthetic month folder of gzip compressed RW composites (see month_ingest.py) is ingested with
+:func:`radproc.raw.radolan_binaries_to_dataframe` for 1, 2, 4, ... threads up to twice the number of CPUs.
+After one warm-up ingest, which reads the files into the page cache, the best of three runs is taken.
+Run time and speedup relative to workers=1 are printed and the DataFrames are checked to be identical.
+Run it on the machine used for ingest to decide whether workers > 1 pays off there.
+
+Usage::
+
+    python worker_scaling.py [number of rows] [number of columns] [maximum number of workers] [number of runs]
+"""
+from __future__ import division, print_function
+
+import os, shutil, sys, tempfile, time, warnings
+from multiprocessing import cpu_count
+import numpy as np
+
+import radproc.raw as _raw
+from month_ingest import write_month
+
+
+def main(nrow=300, ncol=300, maxWorkers=None, repeat=3):
+    warnings.filterwarnings('ignore')
+    if maxWorkers is None:
+        maxWorkers = 2 * cpu_count()
+    workerCounts = [1]
+    while workerCounts[-1] * 2 <= maxWorkers:
+        workerCounts.append(workerCounts[-1] * 2)
+    tmp = tempfile.mkdtemp()
+    try:
+        folder = os.path.join(tmp, 'RW', '2020', '5')
+        n = write_month(folder, 'RW', nrow, ncol)
+        print("%i RW files of %i x %i cells, %i CPUs" % (n, nrow, ncol, cpu_count()))
+        print("%8s %10s %8s" % ("workers", "s", "speedup"))
+        reference = _raw.radolan_binaries_to_dataframe(folder)[0]
+        for workers in workerCounts:
+            times = []
+            for i in range(repeat):
+                t = time.time()
+                df, metadata = _raw.radolan_binaries_to_dataframe(folder, workers=workers)
+                times.append(time.time() - t)
+            t = min(times)
+            if workers == 1:
+                tSerial = t
+            if not np.array_equal(df.values, reference.values, equal_nan=True):
+                print("workers=%i: DataFrame differs!" % workers)
+            print("%8i %10.3f %7.2fx" % (workers, t, tSerial / t))
+            del df
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
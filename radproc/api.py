@@ -16,12 +16,14 @@
 """
 from __future__ import print_function
 
-from radproc.core import coordinates_degree_to_stereographic, save_idarray_to_txt, import_idarray_from_txt 
-from radproc.core import load_months_from_hdf5, load_month, load_years_and_resample, hdf5_to_years, hdf5_to_months, hdf5_to_days, hdf5_to_hours, hdf5_to_hydrologicalSeasons
+from radproc.core import coordinates_degree_to_stereographic, save_idarray_to_txt, import_idarray_from_txt, set_compression_threads
+from radproc.core import load_months_from_hdf5, load_month, load_period, load_years_and_resample, build_aggregates, hdf5_to_years, hdf5_to_months, hdf5_to_days, hdf5_to_hours, hdf5_to_hydrologicalSeasons
 
-from radproc.raw import unzip_RW_binaries, unzip_YW_binaries, radolan_binaries_to_dataframe, radolan_binaries_to_hdf5, create_idraster_and_process_radolan_data, process_radolan_data
+from radproc.raw import unzip_RW_binaries, unzip_YW_binaries, unzip_radolan_binaries, scan_radolan_directory, validate_radolan_directory, radolan_binaries_to_dataframe, radolan_binaries_to_hdf5, create_idraster_and_process_radolan_data, process_radolan_data
+from radproc.raw import radolan_archive_to_dataframe, radolan_archive_to_hdf5, process_radolan_archives, append_radolan_binaries, watch_radolan_directory
+from radproc.raw import IngestReport
 
-from radproc.wradlib_io import read_RADOLAN_composite
+from radproc.wradlib_io import read_RADOLAN_composite, read_RADOLAN_stack
 
 from radproc.heavyrain import find_heavy_rainfalls, count_heavy_rainfall_intervals
 
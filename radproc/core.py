@@ -24,9 +24,12 @@ Data import from HDF5-file and temporal data aggregation.
    coordinates_degree_to_stereographic
    save_idarray_to_txt
    import_idarray_from_txt
+   set_compression_threads
    load_months_from_hdf5
    load_month
+   load_period
    load_years_and_resample
+   build_aggregates
    hdf5_to_years
    hdf5_to_months
    hdf5_to_days
@@ -44,6 +47,9 @@ from __future__ import division, print_function
 import numpy as np
 import pandas as pd
 import sys
+import tables
+from multiprocessing import Pool, cpu_count
+from collections import deque
 
 
 def coordinates_degree_to_stereographic(Lambda_degree, Phi_degree):
@@ -137,10 +143,308 @@ def import_idarray_from_txt(txtFile):
     return idArr
 
 
+
+def set_compression_threads(threads=None):
+    """
+    Sets the number of threads used by PyTables to compress and decompress HDF5 datasets with Blosc codecs
+    (e.g. complib='blosc:lz4' in :func:`radproc.raw.process_radolan_data`).
+    
+    The setting applies to all following writes and reads of the current Python process,
+    e.g. by :func:`radproc.core.load_month` or :func:`radproc.core.load_years_and_resample`.
+    By default, PyTables uses a single thread. Other compression libraries like zlib are not affected.
+    
+    :Parameters:
+    ------------
+    
+        threads : integer (optional, default: None)
+            Number of threads. If None, the number of CPUs is used.
+    
+    :Returns:
+    ---------
+    
+        previous : integer
+            Number of threads used before.
+    """
+    if threads is None:
+        threads = cpu_count()
+    return tables.set_blosc_max_threads(threads)
+
+
+def _dequantize(counts, scale, nodata):
+    """Convert uint16 counts of quantized datasets to float32 values with NaN for NoData."""
+    data = np.empty(counts.shape, dtype=np.float32)
+    # same float arithmetic as the RADOLAN decoder, so the values are identical to unquantized datasets
+    np.multiply(counts, scale, out=data, casting='unsafe')
+    data[counts == nodata] = np.nan
+    return data
+
+
+def _sparse_entries(node, cells=None, start=None, stop=None):
+    """
+    Read the values of a dataset stored in compressed sparse row format by radproc.raw (storage='sparse')
+    together with their row and column positions. Zeros are not stored, NoData values are stored as NaN.
+    If cells is given, only the values of these cells are returned and the column positions refer to the selected columns.
+    If start or stop are given, only the values of these rows are read and the row positions refer to start.
+    Returns rows, cols, values and columns (cell IDs).
+    """
+    indptr = node.indptr[start:None if stop is None else stop + 1]
+    cols = node.indices[indptr[0]:indptr[-1]]
+    values = node.data[indptr[0]:indptr[-1]]
+    columns = node.columns[:]
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    if cells is not None:
+        selected = np.isin(columns, cells)
+        keep = selected[cols]
+        # positions of the selected cells among the selected columns
+        rows, cols, values = rows[keep], (np.cumsum(selected) - 1)[cols[keep]], values[keep]
+        columns = columns[selected]
+    scale = getattr(node._v_attrs, 'radproc_scale', None)
+    if scale is not None:
+        values = _dequantize(values, scale, node._v_attrs.radproc_nodata)
+    return rows, cols, values, columns
+
+
+def _dataset_index(node, start=None, stop=None):
+    """Time index of a dataset stored as arrays by radproc.raw (nanoseconds since epoch in array index)."""
+    index = pd.to_datetime(node.index[start:stop], unit='ns', utc=True)
+    index.name = 'Date (UTC)'
+    return index
+
+
+def _sparse_frame(rows, cols, values, index, columns, sparse=False):
+    """
+    Create DataFrame from the values at the given row and column positions, all other values are zero.
+    If sparse is True, the columns are sparse arrays with fill value 0, otherwise the DataFrame is dense.
+    """
+    if sparse:
+        # sparse extension arrays require pandas >= 0.24
+        # values of every column with ascending row positions
+        order = np.argsort(cols, kind='mergesort')
+        colptr = np.concatenate([[0], np.cumsum(np.bincount(cols, minlength=len(columns)))])
+        rows, values = rows[order], values[order]
+        dtype = pd.SparseDtype(np.float32, 0)
+        # every column is built from one dense buffer, so only a single dense column is held in memory
+        column = np.zeros(len(index), dtype=np.float32)
+        arrays = {}
+        for i in range(len(columns)):
+            colRows = rows[colptr[i]:colptr[i+1]]
+            column[colRows] = values[colptr[i]:colptr[i+1]]
+            arrays[i] = pd.arrays.SparseArray(column, dtype=dtype)
+            column[colRows] = 0
+        df = pd.DataFrame(arrays, index=index)
+        df.columns = columns
+    else:
+        data = np.zeros((len(index), len(columns)), dtype=np.float32)
+        data[rows, cols] = values
+        df = pd.DataFrame(data, index=index, columns=columns)
+    df.columns.name = 'Cell-ID'
+    df.index.name = 'Date (UTC)'
+    return df
+
+
+def _stored_index(f, dataset):
+    """Read only the time index of a monthly dataset from the opened HDFStore f."""
+    node = f.get_node(dataset)
+    if node is not None and getattr(node._v_attrs, 'radproc_format', None) in ('append', 'chunked', 'sparse'):
+        return _dataset_index(node)
+    storer = f.get_storer(dataset)
+    if storer.is_table:
+        return pd.DatetimeIndex(f.select_column(dataset, 'index'), name='Date (UTC)')
+    # pandas DataFrame in fixed format: columns in axis0, time index in axis1
+    return storer.read_index('axis1')
+
+
+def _read_dataset(f, dataset, cells=None, sparse=False, start=None, stop=None):
+    """
+    Read a monthly dataset from the opened HDFStore f into a DataFrame.
+    Datasets written with the chunked or sparse storage layout or appended interval by interval by radproc.raw
+    are stored as arrays instead of pandas DataFrames and are converted to the same DataFrame format here.
+    If cells is given, only the columns of these cells are read from these arrays.
+    If start or stop are given, only these rows (positions) of the dataset are read.
+    Quantized datasets (uint16 counts with the attributes radproc_scale and radproc_nodata) are converted to float values.
+    If sparse is True, a sparse DataFrame with fill value 0 is returned.
+    """
+    node = f.get_node(dataset)
+    storage = None if node is None else getattr(node._v_attrs, 'radproc_format', None)
+    if storage not in ('append', 'chunked', 'sparse'):
+        df = f[dataset] if start is None and stop is None else f.select(dataset, start=start, stop=stop)
+        if cells is not None:
+            df = df.loc[:, df.columns.isin(cells)]
+        attrs = f.get_storer(dataset).attrs
+        scale = getattr(attrs, 'radproc_scale', None)
+        if scale is not None:
+            df = pd.DataFrame(_dequantize(df.values, scale, attrs.radproc_nodata), index=df.index, columns=df.columns)
+        if sparse:
+            df = df.astype(pd.SparseDtype(np.float32, 0))
+        return df
+    
+    if storage == 'sparse':
+        rows, cols, values, columns = _sparse_entries(node, cells, start, stop)
+        df = _sparse_frame(rows, cols, values, _dataset_index(node, start, stop), columns, sparse)
+    else:
+        columns = node.columns[:]
+        index = _dataset_index(node, start, stop)
+        if cells is None:
+            data = node.data[start:stop]
+        else:
+            # increasing positions of the requested cells, only the chunks containing them are read
+            pos = np.nonzero(np.isin(columns, cells))[0]
+            columns = columns[pos]
+            data = node.data[start:stop, pos.tolist()] if len(pos) > 0 else np.empty((len(index), 0), dtype=node.data.dtype)
+        scale = getattr(node._v_attrs, 'radproc_scale', None)
+        if scale is not None:
+            data = _dequantize(data, scale, node._v_attrs.radproc_nodata)
+        df = pd.DataFrame(data, index=index, columns=columns)
+        df.columns.name = 'Cell-ID'
+        if sparse:
+            df = df.astype(pd.SparseDtype(np.float32, 0))
+    # interval length in seconds
+    freq = getattr(node._v_attrs, 'freq', None)
+    if freq is not None:
+        freq = pd.tseries.frequencies.to_offset(pd.Timedelta(seconds=int(freq)))
+        try:
+            # try to prevent dataframe copying by .asfreq(), see radproc.raw.radolan_binaries_to_dataframe()
+            df.index.freq = freq
+        except:
+            # intervals of skipped files are filled with NaN
+            df = df.asfreq(freq)
+            if sparse:
+                # reindexing converts sparse columns to float64
+                df = df.astype(pd.SparseDtype(np.float32, 0))
+    return df
+
+
+def _resample_sum(obj, frequency):
+    """Resample DataFrame or Series to sums with labels at the right, using the syntax of the installed pandas version."""
+    if tuple(int(v) for v in pd.__version__.split('.')[:2]) < (0, 19):
+        return obj.resample(frequency, how = 'sum', closed = 'right', label = 'right')
+    else:
+        return obj.resample(frequency, closed = 'right', label = 'right').sum()
+
+
+def _offset(frequency):
+    """Convert the frequency aliases used in this module to offset objects, which are valid in all pandas versions."""
+    offsets = {'A-DEC' : pd.tseries.offsets.YearEnd(), 'M' : pd.tseries.offsets.MonthEnd(), 'D' : pd.tseries.offsets.Day(), 'H' : pd.tseries.offsets.Hour()}
+    return offsets.get(frequency, frequency)
+
+
+# levels of the aggregate pyramid created by build_aggregates(): name and frequency of the sums
+_AGGREGATE_LEVELS = [('hours', pd.tseries.offsets.Hour()), ('days', pd.tseries.offsets.Day()), ('months', pd.tseries.offsets.MonthEnd())]
+
+
+def _aggregate_key(level, dataset):
+    """Key of the precomputed sums of a monthly dataset, e.g. aggregates/days/2020/5"""
+    return "/".join(["aggregates", level, dataset.strip("/")])
+
+
+def _source_fingerprint(index):
+    """Number of intervals, first and last interval (nanoseconds since epoch) of a monthly dataset, saved with its aggregates."""
+    if len(index) == 0:
+        return [0, 0, 0]
+    return [len(index), int(index[0].value), int(index[-1].value)]
+
+
+def _read_aggregate(f, dataset, frequency):
+    """
+    Return the precomputed sums of the monthly dataset for the target frequency or None if they don't exist
+    or don't match the intervals of the dataset anymore.
+    """
+    levels = [level for level, offset in _AGGREGATE_LEVELS if offset == frequency]
+    if len(levels) == 0:
+        return None
+    key = _aggregate_key(levels[0], dataset)
+    if key not in f:
+        return None
+    if list(f.get_storer(key).attrs.radproc_source) != _source_fingerprint(_stored_index(f, dataset)):
+        return None
+    return f[key]
+
+
+def _read_resampled(f, dataset, frequency, aggregates=True):
+    """
+    Read a monthly dataset from the opened HDFStore f and resample it to sums of the target frequency.
+    If aggregates is True and the sums have been precomputed by build_aggregates(), they are read instead.
+    Datasets stored in sparse format are aggregated directly from the stored values without creating the dense DataFrame of the month.
+    """
+    if aggregates:
+        df = _read_aggregate(f, dataset, frequency)
+        if df is not None:
+            return df
+    node = f.get_node(dataset)
+    if node is None or getattr(node._v_attrs, 'radproc_format', None) != 'sparse':
+        return _resample_sum(_read_dataset(f, dataset), frequency)
+    
+    rows, cols, values, columns = _sparse_entries(node)
+    index = _dataset_index(node)
+    # number of intervals per period, the intervals of a period are consecutive rows
+    counts = _resample_sum(pd.Series(np.ones(len(index), dtype=np.int64), index=index), frequency)
+    periods = np.repeat(np.arange(len(counts)), counts.values.astype(np.int64))
+    # NoData is skipped like in DataFrame.sum()
+    valid = ~np.isnan(values)
+    sums = np.bincount(periods[rows[valid]] * len(columns) + cols[valid], weights=values[valid], minlength=len(counts) * len(columns))
+    df = pd.DataFrame(sums.reshape(len(counts), len(columns)).astype(np.float32), index=counts.index, columns=columns)
+    df.columns.name = 'Cell-ID'
+    return df
+
   
-def load_months_from_hdf5(HDFFile, year,  months=[1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12]):
+def _utc_timestamp(t):
+    """Convert date string or timestamp to a pandas Timestamp in UTC. Naive dates are interpreted as UTC."""
+    t = pd.Timestamp(t)
+    return t.tz_localize('UTC') if t.tzinfo is None else t.tz_convert('UTC')
+
+
+def _load_datasets(f, datasets, cells=None, start=None, end=None):
+    """
+    Read the rows between the UTC timestamps start and end (both included) of consecutive monthly datasets from the opened HDFStore f
+    and concatenate them to one DataFrame. The time indices are read first, so the data are copied only once into one preallocated array.
+    Intervals missing between the datasets are filled with NaN.
+    """
+    # read the time indices first to determine the rows of every month within the time range
+    parts = []
+    for dataset in datasets:
+        index = _stored_index(f, dataset)
+        first = 0 if start is None else index.searchsorted(start, side='left')
+        last = len(index) if end is None else index.searchsorted(end, side='right')
+        if last > first or not parts:
+            parts.append((dataset, first, last, index[first:last]))
+    nrows = sum(len(index) for dataset, first, last, index in parts)
+    
+    data = None
+    freq = None
+    pos = 0
+    for dataset, first, last, index in parts:
+        df = _read_dataset(f, dataset, cells, start=first, stop=last)
+        if data is None:
+            # all months share the cells of the first month
+            columns = df.columns
+            data = np.empty((nrows, len(columns)), dtype=df.values.dtype)
+        elif not df.columns.equals(columns):
+            df = df.reindex(columns=columns)
+        data[pos:pos + len(df)] = df.values
+        pos += len(df)
+        if df.index.freq is not None:
+            freq = df.index.freq
+    
+    index = parts[0][3].append([p[3] for p in parts[1:]])
+    index.name = 'Date (UTC)'
+    df = pd.DataFrame(data, index=index, columns=columns)
+    if freq is not None:
+        try:
+            df.index.freq = freq
+        except:
+            # intervals missing between months are filled with NaN
+            df = df.asfreq(freq)
+    return df
+
+
+def load_months_from_hdf5(HDFFile, year,  months=[1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12], cells=None, start=None, end=None):
     """
     Imports the specified months of one year and merges them to one DataFrame.
+    
+    The time indices of all months are read first, so the data of all months are copied only once into one preallocated array.
+    Only the requested cells and the rows between start and end are read from HDF5 datasets stored as arrays
+    (storage='chunked', 'sparse' or appended datasets, see :func:`radproc.raw.radolan_binaries_to_hdf5`).
+    From DataFrames in fixed format, all cells of the selected rows are read.
 
     :Parameters:
     ------------
@@ -151,6 +455,12 @@ def load_months_from_hdf5(HDFFile, year,  months=[1, 2, 3, 4, 5, 6, 7, 8, 9, 10,
             Year for which data are to be loaded.    
         months : list of integers (optional, default: [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12])
             Months for which data are to be loaded.
+        cells : list of integers (optional, default: None)
+            ID values of the cells for which data are to be loaded. Default: all cells.
+        start : string or pandas Timestamp (optional, default: None)
+            First interval to be loaded, e.g. '2020-05-03 12:50'. Dates without time zone are interpreted as UTC. Default: start of the first month.
+        end : string or pandas Timestamp (optional, default: None)
+            Last interval to be loaded (included). Default: end of the last month.
                 
     :Returns:
     ---------
@@ -158,21 +468,18 @@ def load_months_from_hdf5(HDFFile, year,  months=[1, 2, 3, 4, 5, 6, 7, 8, 9, 10,
         df : pandas DataFrame
     """
     
+    if start is not None:
+        start = _utc_timestamp(start)
+    if end is not None:
+        end = _utc_timestamp(end)
+    
     with pd.HDFStore(HDFFile, "r") as f:
-        # Dataset des ersten Monats in DataFrame importieren
-        dataset = "%4i/%i" % (year,months[0])
-        df = f[dataset]
-        fr = df.index.freq
-        # Datasets aller weiteren Monate importieren und an DataFrame anhängen
-        for i in range(1,len(months)):
-            dataset = "%4i/%i" % (year,months[i])
-            df = df.append(f[dataset])
-            df = df.asfreq(fr)
+        df = _load_datasets(f, ["%4i/%i" % (year, month) for month in months], cells, start, end)
     
     return df
 
 
-def load_month(HDFFile, year, month):
+def load_month(HDFFile, year, month, cells=None, sparse=False):
     """
     Imports the dataset of specified month from HDF5.
 
@@ -185,6 +492,13 @@ def load_month(HDFFile, year, month):
             Year for which data are to be loaded.    
         month : integer
             Month for which data are to be loaded.
+        cells : list of integers (optional, default: None)
+            ID values of the cells for which data are to be loaded. Default: all cells.
+            For datasets written with storage='chunked' (see :func:`radproc.raw.radolan_binaries_to_hdf5`),
+            only the data of these cells are read from disk.
+        sparse : bool (optional, default: False)
+            If True, a sparse DataFrame (columns of dtype Sparse[float32, 0]) is returned, which only holds the values different from zero in memory.
+            Datasets written with storage='sparse' are converted without creating the dense DataFrame. Requires pandas >= 0.24.
                 
     :Returns:
     ---------
@@ -195,12 +509,165 @@ def load_month(HDFFile, year, month):
     with pd.HDFStore(HDFFile, "r") as f:
         # Dataset des ersten Monats in DataFrame importieren
         dataset = "%4i/%i" % (year, month)
-        df = f[dataset]
+        df = _read_dataset(f, dataset, cells, sparse)
+    
+    return df
+
+
+def load_period(HDFFile, start, end, cells=None):
+    """
+    Imports the data of an arbitrary time period from the monthly datasets of a HDF5 file and merges them to one DataFrame,
+    e.g. to analyse a rainfall event spanning the turn of a month.
+    
+    Only the datasets of the months overlapping the period are opened and only the rows within the period are read.
+    Row ranges are determined from the time index of every dataset and read by row slicing
+    (DataFrames in fixed or table format and datasets written with storage='chunked' or 'sparse', see :func:`radproc.raw.radolan_binaries_to_hdf5`).
+    Months missing in the HDF5 file and intervals missing between months are filled with NaN.
+
+    :Parameters:
+    ------------
+    
+        HDFFile : string
+            Path and name of the HDF5 file containing monthly datasets.
+        start : string or pandas Timestamp
+            First interval to be loaded, e.g. '2020-05-31 18:00'. Dates without time zone are interpreted as UTC.
+        end : string or pandas Timestamp
+            Last interval to be loaded (included), e.g. '2020-06-01 06:00'.
+        cells : list of integers (optional, default: None)
+            ID values of the cells for which data are to be loaded. Default: all cells.
+                
+    :Returns:
+    ---------
+    
+        df : pandas DataFrame
+    """
+    
+    start = _utc_timestamp(start)
+    end = _utc_timestamp(end)
+    if end < start:
+        raise ValueError("end must not be earlier than start!")
+    
+    with pd.HDFStore(HDFFile, "r") as f:
+        datasets = []
+        for period in pd.period_range(start.tz_localize(None), end.tz_localize(None), freq=pd.tseries.offsets.MonthEnd()):
+            dataset = "%4i/%i" % (period.year, period.month)
+            if dataset in f:
+                datasets.append(dataset)
+        if len(datasets) == 0:
+            raise KeyError("No monthly datasets between %s and %s in %s" % (start, end, HDFFile))
+        df = _load_datasets(f, datasets, cells, start, end)
     
     return df
 
 
-def load_years_and_resample(HDFFile, year_start, year_end=0, freq="years"):
+def _monthly_datasets(f):
+    """Keys of all monthly datasets <year>/<month> in the opened HDFStore f, including datasets stored as arrays by radproc.raw."""
+    datasets = []
+    for yearGroup in f.root._f_iter_nodes('Group'):
+        if not yearGroup._v_name.isdigit():
+            continue
+        for monthGroup in yearGroup._f_iter_nodes('Group'):
+            if monthGroup._v_name.isdigit():
+                datasets.append("%s/%s" % (yearGroup._v_name, monthGroup._v_name))
+    return sorted(datasets, key=lambda dataset: [int(v) for v in dataset.split("/")])
+
+
+def build_aggregates(HDFFile, rebuild=False, complevel=9, complib='zlib'):
+    """
+    Precomputes hourly, daily and monthly precipitation sums of all monthly datasets in a HDF5 file
+    and saves them as aggregate pyramid in the same file (datasets *aggregates/<hours|days|months>/<year>/<month>*).
+    
+    :func:`radproc.core.load_years_and_resample` and the wrapper functions :func:`radproc.core.hdf5_to_years`, :func:`radproc.core.hdf5_to_months`,
+    :func:`radproc.core.hdf5_to_days`, :func:`radproc.core.hdf5_to_hours` and :func:`radproc.core.hdf5_to_hydrologicalSeasons`
+    read these sums instead of the precipitation data, e.g. twelve monthly sums per year for annual and seasonal sums.
+    The results are identical to resampling the precipitation data.
+    
+    Only aggregates which are missing or out of date are computed, so the function can be called again whenever months have been added.
+    Aggregates of months overwritten by the functions of :py:mod:`radproc.raw` are removed and recomputed by the next call.
+    Aggregates not matching the time index of their dataset are ignored when data are loaded.
+    Hourly sums are only created for data with a temporal resolution finer than one hour (e.g. YW data).
+    
+    :Parameters:
+    ------------
+    
+        HDFFile : string
+            Path and name of the HDF5 file containing monthly datasets.
+        rebuild : bool (optional, default: False)
+            If True, the aggregates of all months are computed again.
+        complevel : integer (optional, default: 9)
+            compression level of the aggregates.
+        complib : string (optional, default: 'zlib')
+            compression library of the aggregates, e.g. 'zlib' or 'blosc:lz4'.
+    
+    :Returns:
+    ---------
+    
+        No return value
+    """
+    
+    with pd.HDFStore(HDFFile, mode = "a", complevel=complevel, complib=complib) as f:
+        for dataset in _monthly_datasets(f):
+            index = _stored_index(f, dataset)
+            fingerprint = _source_fingerprint(index)
+            interval = index[1] - index[0] if len(index) > 1 else None
+            levels = []
+            for level, offset in _AGGREGATE_LEVELS:
+                if level == 'hours' and interval is not None and interval >= pd.Timedelta(hours=1):
+                    continue
+                key = _aggregate_key(level, dataset)
+                if rebuild or key not in f or list(f.get_storer(key).attrs.radproc_source) != fingerprint:
+                    levels.append((key, offset))
+            if len(levels) == 0:
+                continue
+            node = f.get_node(dataset)
+            if getattr(node._v_attrs, 'radproc_format', None) == 'sparse':
+                df = None
+            else:
+                # read the month only once for all levels
+                df = _read_dataset(f, dataset)
+            for key, offset in levels:
+                agg = _read_resampled(f, dataset, offset, aggregates=False) if df is None else _resample_sum(df, offset)
+                f.put(key, agg)
+                f.get_storer(key).attrs.radproc_source = fingerprint
+            del df
+            # keep finished months on disk if a later month crashes the process
+            f.flush()
+            print(dataset + " aggregated")
+
+
+def _resample_month(task):
+    """Read and resample one monthly dataset in a worker process of load_years_and_resample()."""
+    HDFFile, dataset, frequency = task
+    with pd.HDFStore(HDFFile, "r") as f:
+        return _read_resampled(f, dataset, frequency)
+
+
+def _resample_months_parallel(HDFFile, datasets, frequency, processes):
+    """
+    Read and resample monthly datasets in a pool of worker processes, each opening the HDF5 file for reading.
+    While the calling process collects the results, the next months are already read, at most two months per process in advance.
+    Returns list of resampled DataFrames in the order of datasets.
+    """
+    monthFrames = []
+    pending = deque()
+    pool = Pool(min(processes, len(datasets)))
+    try:
+        i = 0
+        while i < len(datasets) or pending:
+            while i < len(datasets) and len(pending) < 2 * processes:
+                pending.append(pool.apply_async(_resample_month, ((HDFFile, datasets[i], frequency),)))
+                i += 1
+            monthFrames.append(pending.popleft().get())
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    return monthFrames
+
+
+def load_years_and_resample(HDFFile, year_start, year_end=0, freq="years", processes=1):
     """Imports all months of the specified years, merges them together to one DataFrame \
     and resamples the latter to [annual | monthly | daily | hourly] precipitation sums. 
     
@@ -217,6 +684,9 @@ def load_years_and_resample(HDFFile, year_start, year_end=0, freq="years"):
             Target frequency.
             Available frequencies for downsampling:
                 "years", "months", "days", "hours"
+        processes : integer (optional, default: 1)
+            Number of processes reading and resampling the monthly datasets in parallel. None uses all CPU cores.
+            Since new processes import the calling script on Windows, scripts using processes > 1 need an *if __name__ == '__main__':* guard.
             
     :Returns:
     ---------
@@ -233,7 +703,7 @@ def load_years_and_resample(HDFFile, year_start, year_end=0, freq="years"):
         >>> import radproc as rp
         >>> meanPrecip = rp.load_years_and_resample(r"C:\Data\RADOLAN.h5", 2010, 2015, "years").mean()
         # The resulting pandas Series can be exported to an ESRI Grid:    
-        >>> rp.export_to_raster(series=meanPrecip, idRaster=rp.import_idarray_from_raster(r"C:\Data\idras"), outRaster=r"P:\GIS_data\N_mean10_15")
+        >>> rp.export_to_raster(series=meanPrecip, idRaster=rp.import_idarray_from_raster(r"C:\Data\idras"), outRaster=r"P:\GIS_data\\N_mean10_15")
     
     .. note:: All resampling functions set the label of aggregated intervals at the right,
               hence every label describes the precipitation accumulated in the previous interval period.
@@ -261,64 +731,34 @@ def load_years_and_resample(HDFFile, year_start, year_end=0, freq="years"):
         
         with pd.HDFStore(HDFFile, "r") as f:
         
-            pd_version = int(pd.__version__.split('.')[-2])
-            
-            for year in years:
-                # Load dataset of first month into DataFrame
-                dataset = "%4i/%i" % (year,1)
-                df = f[dataset]
-                #reduce data size by resampling
-                if pd_version < 19 and frequency != 'A-DEC':
-                    df = df.resample(frequency, how = 'sum', closed = 'right', label = 'right')
-                elif pd_version >= 19 and frequency != 'A-DEC':
-                    df = df.resample(frequency, closed = 'right', label = 'right').sum()
-                # resample to months if years are target frequency
-                elif pd_version < 19 and frequency == 'A-DEC':
-                    df = df.resample('M', how = 'sum', closed = 'right', label = 'right')
-                elif pd_version >= 19 and frequency == 'A-DEC':  
-                    df = df.resample('M', closed = 'right', label = 'right').sum()
-                
-                # Load datasets of other months, resample and append to DataFrame of first month
-                for month in range(2,13):
-                    dataset = "%4i/%i" % (year,month)
-                    dfm = f[dataset]
-                    
-                    if pd_version < 19 and frequency != 'A-DEC':
-                        dfm = dfm.resample(frequency, how = 'sum', closed = 'right', label = 'right')
-                    elif pd_version >= 19 and frequency != 'A-DEC':
-                        dfm = dfm.resample(frequency, closed = 'right', label = 'right').sum()
-                    # resample to months if years are target frequency
-                    elif pd_version < 19 and frequency == 'A-DEC':
-                        dfm = dfm.resample('M', how = 'sum', closed = 'right', label = 'right')
-                    elif pd_version >= 19 and frequency == 'A-DEC':  
-                        dfm = dfm.resample('M', closed = 'right', label = 'right').sum()                    
-                    
-                    df = df.append(dfm)
-                    
-                # Check for pandas version and apply appropriate syntax for resample method
-                # to keep compatibility to older versions and avoid FutureWarnings in newer versions.
-                if int(pd.__version__.split('.')[-2]) < 19:
-                    df = df.resample(frequency, how = 'sum', closed = 'right', label = 'right')
-                else:
-                    df = df.resample(frequency, closed = 'right', label = 'right').sum()
-                
-                # for first year: copy to new year DataFrame
-                if year == years[0]:
-                    dfY = df.copy()
-                    del df
-                # for following years: append to year DataFrame
-                else:
-                    dfY = dfY.append(df)
+            # Load datasets of all months and reduce data size by resampling,
+            # resample to months if years are target frequency.
+            # Months missing in the HDF5 file are skipped, so periods don't need to start in January.
+            monthFrequency = 'M' if frequency == 'A-DEC' else frequency
+            datasets = ["%4i/%i" % (year, month) for year in years for month in range(1, 13)]
+            datasets = [dataset for dataset in datasets if dataset in f]
+            if len(datasets) == 0:
+                raise KeyError("No monthly datasets")
+            if processes is None:
+                processes = cpu_count()
+            if processes > 1 and len(datasets) > 1:
+                monthFrames = _resample_months_parallel(HDFFile, datasets, _offset(monthFrequency), processes)
+            else:
+                monthFrames = [_read_resampled(f, dataset, _offset(monthFrequency)) for dataset in datasets]
+            # The partial sums of all months are combined in one step. Periods spanning the turn of a month
+            # occur in two months and are summed up here.
+            dfY = _resample_sum(pd.concat(monthFrames), _offset(frequency))
+            del monthFrames
             
             try:
                 # set frequency
-                dfY = dfY.asfreq(frequency)
+                dfY = dfY.asfreq(_offset(frequency))
             except ValueError:
                 # for gauge data, "ValueError: cannot reindex from a duplicate axis" occurs, obviously due to duplicate index labels.
                 # To avoid this, rows with duplicate labels are removed and only the first occurrence is kept.
                 # the ~ operator reverses the boolean values from the duplicated method in order to keep only NOT duplicated labels.
                 dfY = dfY[~dfY.index.duplicated(keep='first')]
-                dfY = dfY.asfreq(frequency)
+                dfY = dfY.asfreq(_offset(frequency))
             
             # Years and months have default setting to set index at end of definded interval.
             # Day Index uses date of last interval (next day at ~6h) which is confusing. So shift index back to correct day.
@@ -331,13 +771,10 @@ def load_years_and_resample(HDFFile, year_start, year_end=0, freq="years"):
         print("Error! HDF5 file can not be opened!\n \
 Please check if directory path is correct and file is currently used by any other application.")
     except KeyError:
-        print('Error at %i/%i' %(year, month))
+        print('Error! No monthly datasets found for %i to %i!' % (year_start, year_end))
     except TypeError:
         print('Error! Please enter years as integer numbers and path to HDF5 file as string!\n \
-Example: rp.load_years_and_resample(r"P:\User\Data\HDF5\RW.h5", 2008, 2010)')
-    except UnboundLocalError:
-        print('Error! Sorry, this function currently only works for entire years starting in January! \n \
-To resample smaller time periods, you can import the months with load_months_from_hdf5() and resample them with df.resample()')
+Example: rp.load_years_and_resample(r"P:\\User\\Data\\HDF5\\RW.h5", 2008, 2010)')
     except:
         print("An unexpected error occurred")
         raise
@@ -345,7 +782,7 @@ To resample smaller time periods, you can import the months with load_months_fro
 
 # Wrapper functions to faciliate resampling and avoid errors:
 #------------------------------------------------------------    
-def hdf5_to_years(HDFFile, year_start, year_end=0):
+def hdf5_to_years(HDFFile, year_start, year_end=0, processes=1):
     """
     Wrapper for load_years_and_resample() to import all months of the specified years, merge them together to one DataFrame \
     and resample the latter to annual precipitation sums. 
@@ -359,6 +796,8 @@ def hdf5_to_years(HDFFile, year_start, year_end=0):
             First year for which data are to be loaded.    
         year_end : integer (optional, default: start_year)
             Last year for which data are to be loaded.
+        processes : integer (optional, default: 1)
+            Number of processes reading and resampling the monthly datasets in parallel, see load_years_and_resample().
             
     :Returns:
     ---------
@@ -369,10 +808,10 @@ def hdf5_to_years(HDFFile, year_start, year_end=0):
     .. note:: All resampling functions set the label of aggregated intervals at the right,
               hence every label describes the precipitation accumulated in the previous interval period.
     """
-    return load_years_and_resample(HDFFile, year_start, year_end, freq = "years")
+    return load_years_and_resample(HDFFile, year_start, year_end, freq = "years", processes = processes)
 
 
-def hdf5_to_months(HDFFile, year_start, year_end=0):
+def hdf5_to_months(HDFFile, year_start, year_end=0, processes=1):
     """
     Wrapper for load_years_and_resample() to import all months of the specified years, merge them together to one DataFrame \
     and resample the latter to monthly precipitation sums. 
@@ -386,6 +825,8 @@ def hdf5_to_months(HDFFile, year_start, year_end=0):
             First year for which data are to be loaded.    
         year_end : integer (optional, default: year_start)
             Last year for which data are to be loaded.
+        processes : integer (optional, default: 1)
+            Number of processes reading and resampling the monthly datasets in parallel, see load_years_and_resample().
             
     :Returns:
     ---------
@@ -397,10 +838,10 @@ def hdf5_to_months(HDFFile, year_start, year_end=0):
               hence every label describes the precipitation accumulated in the previous interval period.
     
     """
-    return load_years_and_resample(HDFFile, year_start, year_end, freq = "months")
+    return load_years_and_resample(HDFFile, year_start, year_end, freq = "months", processes = processes)
 
 
-def hdf5_to_days(HDFFile, year_start, year_end=0):
+def hdf5_to_days(HDFFile, year_start, year_end=0, processes=1):
     """
     Wrapper for load_years_and_resample() to import all months of the specified years, merge them together to one DataFrame \
     and resample the latter to daily precipitation sums. 
@@ -413,6 +854,8 @@ def hdf5_to_days(HDFFile, year_start, year_end=0):
             First year for which data are to be loaded.    
         year_end : integer (optional, default: start_year)
             Last year for which data are to be loaded.
+        processes : integer (optional, default: 1)
+            Number of processes reading and resampling the monthly datasets in parallel, see load_years_and_resample().
             
     :Returns:
     ---------
@@ -424,10 +867,10 @@ def hdf5_to_days(HDFFile, year_start, year_end=0):
               hence every label describes the precipitation accumulated in the previous interval period.
     
     """
-    return load_years_and_resample(HDFFile, year_start, year_end, freq = "days")
+    return load_years_and_resample(HDFFile, year_start, year_end, freq = "days", processes = processes)
 
 
-def hdf5_to_hours(HDFFile, year_start, year_end=0):
+def hdf5_to_hours(HDFFile, year_start, year_end=0, processes=1):
     """
     Wrapper for load_years_and_resample() to import all months of the specified years, merge them together to one DataFrame \
     and resample the latter to hourly precipitation sums. 
@@ -441,6 +884,8 @@ def hdf5_to_hours(HDFFile, year_start, year_end=0):
             First year for which data are to be loaded.    
         year_end : integer (optional, default: start_year)
             Last year for which data are to be loaded.
+        processes : integer (optional, default: 1)
+            Number of processes reading and resampling the monthly datasets in parallel, see load_years_and_resample().
             
     :Returns:
     ---------
@@ -455,11 +900,11 @@ def hdf5_to_hours(HDFFile, year_start, year_end=0):
               keep in mind, that hours in RW always start at hh-1:50 whereas the resampled hours begin at hh:00.
     
     """
-    return load_years_and_resample(HDFFile, year_start, year_end, freq = "hours")
+    return load_years_and_resample(HDFFile, year_start, year_end, freq = "hours", processes = processes)
 
 #-----------------------------------------------------------------------------------
 
-def hdf5_to_hydrologicalSeasons(HDFFile, year_start, year_end=0):
+def hdf5_to_hydrologicalSeasons(HDFFile, year_start, year_end=0, processes=1):
     """
     Calculates the precipitation sums of the hydrological summer and winter seasons (May - October and November - April).
     
@@ -476,6 +921,8 @@ def hdf5_to_hydrologicalSeasons(HDFFile, year_start, year_end=0):
             First year for which data are to be loaded. The months January to April of this year are not contained in the precipitation sums!    
         year_end : integer (optional, default: start_year)
             Last year for which data are to be loaded. The months November and December of this year are not contained in the precipitation sums!
+        processes : integer (optional, default: 1)
+            Number of processes reading and resampling the monthly datasets in parallel, see load_years_and_resample().
             
     :Returns:
     ---------
@@ -493,7 +940,7 @@ def hdf5_to_hydrologicalSeasons(HDFFile, year_start, year_end=0):
         year_end = year_start
         print("year_end set to year_start.")
     
-    dfm = hdf5_to_months(HDFFile, year_start, year_end)
+    dfm = hdf5_to_months(HDFFile, year_start, year_end, processes)
     dfm = dfm.truncate('%i-05' % year_start,'%i-10' % year_end)
     
     # Check for pandas version and apply appropriate syntax for resample method
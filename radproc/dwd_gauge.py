@@ -264,7 +264,7 @@ def summarize_metadata_files(inFolder):
     return summaryFile
 
 
-def dwd_gauges_to_hdf5(inFolder, HDFFile):
+def dwd_gauges_to_hdf5(inFolder, HDFFile, complevel=0, complib='zlib'):
     """
     Import all textfiles containing DWD rain gauge data in MR90 format from input folder into a DataFrame and save it as monthly HDF5 datasets.
     
@@ -279,7 +279,12 @@ def dwd_gauges_to_hdf5(inFolder, HDFFile):
         HDFFile : string
             Path and name of the HDF5 file.
             If the specified HDF5 file already exists, the new dataset will be appended; if the HDF5 file doesn't exist, it will be created. 
-
+        complevel : integer (optional, default: 0)
+            defines the level of compression for the output HDF5 file.
+            complevel may range from 0 (no compression) to 9, where 9 is the highest compression possible.
+        complib : string (optional, default: 'zlib')
+            compression library for the output HDF5 file, e.g. 'zlib', 'blosc:lz4' or 'blosc:zstd'.
+            See :func:`radproc.raw.radolan_binaries_to_hdf5`.
         
     :Returns:
     ---------
@@ -315,7 +320,7 @@ def dwd_gauges_to_hdf5(inFolder, HDFFile):
 
     #summaryFile = summarize_metadata_files(inFolder_metadata)
     warnings.filterwarnings('ignore', category=tables.NaturalNameWarning)
-    hdf = pd.HDFStore(HDFFile, mode = "a")
+    hdf = pd.HDFStore(HDFFile, mode = "a", complevel=complevel, complib=complib)
 
     for year in np.unique(gaugeDF.index.year):
         for month in range(1, 13):
@@ -49,6 +49,31 @@ def _exceeding(rowseries, thresholdValue, minArea):
     return minYcellsgreqXmm_bool
 
 
+def _heavy_rainfall_intervals(HDFFile, year, month, thresholdValue, minArea):
+    """
+    Load the intervals of one month in which thresholdValue is reached in more than minArea cells.
+    For datasets stored in sparse format (see :func:`radproc.raw.radolan_binaries_to_hdf5`), the exceedances are counted on the stored values
+    and only the selected intervals are converted to a dense DataFrame.
+    """
+    with pd.HDFStore(HDFFile, "r") as f:
+        node = f.get_node("%4i/%i" % (year, month))
+        # zeros are not stored in sparse datasets, so only positive thresholds can be evaluated on the stored values
+        if node is not None and getattr(node._v_attrs, 'radproc_format', None) == 'sparse' and thresholdValue > 0:
+            rows, cols, values, columns = _core._sparse_entries(node)
+            index = _core._dataset_index(node)
+            exceedances = np.bincount(rows[values >= thresholdValue], minlength=len(index)) > minArea
+            keep = exceedances[rows]
+            # row positions within the selected intervals
+            newRows = np.cumsum(exceedances) - 1
+            return _core._sparse_frame(newRows[rows[keep]], cols[keep], values[keep], index[exceedances], columns)
+    
+    df = _core.load_month(HDFFile=HDFFile, year=year, month=month)
+    #create a Series with a Bool for each row, True == criteria fulfilled and interval identified as heavy rainfall.
+    exceedances = df.apply(_exceeding, axis = 1, args=(thresholdValue, minArea))
+    #select all rows for which the calculated Bool evaluates to True
+    return df.loc[exceedances == True]
+
+
 def find_heavy_rainfalls(HDFFile, year_start, year_end, thresholdValue, minArea=1, season='Year'):
     """
     Creates a DataFrame containing all heavy rainfalls (intervals) exceeding a specified threshold intensity value.
@@ -124,16 +149,13 @@ def find_heavy_rainfalls(HDFFile, year_start, year_end, thresholdValue, minArea=
         
     for year in years:
         for month in months:
-            df = _core.load_month(HDFFile=HDFFile, year=year, month=month)
-            #create a Series with a Bool for each row, True == criteria fulfilled and interval identified as heavy rainfall.
-            exceedances = df.apply(_exceeding, axis = 1, args=(thresholdValue, minArea))
-            #select all rows for which the calculated Bool evaluates to True and
+            df = _heavy_rainfall_intervals(HDFFile, year, month, thresholdValue, minArea)
             #try to append these data to the dataframe with identified heavy rainfall intervals
             try:
-                heavy_rains = heavy_rains.append(df.loc[exceedances == True])
+                heavy_rains = pd.concat([heavy_rains, df])
             # for the first month, heavy_rains is not yet defined, which causes a NameError. In this case, a new DataFrame is created instead of appending data.
             except NameError:
-                heavy_rains = df.loc[exceedances == True]
+                heavy_rains = df
                 
             del df
             gc.collect()
@@ -207,7 +229,7 @@ def count_heavy_rainfall_intervals(HDFFile, year_start, year_end, thresholdValue
     return interval_count
 
 
-def duration_sum(inHDFFile, D, year_start, year_end, outHDFFile, complevel=9):
+def duration_sum(inHDFFile, D, year_start, year_end, outHDFFile, complevel=9, complib='zlib'):
     """
     Calculate duration sum (Dauerstufe) of a defined time window D.
     The output time series will have the same frequency as the input data,
@@ -236,6 +258,9 @@ def duration_sum(inHDFFile, D, year_start, year_end, outHDFFile, complevel=9):
         complevel may range from 0 to 9, where 9 is the highest compression possible.
         Using a high compression level reduces data size significantly,
         but writing data to HDF5 takes more time and data import from HDF5 is slighly slower.
+    complib : string (optional, default: 'zlib')
+        compression library for the output HDF5 file, e.g. 'zlib', 'blosc:lz4' or 'blosc:zstd'.
+        See :func:`radproc.raw.radolan_binaries_to_hdf5`.
         
     :Returns:
     ---------
@@ -267,7 +292,7 @@ def duration_sum(inHDFFile, D, year_start, year_end, outHDFFile, complevel=9):
                     # consequently, without shifting, the label describes the end of the duration interval - 5 minutes
                     durDF = df.rolling(duration).sum().shift(periods=1, freq = '5min')
                     HDFDataset = "%s/%s" %(year, month)
-                    durDF.to_hdf(path_or_buf=outHDFFile, key=HDFDataset, mode="a", format="fixed", data_columns = True, index = True, complevel=complevel, complib="zlib")
+                    durDF.to_hdf(path_or_buf=outHDFFile, key=HDFDataset, mode="a", format="fixed", data_columns = True, index = True, complevel=complevel, complib=complib)
                     del durDF
                     gc.collect()
                     print("%s-%s done!" %(year, month))
@@ -276,12 +301,12 @@ def duration_sum(inHDFFile, D, year_start, year_end, outHDFFile, complevel=9):
                 #-----------------------------------------------------------------------    
                 # Only keep end of month (e.g. last two intervals for D=15 min) and append next month to it
                 df = df.iloc[-nIntervalsAtEndOfMonth: , ]
-                df = df.append(_core.load_month(HDFFile=inHDFFile, month=month, year=year)).asfreq('5min')
+                df = pd.concat([df, _core.load_month(HDFFile=inHDFFile, month=month, year=year)]).asfreq('5min')
                 # rolling window of specified duration. sum is calculated for each window with label on the right (+5 minutes / shift(1), see above)
                 # remove first intervals (number equal to the intervals taken from previous month) with incorrect results due to missing data (intervals contained in previous month)
                 durDF = df.rolling(duration).sum().shift(periods=1, freq = '5min').iloc[nIntervalsAtEndOfMonth: , ]
                 HDFDataset = "%s/%s" %(year, month)
-                durDF.to_hdf(path_or_buf=outHDFFile, key=HDFDataset, mode="a", format="fixed", data_columns = True, index = True, complevel=complevel, complib="zlib")
+                durDF.to_hdf(path_or_buf=outHDFFile, key=HDFDataset, mode="a", format="fixed", data_columns = True, index = True, complevel=complevel, complib=complib)
                 del durDF
                 gc.collect()
                 print("%s-%s done!" %(year, month))
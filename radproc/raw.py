@@ -24,10 +24,19 @@ Unzip, import, clip and convert RADOLAN raw data and write DataFrames to HDF5.
    
    unzip_RW_binaries
    unzip_YW_binaries
+   unzip_radolan_binaries
+   scan_radolan_directory
+   validate_radolan_directory
    radolan_binaries_to_dataframe
    radolan_binaries_to_hdf5
    create_idraster_and_process_radolan_data
    process_radolan_data
+   radolan_archive_to_dataframe
+   radolan_archive_to_hdf5
+   process_radolan_archives
+   append_radolan_binaries
+   watch_radolan_directory
+   IngestReport
    
    
 .. module:: radproc.raw
@@ -43,8 +52,17 @@ import os, sys
 
 import tarfile as _tarfile
 import gzip as _gzip
-import shutil as _shutil
+import io as _io
+import calendar as _calendar
+import hashlib as _hashlib
+import time as _time
+import json as _json
+import logging as _logging
+from timeit import default_timer as _timer
 from datetime import datetime
+from multiprocessing import Pool, cpu_count
+from multiprocessing.pool import ThreadPool
+from collections import deque
 
 #from radproc.wradlib_io import read_RADOLAN_composite
 #from radproc.sampledata import get_projection_file_path
@@ -54,7 +72,7 @@ import radproc.sampledata as _sampledata
 import warnings, tables
 
 
-def unzip_RW_binaries(zipFolder, outFolder):
+def unzip_RW_binaries(zipFolder, outFolder, processes=1, compression='gzip', compresslevel=9):
     """
     Unzips RADOLAN RW binary data saved in monthly .tar or tar.gz archives (e.g. RWrea_200101.tar.gz, RWrea_200102.tar.gz).
     
@@ -62,6 +80,8 @@ def unzip_RW_binaries(zipFolder, outFolder):
     Creates directory tree of style
     
     *<outFolder>/<year>/<month>/<binaries with hourly data as .gz files>*
+    
+    See :py:func:`unzip_radolan_binaries` for details.
         
     :Parameters:
     ------------
@@ -71,51 +91,24 @@ def unzip_RW_binaries(zipFolder, outFolder):
             Archive names must contain year and month at end of basename: RWrea_200101.tar or RWrea_200101.tar.gz 
         outFolder : string
             Path of output directory.  Will be created if it doesn't exist, yet.
+        processes : integer (optional, default: 1)
+            Number of processes unzipping monthly archives concurrently. None uses all CPU cores.
+        compression : string or None (optional, default: 'gzip')
+            'gzip' to store the binary files as .gz archives, None to store them uncompressed.
+        compresslevel : integer (optional, default: 9)
+            gzip compression level from 1 (fastest) to 9 (smallest files).
         
     :Returns:
     ---------
     
-        No return value
+        failed : list
+            containing the archives which could not be unzipped.
     """
-            
-    if not os.path.exists(outFolder):
-        os.mkdir(outFolder)
-    
-    # create list of all tar files and identify years
-    tarFileList = os.listdir(zipFolder)
-    years = np.unique([f[-10:-6] if f.endswith(".tar") else f[-13:-9] for f in tarFileList])
-    
-    for year in years:
-        # only select files of current year
-        tarFilesYear = [f for f in tarFileList if year in f]
-        # create new folder for current year
-        yearFolder = os.path.join(outFolder, year)
-        os.mkdir(yearFolder)
-        for monthTarFile in tarFilesYear:
-            # create month folder for every month archive
-            if monthTarFile.endswith('.tar.gz'):
-                month = str(int(monthTarFile[-9:-7]))
-            elif monthTarFile.endswith('.tar'):
-                month = str(int(monthTarFile[-6:-4]))
-            monthFolder = os.path.join(yearFolder, month)
-            os.mkdir(monthFolder)
-            
-            # open tar archive and extract all files to month folder
-            with _tarfile.open(name = os.path.join(zipFolder,monthTarFile), mode = 'r') as tar_ref:
-                tar_ref.extractall(monthFolder)
-            binaryList = os.listdir(monthFolder)
-            
-            # if extracted files are already .gz archives: skip, else: zip binary files to .gz archives and delete unzipped files
-            if not binaryList[0].endswith(".gz"):
-                for binaryName in binaryList:
-                    binaryFile = os.path.join(monthFolder, binaryName)
-                    with open(binaryFile, 'rb') as f_in, _gzip.open(os.path.join(monthFolder, binaryName + ".gz"), 'wb') as f_out:
-                        _shutil.copyfileobj(f_in, f_out)
-                    os.remove(binaryFile)
-
+    
+    return unzip_radolan_binaries(zipFolder, outFolder, processes=processes, compression=compression, compresslevel=compresslevel)
 
 
-def unzip_YW_binaries(zipFolder, outFolder):
+def unzip_YW_binaries(zipFolder, outFolder, processes=1, compression='gzip', compresslevel=9):
     """
     Unzips RADOLAN YW binary data.
     Data have to be saved in monthly .tar or tar.gz archives (e.g. YWrea_200101.tar.gz, YWrea_200102.tar.gz),
@@ -125,6 +118,9 @@ def unzip_YW_binaries(zipFolder, outFolder):
     Creates directory tree of style
     
     *<outFolder>/<year>/<month>/<binaries with data in temporal resolution of 5 minutes as .gz files>*
+    
+    The daily archives are read directly from the monthly archives and are not extracted to disk.
+    See :py:func:`unzip_radolan_binaries` for details.
         
     :Parameters:
     ------------
@@ -134,58 +130,896 @@ def unzip_YW_binaries(zipFolder, outFolder):
             Archive names must contain year and month at end of basename: YWrea_200101.tar or YWrea_200101.tar.gz 
         outFolder : string
             Path of output directory. Will be created if it doesn't exist, yet. 
+        processes : integer (optional, default: 1)
+            Number of processes unzipping monthly archives concurrently. None uses all CPU cores.
+        compression : string or None (optional, default: 'gzip')
+            'gzip' to store the binary files as .gz archives, None to store them uncompressed.
+        compresslevel : integer (optional, default: 9)
+            gzip compression level from 1 (fastest) to 9 (smallest files).
         
     :Returns:
     ---------
     
-        No return value
+        failed : list
+            containing the archives which could not be unzipped.
     """   
+    
+    return unzip_radolan_binaries(zipFolder, outFolder, processes=processes, compression=compression, compresslevel=compresslevel)
+
+
+def _unzip_month(task):
+    """
+    Unzip one monthly archive in a single pass: every binary file (also from nested daily archives) is written directly
+    to its final file in the month folder, gzip compressed or uncompressed according to compression.
+    Files which already exist are not written again. New files are written to a temporary file first,
+    so an interrupted run doesn't leave incomplete binary files.
+    Returns archive path, month folder, number of files written and number of files already existing.
+    """
+    tarPath, monthFolder, compression, compresslevel = task
+    if not os.path.exists(monthFolder):
+        try:
+            os.makedirs(monthFolder)
+        except OSError:
+            # created concurrently
+            if not os.path.isdir(monthFolder):
+                raise
+    written = 0
+    existing = 0
+    # stream mode: members are read sequentially, the archive is decompressed only once
+    with _tarfile.open(name=tarPath, mode='r|*') as tar:
+        for name, buf in _iter_radolan_archive(tar):
+            isGzip = buf[:len(_wrl_io.GZIP_MAGIC)].tobytes() == _wrl_io.GZIP_MAGIC
+            if name.endswith('.gz'):
+                name = name[:-3]
+            if compression == 'gzip':
+                name += '.gz'
+            binaryFile = os.path.join(monthFolder, name)
+            if os.path.exists(binaryFile):
+                existing += 1
+                continue
+            tmpFile = binaryFile + '.part'
+            if compression == 'gzip' and not isGzip:
+                with _gzip.open(tmpFile, 'wb', compresslevel) as f_out:
+                    f_out.write(buf)
+            elif compression is None and isGzip:
+                with open(tmpFile, 'wb') as f_out:
+                    f_out.write(_gzip.GzipFile(fileobj=_io.BytesIO(buf), mode='rb').read())
+            else:
+                # already stored in the requested format
+                with open(tmpFile, 'wb') as f_out:
+                    f_out.write(buf)
+            os.rename(tmpFile, binaryFile)
+            written += 1
+    return tarPath, monthFolder, written, existing
+
+
+def unzip_radolan_binaries(zipFolder, outFolder, processes=None, compression='gzip', compresslevel=9):
+    """
+    Unzips RADOLAN binary data of any product saved in monthly .tar or tar.gz archives (e.g. RWrea_200101.tar.gz or YWrea_200101.tar),
+    which may contain the binary files directly or in daily archives.
+    
+    Several monthly archives are unzipped concurrently in a pool of processes. Every archive is read only once
+    and every binary file is written directly to its final file without intermediate files on disk.
+    Existing year and month folders are reused and binary files which already exist are skipped,
+    so an interrupted run can simply be started again.
+    Creates directory tree of style
+    
+    *<outFolder>/<year>/<month>/<binaries as .gz files>*
+        
+    :Parameters:
+    ------------
+    
+        zipFolder : string
+            Path of directory containing RADOLAN data as monthly tar / tar.gz archives to be unzipped.
+            Archive names must contain year and month at end of basename: RWrea_200101.tar or RWrea_200101.tar.gz 
+        outFolder : string
+            Path of output directory. Will be created if it doesn't exist, yet.
+        processes : integer (optional, default: None)
+            Number of processes unzipping monthly archives concurrently. None uses all CPU cores.
+        compression : string or None (optional, default: 'gzip')
+            'gzip' to store the binary files as .gz archives (files already compressed in the archive are copied without recompression),
+            None to store them uncompressed, which is fastest and avoids decompression on import at the cost of disk space.
+        compresslevel : integer (optional, default: 9)
+            gzip compression level from 1 (fastest) to 9 (smallest files).
+        
+    :Returns:
+    ---------
+    
+        failed : list
+            containing the archives which could not be unzipped, e.g. because they are corrupt.
+            The files unzipped from a corrupt archive before the error are kept, so the archive can be unzipped again after it has been replaced.
+    """
+    if compression not in ('gzip', None):
+        raise ValueError("compression must be 'gzip' or None")
+    if processes is None:
+        processes = cpu_count()
+    
+    tasks = []
+    for tarFile in sorted(os.listdir(zipFolder)):
+        if not (tarFile.endswith('.tar') or tarFile.endswith('.tar.gz')):
+            continue
+        year, month = _archive_year_month(tarFile)
+        tasks.append((os.path.join(zipFolder, tarFile), os.path.join(outFolder, year, month), compression, compresslevel))
+    
+    def report(result):
+        tarPath, monthFolder, written, existing = result
+        if existing > 0:
+            print("%s unzipped to %s (%i files already existed)" % (tarPath, monthFolder, existing))
+        else:
+            print("%s unzipped to %s" % (tarPath, monthFolder))
+    
+    failed = []
+    if processes <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            try:
+                report(_unzip_month(task))
+            except Exception as e:
+                print("Error at %s: %s" % (task[0], e))
+                failed.append(task[0])
+        return failed
+    
+    pool = Pool(min(processes, len(tasks)))
+    try:
+        results = [pool.apply_async(_unzip_month, (task,)) for task in tasks]
+        for task, result in zip(tasks, results):
+            try:
+                report(result.get())
+            except Exception as e:
+                print("Error at %s: %s" % (task[0], e))
+                failed.append(task[0])
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    return failed
+
+
+# fields of the catalog created by scan_radolan_directory()
+# nrow, ncol and datasize are -1 for files whose header could not be read
+# filesize and mtime are compared to the file on disk to detect records which need to be scanned again
+_CATALOG_FIELDS = [('product', 'U2'), ('datetime', 'M8[m]'), ('nrow', np.int32), ('ncol', np.int32),
+                   ('datasize', np.int64), ('compression', 'U4'), ('filesize', np.int64), ('mtime', np.float64)]
+
+
+def _is_radolan_binary(fileName):
+    # usual formats of RADOLAN binary files
+    return fileName.endswith('-bin') or fileName.endswith('-bin.gz')
+
+
+def _parse_radolan_filename(fileName):
+    """
+    Derive product type and datetime from a RADOLAN file name like raa01-rw_10000-0805010050-dwd---bin.gz
+    Returns (None, None) if the file name doesn't follow this convention.
+    """
+    try:
+        parts = os.path.basename(fileName).split("-")
+        product = parts[1][:2].upper()
+        datetime_obj = datetime.strptime(parts[2], '%y%m%d%H%M')
+    except (IndexError, ValueError):
+        return None, None
+    return product, datetime_obj
+
+
+def _scan_radolan_file(binaryFile):
+    """
+    Read the header of a RADOLAN binary file and return one catalog record as tuple.
+    If the header can not be read, product and datetime are taken from the file name.
+    """
+    product, datetime_obj = _parse_radolan_filename(binaryFile)
+    nrow = ncol = datasize = -1
+    compression = 'none'
+    try:
+        f = _wrl_io.get_radolan_filehandle(binaryFile)
+        try:
+            if isinstance(f, _gzip.GzipFile):
+                compression = 'gzip'
+            header, rest = _wrl_io.read_radolan_header_block(f)
+        finally:
+            f.close()
+        metadata = _wrl_io.parse_DWD_quant_composite_header(header)
+        product, datetime_obj = metadata['producttype'], metadata['datetime']
+        nrow, ncol, datasize = metadata['nrow'], metadata['ncol'], metadata['datasize']
+    except Exception:
+        pass
+    return (product or '', datetime_obj or 'NaT', nrow, ncol, datasize, compression,
+            os.path.getsize(binaryFile), os.path.getmtime(binaryFile))
+
+
+def _filename_records(binaryFiles):
+    """
+    Create catalog records from file names only. Grid shape, data size and compression
+    are read from the header of the first readable file of each directory.
+    """
+    folderFiles = {}
+    for binaryFile in binaryFiles:
+        folderFiles.setdefault(os.path.dirname(binaryFile), []).append(binaryFile)
+
+    folderRecords = {}
+    for folder, files in folderFiles.items():
+        folderRecords[folder] = None
+        for binaryFile in files:
+            record = _scan_radolan_file(binaryFile)
+            if record[2] > -1:
+                folderRecords[folder] = record
+                break
+
+    records = []
+    for binaryFile in binaryFiles:
+        product, datetime_obj = _parse_radolan_filename(binaryFile)
+        record = folderRecords[os.path.dirname(binaryFile)]
+        if product is None or record is None:
+            records.append(_scan_radolan_file(binaryFile))
+        else:
+            records.append((product, datetime_obj) + record[2:6] + (os.path.getsize(binaryFile), os.path.getmtime(binaryFile)))
+    return records
+
+
+def scan_radolan_directory(tree, workers=None, headers=True, catalogFile=None, rescan=False):
+    """
+    Create a catalog of all RADOLAN binary files in a directory tree by reading only their headers.
+
+    The catalog is used by the ingest functions :func:`radproc.raw.process_radolan_data`
+    and :func:`radproc.raw.create_idraster_and_process_radolan_data`, so binary files don't need to be opened just to access their metadata.
+    If catalogFile is given, the catalog is saved to disk and reused by later calls:
+    If the file already exists, only files which are not contained in it yet or whose size or modification time
+    have changed are scanned and files which don't exist anymore are removed from it.
+
+    :Parameters:
+    ------------
+
+        tree : string
+            Path to the directory tree containing RADOLAN binary files, e.g. of structure *<tree>/<year>/<month>/<binaries>*.
+            All files ending with '-bin' or '-bin.gz' are scanned.
+        workers : integer (optional, default: None)
+            Number of threads reading the headers. Default: number of CPUs.
+        headers : bool (optional, default: True)
+            If False, product type and date are parsed from the file names and grid shape, data size and compression
+            are taken from the header of the first readable file in each directory.
+            Files with names that can not be parsed are still scanned.
+        catalogFile : string (optional, default: None)
+            Path and name of the catalog file (.npy). If None, the catalog is only returned and nothing is written to disk.
+        rescan : bool (optional, default: False)
+            If True, an existing catalog is discarded and all files are scanned again.
+
+    :Returns:
+    ---------
+
+        catalog : numpy structured array
+            with one record per file sorted by path and the fields
+            path, product, datetime (numpy datetime64), nrow, ncol, datasize (bytes of the binary data block),
+            compression ('gzip' or 'none'), filesize (bytes on disk) and mtime (modification time).
+            nrow, ncol and datasize are -1 for files whose header could not be read.
+    """
+
+    binaryFiles = []
+    for dirpath, dirnames, filenames in os.walk(tree):
+        binaryFiles += [os.path.abspath(os.path.join(dirpath, f)) for f in filenames if _is_radolan_binary(f)]
+    binaryFiles.sort()
+
+    # reuse records of files which have already been scanned and not been changed since.
+    # Catalogs without modification times (created by older versions) are scanned again.
+    known = {}
+    if catalogFile is not None and os.path.exists(catalogFile) and not rescan:
+        stored = np.load(catalogFile)
+        if 'mtime' in stored.dtype.names:
+            for record in stored:
+                known[record['path']] = tuple(record)[1:]
+    newFiles = []
+    for f in binaryFiles:
+        record = known.get(f)
+        if record is None or record[-2] != os.path.getsize(f) or record[-1] != os.path.getmtime(f):
+            newFiles.append(f)
+
+    if not newFiles:
+        records = []
+    elif headers:
+        # header reading is mostly I/O and decompression, so threads are sufficient
+        pool = ThreadPool(workers)
+        try:
+            records = pool.map(_scan_radolan_file, newFiles)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        records = _filename_records(newFiles)
+    known.update(zip(newFiles, records))
+
+    pathLength = max([len(f) for f in binaryFiles] + [1])
+    catalog = np.array([(f,) + tuple(known[f]) for f in binaryFiles],
+                       dtype=[('path', 'U%i' % pathLength)] + _CATALOG_FIELDS)
+    if catalogFile is not None:
+        np.save(catalogFile, catalog)
+    return catalog
+
+
+def _file_next_to(HDFFile, suffix):
+    """Path of a file in the directory of HDFFile named like HDFFile without extension, followed by suffix."""
+    return os.path.splitext(HDFFile)[0] + suffix
+
+
+def _import_catalog(inFolder, HDFFile, validation=None):
+    """
+    Catalog of all binary files in inFolder for process_radolan_data() and create_idraster_and_process_radolan_data(), saved next to HDFFile.
+    Only file names and one header per month are read if no catalog exists, yet.
+    If validation is True, inFolder is validated and the report is saved next to HDFFile, too.
+    Files marked as invalid by the validation report are marked in the field error of the catalog.
+    """
+    catalog = scan_radolan_directory(inFolder, headers=False, catalogFile=_file_next_to(HDFFile, '_catalog.npy'))
+    if validation is True:
+        validation = validate_radolan_directory(inFolder, reportFile=_file_next_to(HDFFile, '_validation.json'))
+    if validation is not None:
+        catalog = _apply_validation(catalog, validation)
+    return catalog
+
+
+def _split_catalog(catalog):
+    """
+    Split the catalog into the records of the files of each folder.
+    Returns dictionary with absolute folder paths as keys and catalog records as values.
+    """
+    monthCatalogs = {}
+    folders = np.array([os.path.dirname(p) for p in catalog['path']])
+    for folder in np.unique(folders):
+        monthCatalogs[folder] = catalog[folders == folder]
+    return monthCatalogs
+
+
+def _catalog_folder(catalog, folder, monthCatalogs=None):
+    """
+    Select the catalog records of all files located directly in folder.
+    If the catalog has already been split by _split_catalog(), the records are taken from monthCatalogs.
+    """
+    folder = os.path.abspath(folder)
+    if monthCatalogs is not None:
+        return monthCatalogs.get(folder, catalog[:0])
+    return catalog[np.array([os.path.dirname(p) == folder for p in catalog['path']], dtype=bool)]
+
+
+def _validate_radolan_file(binaryFile):
+    """
+    Read a RADOLAN binary file completely and check header, data size and, for gzip compressed files, the CRC.
+    Returns product, datetime, nrow, ncol and an error message, which is empty if the file is valid.
+    """
+    product, datetime_obj = _parse_radolan_filename(binaryFile)
+    nrow = ncol = -1
+    try:
+        f = _wrl_io.get_radolan_filehandle(binaryFile)
+        try:
+            header, rest = _wrl_io.read_radolan_header_block(f)
+            metadata = _wrl_io.parse_DWD_quant_composite_header(header)
+            product, datetime_obj = metadata['producttype'], metadata['datetime']
+            nrow, ncol = metadata['nrow'], metadata['ncol']
+            # reading gzip compressed files to the end verifies their CRC and length
+            payload = len(rest)
+            while True:
+                block = f.read(2**20)
+                if not block:
+                    break
+                payload += len(block)
+        finally:
+            f.close()
+    except Exception as e:
+        return product or '', datetime_obj or 'NaT', nrow, ncol, "File can not be read: %s" % e
+    
+    if payload != metadata['datasize']:
+        return product, datetime_obj, nrow, ncol, "Data block has %i bytes, but %i bytes are given in header (BY)." % (payload, metadata['datasize'])
+    # run-length coded products (PG, PC) have no fixed data size
+    cellBytes = {'RX' : 1, 'EX' : 1, 'WX' : 1, 'PG' : None, 'PC' : None}.get(product, 2)
+    if cellBytes is not None and metadata['datasize'] != cellBytes * nrow * ncol:
+        return product, datetime_obj, nrow, ncol, "Data size %i does not match grid of %i x %i cells." % (metadata['datasize'], nrow, ncol)
+    return product, datetime_obj, nrow, ncol, ''
+
+
+def validate_radolan_directory(tree, workers=None, reportFile=None):
+    """
+    Check all RADOLAN binary files in a directory tree in parallel threads before they are imported and return a report.
+    
+    Every file is read completely and the following checks are made:
+        
+        - the header can be parsed
+        - the length of the binary data block agrees with the data size given in the header (BY), so truncated files are detected
+        - the CRC of gzip compressed files is correct
+        - the data size matches the grid size given in the header and the grid size is the same as for the other files of the product in the same directory
+        - the date of the interval doesn't occur in another file of the product in the same directory
+    
+    Moreover, gaps in the time series of the valid files of every directory are listed.
+    
+    The report can be passed to :func:`radproc.raw.process_radolan_data` and :func:`radproc.raw.create_idraster_and_process_radolan_data`
+    (parameter validation) to skip invalid files without trying to read them. Nothing is written to the directory tree.
+    
+    :Parameters:
+    ------------
+    
+        tree : string
+            Path to the directory tree containing RADOLAN binary files, e.g. of structure *<tree>/<year>/<month>/<binaries>*.
+            All files ending with '-bin' or '-bin.gz' are checked.
+        workers : integer (optional, default: None)
+            Number of threads reading the files. Default: number of CPUs.
+        reportFile : string (optional, default: None)
+            Path and name of a JSON file the report is written to, e.g. to pass it to later imports.
+            If None, the report is only returned.
+    
+    :Returns:
+    ---------
+    
+        report : dictionary
+            containing the keys
             
-    if not os.path.exists(outFolder):
-        os.mkdir(outFolder)
-    
-    # create list of all tar files
-    tarFileList = os.listdir(zipFolder)
-    years = np.unique([f[-10:-6] if f.endswith(".tar") else f[-13:-9] for f in tarFileList])
-    
-    for year in years:
-        # only select files of current year
-        tarFilesYear = [f for f in tarFileList if year in f]
-        # create new folder for current year
-        yearFolder = os.path.join(outFolder, year)
-        os.mkdir(yearFolder)
-        # for every month...
-        for monthTarFile in tarFilesYear:
-            # create month folder for every month archive
-            if monthTarFile.endswith('.tar.gz'):
-                month = str(int(monthTarFile[-9:-7]))
-            elif monthTarFile.endswith('.tar'):
-                month = str(int(monthTarFile[-6:-4]))
-            monthFolder = os.path.join(yearFolder, month)
-            os.mkdir(monthFolder)
-            
-            # open tar archive and extract all daily gz archives to month folder
-            with _tarfile.open(name = os.path.join(zipFolder,monthTarFile), mode = 'r') as tar_ref:
-                tar_ref.extractall(monthFolder)
+            - tree and validated (date and time of the validation)
+            - files and invalid: number of checked and invalid files
+            - errors: list with path, filesize, mtime (modification time) and error message of every invalid file
+            - gaps: list with folder, product, last interval before and first interval after every gap (ISO format) and number of missing intervals
+    """
+    binaryFiles = []
+    for dirpath, dirnames, filenames in os.walk(tree):
+        binaryFiles += [os.path.abspath(os.path.join(dirpath, f)) for f in filenames if _is_radolan_binary(f)]
+    binaryFiles.sort()
+    
+    # decompression releases the GIL, so threads are sufficient
+    pool = ThreadPool(workers)
+    try:
+        results = pool.map(_validate_radolan_file, binaryFiles)
+    finally:
+        pool.close()
+        pool.join()
+    errors = dict((binaryFile, r[4]) for binaryFile, r in zip(binaryFiles, results) if r[4])
+    
+    # grid sizes and continuity are checked per directory and product for the files which could be read
+    groups = {}
+    for binaryFile, (product, datetime_obj, nrow, ncol, error) in zip(binaryFiles, results):
+        if not error:
+            groups.setdefault((os.path.dirname(binaryFile), product), []).append((datetime_obj, binaryFile, (nrow, ncol)))
+    gaps = []
+    for (folder, product), files in sorted(groups.items()):
+        grids = [grid for datetime_obj, binaryFile, grid in files]
+        grid = max(set(grids), key=grids.count)
+        files.sort()
+        previous = None
+        for datetime_obj, binaryFile, fileGrid in files:
+            if fileGrid != grid:
+                errors[binaryFile] = "Grid of %i x %i cells differs from %i x %i cells of the other %s files in the directory." % (fileGrid + grid + (product,))
+                continue
+            if previous is not None:
+                if datetime_obj == previous[0]:
+                    errors[binaryFile] = "Interval %s is also contained in %s." % (datetime_obj, os.path.basename(previous[1]))
+                    continue
+                freq = _freq_seconds(_product_freq(product))
+                if freq is not None and (datetime_obj - previous[0]).total_seconds() > freq:
+                    gaps.append(dict(folder=folder, product=product, before=previous[0].isoformat(), after=datetime_obj.isoformat(),
+                                     missing=int((datetime_obj - previous[0]).total_seconds() // freq) - 1))
+            previous = (datetime_obj, binaryFile)
+    
+    report = dict(tree=os.path.abspath(tree), validated=datetime.now().isoformat(), files=len(binaryFiles), invalid=len(errors), gaps=gaps,
+                  errors=[dict(path=binaryFile, filesize=os.path.getsize(binaryFile), mtime=os.path.getmtime(binaryFile), error=errors[binaryFile])
+                          for binaryFile in sorted(errors)])
+    print("%i of %i files are invalid, %i gaps." % (len(errors), len(binaryFiles), len(gaps)))
+    if reportFile is not None:
+        with open(reportFile, 'w') as f:
+            _json.dump(report, f, indent=1)
+        print("Report written to %s" % reportFile)
+    return report
+
+
+def _apply_validation(catalog, validation):
+    """
+    Add the field error to the catalog containing the error message of the validation report for every invalid file.
+    Errors of files whose size or modification time changed after the validation are ignored.
+    validation is the report returned by validate_radolan_directory() or the path of its JSON file.
+    """
+    if not isinstance(validation, dict):
+        with open(validation) as f:
+            validation = _json.load(f)
+    errors = {}
+    for e in validation['errors']:
+        path = os.path.abspath(e['path'])
+        if os.path.exists(path) and os.path.getsize(path) == e['filesize'] and os.path.getmtime(path) == e['mtime']:
+            errors[path] = e['error']
+    messages = [errors.get(path, '') for path in catalog['path']]
+    validated = np.empty(len(catalog), dtype=catalog.dtype.descr + [('error', 'U%i' % max([len(m) for m in messages] + [1]))])
+    for name in catalog.dtype.names:
+        validated[name] = catalog[name]
+    validated['error'] = messages
+    return validated
+
+
+def _read_stack(files, out, invalid, idArr=None, workers=1, rows=None, timings=False):
+    """
+    Read files with read_RADOLAN_stack() into the rows of out like radolan_binaries_to_dataframe().
+    rows contains the row of out for every file (default: one row per file in the given order).
+    With timings=True, the metadata contain the seconds per stage for the ingest report.
+    Files contained in the dictionary invalid are not read. Their rows are set to NaN and their metadata are IOErrors with the messages of invalid.
+    Returns out and the list of metadata.
+    """
+    if rows is None:
+        rows = np.arange(len(files))
+    fileAttrs = [None] * len(files)
+    runStart = 0
+    for i in range(len(files) + 1):
+        if i < len(files) and files[i] not in invalid and (i == runStart or rows[i] == rows[i-1] + 1):
+            continue
+        # runs of valid files in consecutive rows are read at once
+        if i > runStart:
+            first = rows[runStart]
+            dummy, fileAttrs[runStart:i] = _wrl_io.read_RADOLAN_stack(files[runStart:i], out=out[first:first + i - runStart], missing=np.nan,
+                                                                      flipud=True, skip_errors=True, idArr=idArr, workers=workers, use_mmap=True,
+                                                                      timings=timings)
+        if i < len(files) and files[i] in invalid:
+            out[rows[i]] = np.nan
+            fileAttrs[i] = IOError(invalid[files[i]])
+            runStart = i + 1
+        else:
+            runStart = i
+    return out, fileAttrs
+
+
+def _month_timeline(files, producttype):
+    """
+    Build the expected timeline of a month from the interval of the product: all intervals from the first to the last interval of the month
+    with the same offset as the files (e.g. HH:50 for RW), extended to dates of files outside the month.
+    The row of every file in the timeline is derived from the date in its file name.
+    Returns rows and the timeline (naive DatetimeIndex in UTC with frequency) or None if the product has no regular interval,
+    file names can not be parsed or several files or dates not matching the interval would occupy the same row.
+    """
+    freq = _product_freq(producttype)
+    if freq is None or len(files) == 0:
+        return None
+    dates = [_parse_radolan_filename(f)[1] for f in files]
+    if any(d is None for d in dates):
+        return None
+    dates = pd.DatetimeIndex(dates)
+    step = freq.nanos
+    # month of the median date, some files may belong to the adjacent months
+    middle = dates.sort_values()[len(dates) // 2]
+    monthStart = pd.Timestamp(middle.year, middle.month, 1)
+    monthEnd = monthStart + pd.tseries.offsets.MonthBegin()
+    # first interval of the month with the offset of the files
+    start = monthStart + pd.Timedelta((dates.min() - monthStart).value % step, unit='ns')
+    start = min(start, dates.min())
+    end = max(monthEnd - pd.Timedelta(1, unit='ns'), dates.max())
+    offsets = (dates - start).asi8
+    if (offsets % step != 0).any():
+        return None
+    rows = offsets // step
+    if len(np.unique(rows)) < len(rows):
+        return None
+    index = pd.date_range(start, end, freq=freq)
+    return rows, index
+
+
+def _timeline_index(index, fileAttrs, files, rows, metadata):
+    """
+    Counterpart of _stack_index() for data read into the rows of the expected timeline built by _month_timeline().
+    The timeline is shifted if the dates in the headers differ from the dates in the file names,
+    e.g. for early RADOLAN intervals starting at HH:45 with HH:50 in the file name.
+    Returns index, metadata of the last imported file and names and error messages of the skipped files.
+    """
+    skipped_files = []
+    error_messages = []
+    shift = None
+    for i in np.argsort(rows, kind='mergesort'):
+        if isinstance(fileAttrs[i], Exception):
+            skipped_files.append(os.path.basename(files[i]))
+            error_messages.append(str(fileAttrs[i]))
+        else:
+            metadata = fileAttrs[i]
+            if shift is None:
+                shift = metadata['datetime'] - index[rows[i]]
+    if shift:
+        index = index + shift
+    return index, metadata, skipped_files, error_messages
+
+
+def _stack_index(fileAttrs, files, metadata):
+    """
+    Derive the datetime index of the files read by read_RADOLAN_stack().
+    Dates of skipped files are derived from their file names.
+    Returns index list, metadata of the last imported file and names and error messages of the skipped files.
+    """
+    ind = []
+    skipped_files = []
+    error_messages = []
+    # For each file in directory...
+    for i in range(0, len(files)):
+        if not isinstance(fileAttrs[i], Exception):
+            metadata = fileAttrs[i]
+            # append datetime object to index list. Pandas automatically interprets this list as timeseries.
+            ind.append(metadata['datetime'])
+        else:
+            skipped_files.append(os.path.basename(files[i]))
+            error_messages.append(str(fileAttrs[i]))
+            # extract datetime from filename instead of metadata
+            date_str = os.path.basename(files[i]).split("-")[2]
+            datetime_obj = datetime.strptime(date_str, '%y%m%d%H%M')
+            # some early RADOLAN intervals start at HH:45, but in file name stands HH:50
+            if len(ind) > 0 and ind[0].minute == 45:
+                datetime_obj = datetime_obj.replace(minute=45)
+            # append extracted date to index, all cells of the skipped interval are NaN
+            ind.append(datetime_obj)
+    return ind, metadata, skipped_files, error_messages
+
+
+def _write_skipped_files(txtFolder, skipped_files, error_messages, datetime_obj):
+    # export list of skipped files and corresponding error messages to txt file
+    outtxt = os.path.join(txtFolder, 'skipped_files_%i_%i.txt' % (datetime_obj.year, datetime_obj.month))
+    print('%i files had to be skipped due to processing errors.\nIntervals were filled with NaN' % len(skipped_files))
+    print('Please check skipped files and error list in created text file %s' % outtxt)
+    txt = open(outtxt, 'w')
+    for skipped_file, error_message in zip(skipped_files, error_messages):
+        txt.write('%s\n%s\n\n' %(skipped_file, error_message))        
+    txt.close()
+
+
+def _product_freq(producttype):
+    # check for RADOLAN product type and return frequency of the DataFrame index
+    # lists can be extended for other products...    
+    if producttype in ["RW"]:
+        return pd.tseries.offsets.Hour()
+    elif producttype in ["RY", "RZ", "YW"]:
+        return 5 * pd.tseries.offsets.Minute()
+    return None
+
+
+def _freq_seconds(freq):
+    # frequencies are saved in HDF5 files as seconds, which unlike frequency strings don't depend on the pandas version
+    return None if freq is None else int(freq.nanos // 10**9)
+
+
+def _radolan_stack_to_dataframe(dataArr, fileAttrs, files, idArr, metadata, txtFolder, timeline=None):
+    """
+    Convert the data array read by read_RADOLAN_stack() to a DataFrame with datetime index and ID values as column names.
+    If timeline (rows and index from _month_timeline()) is given, the data have been read into the rows of the expected timeline.
+    Otherwise, there is one row per file and dates of skipped files are derived from their file names.
+    The skipped files are listed in a text file in txtFolder.
+    Returns DataFrame and metadata of the last imported file.
+    """
+    if timeline is None:
+        ind, metadata, skipped_files, error_messages = _stack_index(fileAttrs, files, metadata)
+    else:
+        rows, index = timeline
+        ind, metadata, skipped_files, error_messages = _timeline_index(index, fileAttrs, files, rows, metadata)
             
-            # for every day...
-            dayTarFileList = os.listdir(monthFolder)
-            for dayTarFile in dayTarFileList:
-                with _tarfile.open(name = os.path.join(monthFolder, dayTarFile), mode = 'r') as tar_ref:
-                    tar_ref.extractall(monthFolder)
-                os.remove(os.path.join(monthFolder, dayTarFile))
-                
-            binaryList = os.listdir(monthFolder)
-            # if extracted files are already .gz archives: skip, else: zip binary files to .gz archives and delete unzipped files
-            if not binaryList[0].endswith(".gz"):
-                for binaryName in binaryList:
-                    binaryFile = os.path.join(monthFolder, binaryName)
-                    with open(binaryFile, 'rb') as f_in, _gzip.open(os.path.join(monthFolder, binaryName + ".gz"), 'wb') as f_out:
-                        _shutil.copyfileobj(f_in, f_out)
-                    os.remove(binaryFile)
+    # Convert 2D data array to DataFrame, set timeseries index and column names and localize to time zone UTC 
+    df = pd.DataFrame(dataArr, index = ind, columns = idArr) 
+    df.columns.name = 'Cell-ID'
+    df.index.name = 'Date (UTC)'
+    df.index = df.index.tz_localize('UTC')
+    #df = df.tz_localize('UTC')
+    
+    metadata['timezone'] = 'UTC'
+    metadata['idArr'] = idArr
+    
+    # set frequency of DataFrame index, the expected timeline already has it
+    freq = _product_freq(metadata['producttype'])
+    if freq is not None and timeline is None:
+        try:
+            # try to prevent dataframe copying by .asfreq(). this does not seem to work in all pandas versions --> try - except
+            df.index.freq = freq
+        except:
+            df = df.asfreq(freq)
+    
+    # if any errors occurred
+    if len(skipped_files) > 0:
+        _write_skipped_files(txtFolder, skipped_files, error_messages, ind[-1])
+    return df, metadata
+
+
+#--------Ingest report--------------------------------------------------
+
+_logger = _logging.getLogger(__name__)
+
+
+def _peak_memory():
+    """Peak resident memory of this process or one of its terminated child processes in bytes, None if not available (e.g. on Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    # kilobytes on Linux, bytes on macOS
+    unit = 1 if sys.platform == 'darwin' else 1024
+    return unit * max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+
+
+def _lap(stages, stage, start):
+    """Add the seconds since start to stages[stage] and return the current time."""
+    now = _timer()
+    stages[stage] = stages.get(stage, 0.0) + now - start
+    return now
+
+
+def _sum_stages(records, stages):
+    return dict((stage, sum(r.get(stage, 0.0) for r in records)) for stage in stages if any(stage in r for r in records))
+
+
+class IngestReport(object):
+    """
+    Report of timings, data volumes and memory usage of imports of RADOLAN binary files to HDF5.
+    
+    Pass the report with the parameter report to :func:`radproc.raw.radolan_binaries_to_hdf5`, :func:`radproc.raw.process_radolan_data`,
+    :func:`radproc.raw.create_idraster_and_process_radolan_data`, :func:`radproc.raw.radolan_archive_to_hdf5`,
+    :func:`radproc.raw.process_radolan_archives`, :func:`radproc.raw.append_radolan_binaries`
+    or :func:`radproc.raw.watch_radolan_directory` to record their imports. One report can be passed to several imports.
+    
+    Two kinds of records (dictionaries) are created:
+        
+        - event 'file': name of the binary file, dataset, bytes_in (file size) and the seconds spent in the stages
+          open, header, read (decompress for gzip compressed files), clip and decode, or error if the file could not be read.
+        - event 'dataset': name of the written dataset (month) or of the dataset an interval has been appended to,
+          number of files and skipped files, bytes_in, bytes_out (uncompressed size of the data written), the seconds spent
+          in the stages read, quantize and write, files_per_second and peak_memory (peak resident memory in bytes, only on Unix).
+    
+    Every record is passed to callback and to the logger 'radproc.raw', file records with level DEBUG and dataset records
+    with level INFO. The record is available in the attribute radproc_record of the log records, so it can be processed by any
+    logging handler.
+    
+    Used as context manager, the summary is written to reportFile when the with block is left:
+    
+    >>> with IngestReport('ingest.json') as report:
+    >>>     process_radolan_data(inFolder, HDFFile, report=report)
+    
+    :Parameters:
+    ------------
+    
+        reportFile : string (optional, default: None)
+            Path and name of a JSON file to write the summary to when :meth:`close` is called or the with block is left.
+        callback : function (optional, default: None)
+            Function called with every record as only argument, e.g. to display the progress.
+    """
+    
+    def __init__(self, reportFile=None, callback=None):
+        self.reportFile = reportFile
+        self.callback = callback
+        self.started = datetime.now().isoformat()
+        self._start = _timer()
+        self.files = []
+        self.datasets = []
+        # file records of the dataset which is currently imported
+        self._pending = []
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+        return False
+    
+    def _record_files(self, names, fileAttrs):
+        """Add records of the files read by read_RADOLAN_stack() with timings=True to the pending records of the current dataset."""
+        for name, attrs in zip(names, fileAttrs):
+            record = dict(event='file', file=str(name))
+            if isinstance(attrs, Exception):
+                record['error'] = str(attrs)
+            else:
+                record['bytes_in'] = attrs.get('filebytes')
+                record.update(attrs.get('timings', {}))
+                record['seconds'] = sum(attrs.get('timings', {}).values())
+            self._pending.append(record)
+    
+    def _emit(self, record):
+        if self.callback is not None:
+            self.callback(record)
+        if record['event'] == 'file':
+            _logger.debug("%s: %s", record['file'], record.get('error', "%.4f s" % record.get('seconds', 0)), extra={'radproc_record' : record})
+        else:
+            _logger.info("%s: %i files (%i skipped) in %.2f s", record['dataset'], record['files'], record['skipped'], record['seconds'],
+                         extra={'radproc_record' : record})
+    
+    def _record_dataset(self, HDFDataset, stages, bytesOut):
+        """
+        Record a written dataset (month) or appended interval with the seconds spent in its stages (e.g. read, quantize and write)
+        and the uncompressed size of the data written. The pending file records are assigned to this dataset.
+        """
+        files, self._pending = self._pending, []
+        for record in files:
+            record['dataset'] = HDFDataset
+            self.files.append(record)
+            self._emit(record)
+        seconds = sum(stages.values())
+        record = dict(event='dataset', dataset=HDFDataset, files=len(files), skipped=sum(1 for r in files if 'error' in r),
+                      bytes_in=sum(r.get('bytes_in') or 0 for r in files), bytes_out=int(bytesOut), seconds=seconds,
+                      files_per_second=len(files) / seconds if seconds > 0 else None, peak_memory=_peak_memory())
+        record.update(stages)
+        self.datasets.append(record)
+        self._emit(record)
+    
+    def summary(self):
+        """
+        Summarize the imports recorded so far.
+        
+        :Returns:
+        ---------
+        
+            summary : dictionary
+                containing the start time, total seconds, number of files and skipped files, bytes_in, bytes_out, files_per_second,
+                peak_memory, the seconds summed up per stage for all datasets (stages) and files (file_stages)
+                and the lists of all dataset and file records (dataset_records, file_records). As files are read in parallel threads or processes
+                if workers or processes are greater than 1, the seconds per stage may exceed the total seconds.
+        """
+        seconds = _timer() - self._start
+        files = len(self.files)
+        return dict(started=self.started, seconds=seconds, files=files,
+                    skipped=sum(1 for r in self.files if 'error' in r),
+                    bytes_in=sum(r['bytes_in'] for r in self.datasets),
+                    bytes_out=sum(r['bytes_out'] for r in self.datasets),
+                    files_per_second=files / seconds if seconds > 0 else None, peak_memory=_peak_memory(),
+                    stages=_sum_stages(self.datasets, ['read', 'quantize', 'write']),
+                    file_stages=_sum_stages(self.files, ['open', 'header', 'read', 'decompress', 'clip', 'decode']),
+                    dataset_records=self.datasets, file_records=self.files)
+    
+    def close(self):
+        """
+        Summarize the imports recorded so far (see :meth:`summary`) and write the summary to reportFile, if specified.
+        
+        :Returns:
+        ---------
+        
+            summary : dictionary
+        """
+        summary = self.summary()
+        if self.reportFile is not None:
+            with open(self.reportFile, 'w') as f:
+                _json.dump(summary, f, indent=1)
+        return summary
+
+
+def _month_files(inFolder, catalog=None):
+    """
+    List the RADOLAN binary files to import from inFolder or its catalog and access the metadata needed in advance.
+    Returns list of files, metadata (at least product type, nrow and ncol), grid size
+    and a dictionary with the error messages of the files marked as invalid in the catalog by a validation report.
+    """
+    invalid = {}
+    if catalog is not None:
+        # files and grid size are already known from the catalog, nothing needs to be listed or opened in advance
+        files = list(catalog['path'])
+        readable = catalog[catalog['nrow'] > -1]
+        if 'error' in catalog.dtype.names:
+            invalid = dict((path, error) for path, error in zip(catalog['path'], catalog['error']) if error)
+            readable = readable[readable['error'] == '']
+        if len(readable) == 0:
+            print('No readable RADOLAN binary file in catalog of %s. Please check your input files and parameters.' % inFolder)
+            sys.exit()
+        metadata = dict(producttype=readable['product'][0], nrow=int(readable['nrow'][0]), ncol=int(readable['ncol'][0]))
+        gridSize = metadata['nrow'] * metadata['ncol']
+    else:
+        try:    
+            # List all files in directory
+            files = os.listdir(inFolder)
+        except:
+            print("Directory %s can not be found. Please check your input parameter!" % inFolder)
+            sys.exit()
+        
+        # Check file endings. Only keep files ending on -bin or -bin.gz which are the usual formats of RADOLAN binary files
+        files = [os.path.join(inFolder, f) for f in files if _is_radolan_binary(f)]
+        
+        # Load header of first binary file to access header information, the data are not decoded
+        try:
+            data, metadata = _wrl_io.read_RADOLAN_composite(files[0], loaddata=False)
+        except:
+            # if file could not be read, try next file until metadata of one file could be accessed
+            got_metadata = False
+            i=0
+            while got_metadata == False:
+                print("Can not open %s to access metadata. Trying next file." % files[i])
+                i+=1
+                try:
+                    data, metadata = _wrl_io.read_RADOLAN_composite(files[i], loaddata=False)
+                    got_metadata = True
+                except:
+                    got_metadata = False
+                    # interrupt after first 100 files to avoid infinite loops
+                    if i == 100:
+                        print('Could not read the first 100 files in. Exit script. Please check your input files and parameters.')
+                        raise
+        
+        # different RADOLAN products have different grid sizes (e.g. 900*900 for the RADOLAN national grid,
+        # 1100*900 for the extended national grid used for RADKLIM)
+        gridSize = metadata['nrow'] * metadata['ncol']
+    return files, metadata, gridSize, invalid
 
 
-def radolan_binaries_to_dataframe(inFolder, idArr=None):
+def radolan_binaries_to_dataframe(inFolder, idArr=None, catalog=None, workers=1, report=None):
     """
     Import all RADOLAN binary files in a directory into a pandas DataFrame,
     optionally clipping the data to the extent of an investigation area specified by an ID array.
@@ -200,6 +1034,17 @@ def radolan_binaries_to_dataframe(inFolder, idArr=None):
             containing ID values to select RADOLAN data of the cells located in the investigation area.
             If no idArr is specified, the ID array is automatically generated from RADOLAN metadata
             and RADOLAN precipitation data are not clipped to any investigation area.
+        catalog : numpy structured array (optional, default: None)
+            Catalog of the binary files in inFolder created by :func:`radproc.raw.scan_radolan_directory`.
+            If specified, the files to import and the grid size are taken from the catalog
+            instead of listing inFolder and reading the first file in advance.
+            If the catalog contains the field error (see parameter validation of :func:`radproc.raw.process_radolan_data`),
+            files with an error message are skipped without reading them.
+        workers : integer (optional, default: 1)
+            Number of threads reading and decompressing the binary files in parallel.
+            If None, the number of CPUs is used.
+        report : :class:`radproc.raw.IngestReport` (optional, default: None)
+            Report recording the seconds spent reading every file. The file records are assigned to the next dataset recorded.
         
     :Returns:
     ---------
@@ -238,125 +1083,385 @@ def radolan_binaries_to_dataframe(inFolder, idArr=None):
         >>> df.loc[, 414773] #--> returns time series of the specified cell as Series
         
     """    
-     
-    try:    
-        # List all files in directory
-        files = os.listdir(inFolder)
-    except:
-        print("Directory %s can not be found. Please check your input parameter!" % inFolder)
-        sys.exit()
-    ind = []
     
-    # Check file endings. Only keep files ending on -bin or -bin.gz which are the usual formats of RADOLAN binary files
-    files = [f for f in files if f.endswith('-bin') or f.endswith('-bin.gz')]
-    
-    # Load first binary file to access header information
-    try:
-        data, metadata = _wrl_io.read_RADOLAN_composite(os.path.join(inFolder, files[0]))
-        del data
-    except:
-        # if file could not be read, try next file until metadata of one file could be accessed
-        got_metadata = False
-        i=0
-        while got_metadata == False:
-            print("Can not open %s to access metadata. Trying next file." % files[i])
-            i+=1
-            try:
-                data, metadata = _wrl_io.read_RADOLAN_composite(os.path.join(inFolder, files[i]))
-                del data
-                got_metadata = True
-            except:
-                got_metadata = False
-                # interrupt after first 100 files to avoid infinite loops
-                if i == 100:
-                    print('Could not read the first 100 files in. Exit script. Please check your input files and parameters.')
-                    raise
-    
-    # different RADOLAN products have different grid sizes (e.g. 900*900 for the RADOLAN national grid,
-    # 1100*900 for the extended national grid used for RADKLIM)
-    gridSize = metadata['nrow'] * metadata['ncol']
+    files, metadata, gridSize, invalid = _month_files(inFolder, catalog)
     
     # if no ID array is specified, generate it from metadata
+    clip = idArr is not None
     if idArr is None:        
         idArr = np.arange(0, gridSize)
     
-    # Create two-dimensiona array of dtype float32 filled with zeros. One row per file in inFolder, one column per ID in idArr.
-    dataArr = np.zeros((len(files), len(idArr)), dtype = np.float32)
+    # Every file is placed into the row of its interval in the expected timeline of the month, derived from the date in its file name.
+    # Intervals without file are NoData, so the index needs neither sorting nor reindexing.
+    # For products without regular interval, there is one row per file in inFolder.
+    timeline = _month_timeline(files, metadata['producttype'])
+    if timeline is None:
+        rows = None
+        nrows = len(files)
+    else:
+        rows = timeline[0]
+        nrows = len(timeline[1])
+    
+    # Create two-dimensional array of dtype float32. One row per interval, one column per ID in idArr.
+    dataArr = np.empty((nrows, len(idArr)), dtype = np.float32)
+    if timeline is not None:
+        dataArr[np.setdiff1d(np.arange(nrows), rows)] = np.nan
+    
+    # Read data and header of all RADOLAN binary files directly into the rows of the data array.
+    # binary data block starts in the lower left corner but ESRI Grids are created starting in the upper left corner by default
+    # flipud=True --> reverse row order of 2D-array so the first row ist located in the geographic north
+    # NoData values are set to NaN and files which can not be read are filled with NaN.
+    # If an ID array was specified, data are clipped to the investigation area while decoding
+    # and only the cells with a corresponding ID in idArr are decoded.
+    # Uncompressed files are mapped into memory instead of being copied into Python bytes objects.
+    # Files marked as invalid in the catalog are skipped without reading them.
+    dataArr, fileAttrs = _read_stack(files, dataArr, invalid, idArr if clip else None, workers, rows, timings=report is not None)
+    if report is not None:
+        report._record_files(files, fileAttrs)
+    
+    # a text file listing skipped files is written two directory levels above inFolder
+    two_dirs_up = os.path.split(os.path.split(inFolder)[0])[0]
+    return _radolan_stack_to_dataframe(dataArr, fileAttrs, files, idArr, metadata, two_dirs_up, timeline)
+    
+    
+def _hdf5_dataset_from_folder(inFolder):
+    """Derive the name of the HDF5 dataset (year/month) from the path of a monthly input folder."""
+    # Split directory path to prepare node creation in HDF5 file
+    # x is a list with all individual directories in inFolder
+    if "\\" in inFolder:    
+        x = inFolder.split("\\")
+    elif "/" in inFolder:
+        x = inFolder.split("/")
+    else:
+        print("Directory %s can not be found. Please check your input parameter!" % inFolder)
+        sys.exit()
     
-    skipped_files = []
-    error_messages = []
-    # For each file in directory...
-    for i in range(0, len(files)):
-        # Read data and header of RADOLAN binary file
-        try:
-            data, metadata = _wrl_io.read_RADOLAN_composite(os.path.join(inFolder, files[i]))
-            # append datetime object to index list. Pandas automatically interprets this list as timeseries.
-            ind.append(metadata['datetime'])
-         
-            # binary data block starts in the lower left corner but ESRI Grids are created starting in the upper left corner by default
-            # [::-1] --> reverse row order of 2D-array so the first row ist located in the geographic north
-            # reshape(gridSize,) --> convert to one-dimensional array
-            data = data[::-1].reshape(gridSize,)
-        
-            # Replace NoData values with NaN
-            data[data == metadata['nodataflag']] = np.nan
-               
-            # Clip data to investigation area by selecting all values with a corresponding ID in idArr
-            # and insert data as row in the two-dimensional data array.
-            dataArr[i,:] = data[idArr]
-        
-        except Exception, e:
-            skipped_files.append(files[i])
-            error_messages.append(str(e))
-            # extract datetime from filename instead of metadata
-            date_str = files[i].split("-")[2]
-            datetime_obj = datetime.strptime(date_str, '%y%m%d%H%M')
-            # some early RADOLAN intervals start at HH:45, but in file name stands HH:50
-            if ind[0].minute == 45:
-                datetime_obj = datetime_obj.replace(minute=45)
-            # append extracted date to index and insert NaN to all cells of the skipped interval
-            ind.append(datetime_obj)
-            dataArr[i,:] = np.zeros((1, len(idArr)), dtype=np.float32).fill(np.nan)
-            
-    # Convert 2D data array to DataFrame, set timeseries index and column names and localize to time zone UTC 
-    df = pd.DataFrame(dataArr, index = ind, columns = idArr) 
-    df.columns.name = 'Cell-ID'
-    df.index.name = 'Date (UTC)'
-    df.index = df.index.tz_localize('UTC')
-    #df = df.tz_localize('UTC')
+    # Deduce group names from directory path
+    # (years: 4 characters, months: 1-2 characters) 
+    # Paths can end with / or \\ depending on delimiter
+    # Path .../2008/5 --> last element x[-1] is the month
+    if len(x[-1]) == 1 or len(x[-1]) == 2:
+        month = x[-1]
+    # Path .../2008/5/ --> second to last element x[-2] is the month,
+    # Last element is an empty string of length zero --> x = [...,"2008","5",""]
+    elif len(x[-2]) == 1 or len(x[-2]) == 2:
+        month = x[-2]
+    # Path ...\\2008\\5\\ --> third to last element x[-3] is the month,
+    # Last two elements are empty strings of length zero --> x = [...,"2008","","5","",""]
+    elif len(x[-3]) == 1 or len(x[-3]) == 2:
+        month = x[-3]
+    else:
+        print("No suitable directory path format! Month could not be found!")
+        sys.exit()
+    
+    # Identify years in the same way but one element further in front of list x 
+    if len(x[-2]) == 4:
+        year = x[-2]
+    elif len(x[-3]) == 4:
+        year = x[-3]
+    elif len(x[-4]) == 4:
+        year = x[-4]
+    else:
+        print("No suitable directory path format! Year could not be found!")
+        sys.exit()
+    
+    # Path (Group) and Label of HDF5 dataset to be created
+    HDFDataset = "/".join([year,month])
+    return HDFDataset
+
+
+def _id_hash(idArr):
+    """Hash of the ID array a dataset was clipped with. None stands for the unclipped national grid."""
+    if idArr is None:
+        return 'None'
+    idArr = np.ascontiguousarray(idArr)
+    return _hashlib.sha1(str(idArr.dtype).encode() + idArr.tobytes()).hexdigest()
+
+
+def _manifest_key(HDFDataset):
+    return "/".join(["manifest", HDFDataset])
+
+
+def _file_sources(paths):
+    """Names, sizes and modification times of files as DataFrame for the manifest."""
+    stats = [os.stat(path) for path in paths]
+    return pd.DataFrame({'file' : [os.path.basename(path) for path in paths],
+                         'filesize' : np.array([st.st_size for st in stats], dtype=np.int64),
+                         'mtime' : np.array([st.st_mtime for st in stats], dtype=np.float64)},
+                        columns=['file', 'filesize', 'mtime'])
+
+
+def _month_sources(inFolder):
+    """Names, sizes and modification times of all RADOLAN binary files in a month folder as DataFrame for the manifest."""
+    files = sorted([f for f in os.listdir(inFolder) if _is_radolan_binary(f)])
+    return _file_sources([os.path.join(inFolder, f) for f in files])
+
+
+def _remove_aggregates(f, HDFDataset):
+    """
+    Remove the precomputed sums of a monthly dataset (see radproc.core.build_aggregates) from the opened HDFStore or PyTables file f
+    before the dataset is changed. They are computed again by the next call of build_aggregates().
+    """
+    import radproc.core as _core
+    for level, offset in _core._AGGREGATE_LEVELS:
+        key = _core._aggregate_key(level, HDFDataset)
+        if isinstance(f, pd.HDFStore):
+            if key in f:
+                f.remove(key)
+        elif "/" + key in f:
+            f.remove_node("/" + key, recursive=True)
+
+
+def _remove_manifest(f, HDFDataset):
+    manifestKey = _manifest_key(HDFDataset)
+    if manifestKey in f:
+        f.remove(manifestKey)
+    # the aggregates of the month are out of date as soon as the dataset is written again
+    _remove_aggregates(f, HDFDataset)
+
+
+def _complete_manifest(f, HDFDataset, sources, idHash):
+    manifestKey = _manifest_key(HDFDataset)
+    f.put(manifestKey, sources)
+    attrs = f.get_storer(manifestKey).attrs
+    attrs.idhash = idHash
+    attrs.complete = True
+    # keep finished months on disk if a later month crashes the process
+    f.flush()
+
+
+# count marking NoData in quantized datasets, RADOLAN data only use 12 bits
+_QUANTIZED_NODATA = 0xFFFF
+
+
+def _quantization_scale(metadata):
+    """Return the precision factor of the RADOLAN product to quantize its data with."""
+    if metadata['producttype'] in ['RX', 'EX', 'WX', 'PG', 'PC'] or 'precision' not in metadata:
+        raise ValueError("Data of product %s can not be quantized." % metadata['producttype'])
+    return metadata['precision']
+
+
+def _quantize(dataArr, scale):
+    """
+    Convert a two-dimensional float array decoded from RADOLAN data back to uint16 counts of scale. NaN is stored as _QUANTIZED_NODATA.
+    Rows are converted in blocks to limit temporary memory. Raises ValueError if the values can not be restored exactly from the counts.
+    """
+    counts = np.empty(dataArr.shape, dtype=np.uint16)
+    for start in range(0, len(dataArr), 64):
+        block = dataArr[start:start + 64]
+        nodata = np.isnan(block)
+        c = np.rint(np.where(nodata, 0, block).astype(np.float64) / scale)
+        # same float arithmetic as the decoder in read_RADOLAN_stack()
+        restored = np.asarray(c * scale, dtype=block.dtype)
+        if c.size and (c.min() < 0 or c.max() >= _QUANTIZED_NODATA or not np.array_equal(restored[~nodata], block[~nodata])):
+            raise ValueError("Data can not be stored as counts of %s without loss." % scale)
+        c[nodata] = _QUANTIZED_NODATA
+        counts[start:start + 64] = c
+    return counts
+
+
+def _put_month(f, HDFDataset, df, sources, idHash, scale=None):
+    """
+    Write monthly DataFrame and its manifest entry to the opened HDFStore f.
+    The old manifest entry is removed before the dataset is written and the new one is marked complete afterwards,
+    so a month interrupted while being written is processed again by the next run.
+    If scale is given, df contains quantized counts and scale and NoData count are saved as attributes of the dataset.
+    """
+    _remove_manifest(f, HDFDataset)
+    f.put(HDFDataset, df, data_columns = True, index = True)
+    if scale is not None:
+        attrs = f.get_storer(HDFDataset).attrs
+        attrs.radproc_scale = scale
+        attrs.radproc_nodata = _QUANTIZED_NODATA
+    _complete_manifest(f, HDFDataset, sources, idHash)
+
+
+def _quantize_frame(df, metadata):
+    """Return DataFrame with the quantized counts of df and the scale factor."""
+    scale = _quantization_scale(metadata)
+    return pd.DataFrame(_quantize(df.values, scale), index=df.index, columns=df.columns), scale
+
+
+def _check_bitshuffle(storage, bitshuffle):
+    """Raise ValueError if bit shuffle is selected for DataFrames written with pandas (storage='frame'), which only support byte shuffle."""
+    if bitshuffle and storage == 'frame':
+        raise ValueError("Bit shuffle is only supported with storage='chunked' or 'sparse'.")
+
+
+def _hdf5_filters(complevel, complib, bitshuffle=False):
+    """
+    PyTables filters for the datasets written without pandas.
+    Like pandas, byte shuffle is applied before compression unless bitshuffle is True, which is only supported by Blosc codecs.
+    """
+    if bitshuffle and not (complib or '').startswith('blosc'):
+        raise ValueError("Bit shuffle is only supported by Blosc codecs, not by %s." % complib)
+    return tables.Filters(complevel=complevel, complib=complib, shuffle=not bitshuffle, bitshuffle=bitshuffle)
+
+
+# intervals per block of sparse datasets and minimum number of intervals per chunk of chunked datasets,
+# maximum size in bytes of the block of intervals held in memory while writing chunked datasets
+# and target size of one chunk in bytes
+_CHUNK_ROWS = 48
+_SLAB_BYTES = 2**28
+_CHUNK_BYTES = 2**20
+
+
+def _chunk_rows(nrows, ncells):
+    """
+    Number of intervals per chunk of chunked datasets: as many intervals as fit into _SLAB_BYTES for all cells,
+    but at least _CHUNK_ROWS and at most the whole month.
+    """
+    return min(nrows, max(_CHUNK_ROWS, _SLAB_BYTES // (4 * ncells)))
+
+
+def _streamed_month_to_hdf5(h5, HDFDataset, inFolder, idArr=None, catalog=None, workers=1, filters=None, quantize=False, storage='chunked',
+                            stages=None, report=None):
+    """
+    Stream the binary files of inFolder into the dataset HDFDataset of the opened PyTables file h5.
+    Only one block of intervals is held in memory at a time.
+    
+    With storage='chunked', every chunk of the two-dimensional data array spans the intervals of one block (see _chunk_rows())
+    and as many cells as fit into _CHUNK_BYTES. The time series of a cell of a month is read from a single chunk
+    if the block of the whole month for all cells fits into _SLAB_BYTES, i.e. for up to about 7500 cells of YW or 90000 cells of RW data.
+    For the extended national grid (1100 x 900 cells), blocks span 67 intervals, so a time series spans 12 (RW) or 134 (YW) chunks.
+    With storage='sparse', blocks span _CHUNK_ROWS intervals.
+    With storage='sparse', only the values different from zero (including NaN) are stored in compressed sparse row (CSR) format:
+    the values in array data, their column positions in array indices and the position of the first value of every interval in array indptr.
+    
+    If quantize is True, every block is stored as uint16 counts.
+    The seconds spent reading, quantizing and writing the blocks are added to the dictionary stages
+    and the files read are recorded in the IngestReport report, if given.
+    Returns metadata of the last imported file.
+    """
+    if stages is None:
+        stages = {}
+    files, metadata, gridSize, invalid = _month_files(inFolder, catalog)
+    # rows of the files in the expected timeline of the month, see radolan_binaries_to_dataframe()
+    timeline = _month_timeline(files, metadata['producttype'])
+    if timeline is None:
+        # file names sort by date
+        files = sorted(files)
+        rows = np.arange(len(files))
+        nrows = len(files)
+    else:
+        order = np.argsort(timeline[0], kind='mergesort')
+        files = [files[i] for i in order]
+        rows = timeline[0][order]
+        nrows = len(timeline[1])
     
-    metadata['timezone'] = 'UTC'
-    metadata['idArr'] = idArr
+    clip = idArr is not None
+    if idArr is None:        
+        idArr = np.arange(0, gridSize)
     
-    # check for RADOLAN product type and set frequency of DataFrame index
-    # lists can be extended for other products...    
-    if metadata['producttype'] in ["RW"]:
-        try:
-            # try to prevent dataframe copying by .asfreq(). this does not seem to work in all pandas versions --> try - except
-            df.index.freq = pd.tseries.offsets.Hour()            
-        except:
-            df = df.asfreq('H')
-    elif metadata['producttype'] in ["RY", "RZ", "YW"]:
-        try:            
-            df.index.freq = 5 * pd.tseries.offsets.Minute()
-        except:
-            df = df.asfreq('5min')
+    node = "/" + HDFDataset
+    if node in h5:
+        h5.remove_node(node, recursive=True)
+    year, month = HDFDataset.split("/")
+    group = h5.create_group("/" + year, month, createparents=True)
+    
+    atom = tables.UInt16Atom() if quantize else tables.Float32Atom()
+    if storage == 'chunked':
+        chunkRows = _chunk_rows(nrows, len(idArr))
+        chunkCells = max(1, min(len(idArr), _CHUNK_BYTES // (atom.itemsize * chunkRows)))
+        data = h5.create_carray(group, 'data', atom=atom, shape=(nrows, len(idArr)), filters=filters,
+                                chunkshape=(chunkRows, chunkCells))
+    else:
+        chunkRows = min(_CHUNK_ROWS, nrows)
+        # the number of values is unknown in advance, so the arrays are extended block by block
+        data = h5.create_earray(group, 'data', atom=atom, shape=(0,), filters=filters)
+        indices = h5.create_earray(group, 'indices', atom=tables.Int32Atom(), shape=(0,), filters=filters)
+        indptr = h5.create_earray(group, 'indptr', atom=tables.Int64Atom(), shape=(0,), filters=filters, expectedrows=nrows + 1)
+        indptr.append(np.zeros(1, dtype=np.int64))
+        nnz = 0
+    
+    # every block of rows covers complete chunks, so no chunk is compressed twice
+    block = np.empty((chunkRows, len(idArr)), dtype=np.float32)
+    fileAttrs = []
+    scale = None
+    for start in range(0, nrows, chunkRows):
+        t = _timer()
+        blockArr = block[:min(chunkRows, nrows - start)]
+        first, last = np.searchsorted(rows, [start, start + len(blockArr)])
+        blockFiles = files[first:last]
+        blockRows = rows[first:last] - start
+        # intervals without file are NoData
+        blockArr[np.setdiff1d(np.arange(len(blockArr)), blockRows)] = np.nan
+        blockArr, attrs = _read_stack(blockFiles, blockArr, invalid, idArr if clip else None, workers, blockRows, timings=report is not None)
+        if report is not None:
+            report._record_files(blockFiles, attrs)
+        t = _lap(stages, 'read', t)
+        if quantize:
+            for a in attrs:
+                if scale is None and not isinstance(a, Exception):
+                    scale = _quantization_scale(a)
+            # blocks of skipped files only contain NaN, which is stored as NoData count with any scale
+            blockArr = _quantize(blockArr, 1.0 if scale is None else scale)
+            t = _lap(stages, 'quantize', t)
+        if storage == 'chunked':
+            data[start:start + len(blockArr)] = blockArr
+        else:
+            # NaN compares unequal to zero, so NoData values are stored explicitly
+            nonzero = blockArr != 0
+            nzRows, cols = np.nonzero(nonzero)
+            data.append(blockArr[nzRows, cols])
+            indices.append(cols.astype(np.int32))
+            indptr.append(nnz + np.cumsum(np.count_nonzero(nonzero, axis=1), dtype=np.int64))
+            nnz += len(cols)
+        _lap(stages, 'write', t)
+        fileAttrs += attrs
+    
+    if timeline is None:
+        ind, metadata, skipped_files, error_messages = _stack_index(fileAttrs, files, metadata)
+    else:
+        ind, metadata, skipped_files, error_messages = _timeline_index(timeline[1], fileAttrs, files, rows, metadata)
+    # nanoseconds since epoch (UTC)
+    h5.create_array(group, 'index', np.array(ind, dtype='datetime64[ns]').astype(np.int64))
+    h5.create_array(group, 'columns', np.asarray(idArr))
+    group._v_attrs.radproc_format = storage
+    group._v_attrs.freq = _freq_seconds(_product_freq(metadata['producttype']))
+    if quantize:
+        group._v_attrs.radproc_scale = 1.0 if scale is None else scale
+        group._v_attrs.radproc_nodata = _QUANTIZED_NODATA
     
-    # export list of skipped files and corresponding error messages to txt file
-    # if any errors occurred
     if len(skipped_files) > 0:
+        # a text file listing skipped files is written two directory levels above inFolder
         two_dirs_up = os.path.split(os.path.split(inFolder)[0])[0]
-        outtxt = os.path.join(two_dirs_up, 'skipped_files_%i_%i.txt' % (datetime_obj.year, datetime_obj.month))
-        print('%i files had to be skipped due to processing errors.\nIntervals were filled with NaN' % len(skipped_files))
-        print('Please check skipped files and error list in created text file %s' % outtxt)
-        txt = open(outtxt, 'w')
-        for skipped_file, error_message in zip(skipped_files, error_messages):
-            txt.write('%s\n%s\n\n' %(skipped_file, error_message))        
-        txt.close()
-    return df, metadata
-    
-    
-def radolan_binaries_to_hdf5(inFolder, HDFFile, idArr=None, complevel=9):
+        _write_skipped_files(two_dirs_up, skipped_files, error_messages, ind[-1])
+    return metadata
+
+
+def _month_is_complete(HDFFile, monthFolder, idArr):
+    """
+    Check the manifest of HDFFile whether the dataset of monthFolder has been written completely
+    from the same source files (names, sizes and modification times) and with the same ID array.
+    """
+    if not os.path.exists(HDFFile):
+        return False
+    return _dataset_is_complete(HDFFile, _hdf5_dataset_from_folder(monthFolder), _month_sources(monthFolder), idArr)
+
+
+def _archive_is_complete(HDFFile, tarFile, idArr):
+    """Counterpart of _month_is_complete() for the dataset of a monthly archive, whose source is the archive itself."""
+    if not os.path.exists(HDFFile):
+        return False
+    return _dataset_is_complete(HDFFile, "/".join(_archive_year_month(tarFile)), _file_sources([tarFile]), idArr)
+
+
+def _dataset_is_complete(HDFFile, HDFDataset, sources, idArr):
+    """Check the manifest of HDFFile whether HDFDataset has been written completely from sources and with the same ID array."""
+    manifestKey = _manifest_key(HDFDataset)
+    with pd.HDFStore(HDFFile, "r") as f:
+        if manifestKey not in f or HDFDataset not in f:
+            return False
+        attrs = f.get_storer(manifestKey).attrs
+        if not getattr(attrs, 'complete', False) or getattr(attrs, 'idhash', None) != _id_hash(idArr):
+            return False
+        recorded = f[manifestKey]
+    return recorded.reset_index(drop=True).equals(sources)
+
+
+def radolan_binaries_to_hdf5(inFolder, HDFFile, idArr=None, complevel=9, catalog=None, workers=1, storage='frame', complib='zlib',
+                             quantize=False, bitshuffle=False, report=None):
     """
     Wrapper for radolan_binaries_to_dataframe() to import and **clip all RADOLAN binary files of one month in a directory** into a pandas DataFrame
     and save the resulting DataFrame as a dataset to an HDF5 file. The name for the HDF5 dataset is derived from the names of the input folder (year and month).
@@ -383,6 +1488,44 @@ def radolan_binaries_to_hdf5(inFolder, HDFFile, idArr=None, complevel=9):
             complevel may range from 0 to 9, where 9 is the highest compression possible.
             Using a high compression level reduces data size significantly,
             but writing data to HDF5 takes more time and data import from HDF5 is slighly slower.
+        complib : string (optional, default: 'zlib')
+            compression library for the output HDF5 file, e.g. 'zlib', 'blosc:lz4', 'blosc:zstd' or 'blosc:lz4hc'
+            (see tables.filters.all_complibs). Blosc codecs compress and especially decompress
+            precipitation data, which consist mostly of zeros, several times faster than zlib.
+            Use :func:`radproc.core.set_compression_threads` for multi-threaded Blosc compression and decompression.
+        catalog : numpy structured array (optional, default: None)
+            Catalog of the binary files in inFolder created by :func:`radproc.raw.scan_radolan_directory`.
+            See :func:`radproc.raw.radolan_binaries_to_dataframe`.
+        workers : integer (optional, default: 1)
+            Number of threads reading and decompressing the binary files in parallel.
+            If None, the number of CPUs is used.
+        storage : string (optional, default: 'frame')
+            Storage layout of the dataset.
+            
+            - 'frame': The DataFrame of the entire month is created in memory and saved in pandas fixed format.
+            - 'chunked': The binary files are streamed into a two-dimensional array (time x cells) in blocks of
+              as many intervals as fit into 256 MB for all cells (at least 48). Every chunk spans the intervals of one block and a range of cells,
+              so only one block is held in memory and time series of single cells can be read without loading the entire month.
+              The time series of a cell of a month is read from a single chunk for up to about 7500 cells of YW or 90000 cells of RW data.
+              Recommended for large grids, e.g. YW data without idArr.
+              The dataset is loaded as DataFrame by :func:`radproc.core.load_month` and the other load functions of :mod:`radproc.core`.
+            - 'sparse': The binary files are streamed like with 'chunked', but only values different from zero are stored
+              in compressed sparse row format (intervals x cells). Recommended for data with many dry intervals, e.g. YW data.
+              :func:`radproc.core.load_years_and_resample` and the functions of :mod:`radproc.heavyrain` searching heavy rainfalls
+              aggregate these datasets without creating the dense DataFrame of a month.
+              :func:`radproc.core.load_month` returns a dense or, with sparse=True, a sparse DataFrame.
+        quantize : bool (optional, default: False)
+            If True, the data are stored as uint16 counts of the precision of the RADOLAN product (e.g. 0.1 mm for RW)
+            instead of float32 values, which halves file size and read bandwidth. The precision factor and the count marking NoData
+            are saved as attributes of the dataset and the load functions of :mod:`radproc.core` convert the counts back to float values.
+            The restored values are identical to the ones stored without quantization.
+            Only products with 12-bit data like RW, RY, RZ and YW can be quantized.
+        bitshuffle : bool (optional, default: False)
+            If True, the bit shuffle filter is applied instead of the byte shuffle filter before compression.
+            Only supported with storage='chunked' or 'sparse' and Blosc codecs (complib='blosc:...'), otherwise ValueError is raised.
+            Bit shuffle may improve the compression ratio of zstd, but slows down reading (see benchmarks/hdf5_compression.py).
+        report : :class:`radproc.raw.IngestReport` (optional, default: None)
+            Report recording timings, data volumes and memory usage of the import.
         
     :Returns:
     ---------
@@ -390,6 +1533,9 @@ def radolan_binaries_to_hdf5(inFolder, HDFFile, idArr=None, complevel=9):
         No return value
         
         Function creates dataset in HDF5 file specified in parameter HDFFile.
+        Names, sizes and modification times of the source files, a hash of idArr and a completion marker are recorded
+        in the manifest of the HDF5 file (dataset *manifest/<year>/<month>*), which is used by
+        :func:`radproc.raw.process_radolan_data` to skip months that are up to date.
         
         In case any binary files could not be read in due to processing errors,
         these are skipped and the respective intervals are filled with NoData (NaN) values.
@@ -399,67 +1545,256 @@ def radolan_binaries_to_hdf5(inFolder, HDFFile, idArr=None, complevel=9):
         
     """    
   
-    # Split directory path to prepare node creation in HDF5 file
-    # x is a list with all individual directories in inFolder
-    if "\\" in inFolder:    
-        x = inFolder.split("\\")
-    elif "/" in inFolder:
-        x = inFolder.split("/")
-    else:
-        print("Directory %s can not be found. Please check your input parameter!" % inFolder)
-        sys.exit()
-    
-    # Deduce group names from directory path
-    # (years: 4 characters, months: 1-2 characters) 
-    # Paths can end with / or \\ depending on delimiter
-    # Path .../2008/5 --> last element x[-1] is the month
-    if len(x[-1]) == 1 or len(x[-1]) == 2:
-        month = x[-1]
-    # Path .../2008/5/ --> second to last element x[-2] is the month,
-    # Last element is an empty string of length zero --> x = [...,"2008","5",""]
-    elif len(x[-2]) == 1 or len(x[-2]) == 2:
-        month = x[-2]
-    # Path ...\\2008\\5\\ --> third to last element x[-3] is the month,
-    # Last two elements are empty strings of length zero --> x = [...,"2008","","5","",""]
-    elif len(x[-3]) == 1 or len(x[-3]) == 2:
-        month = x[-3]
-    else:
-        print("No suitable directory path format! Month could not be found!")
-        sys.exit()
-    
-    # Identify years in the same way but one element further in front of list x 
-    if len(x[-2]) == 4:
-        year = x[-2]
-    elif len(x[-3]) == 4:
-        year = x[-3]
-    elif len(x[-4]) == 4:
-        year = x[-4]
-    else:
-        print("No suitable directory path format! Year could not be found!")
-        sys.exit()
-    
-    # Path (Group) and Label of HDF5 dataset to be created
-    HDFDataset = "/".join([year,month])
-    
+    # Path (Group) and Label of HDF5 dataset to be created, derived from the names of the input folders
+    HDFDataset = _hdf5_dataset_from_folder(inFolder)
+    
+    # source files are recorded before the import, so files changed in the meantime are detected by the next run
+    sources = _month_sources(inFolder)
+    
+    # seconds spent in the stages read, quantize and write for the ingest report
+    stages = {}
+    if storage in ('chunked', 'sparse'):
+        with pd.HDFStore(HDFFile, mode = "a") as f:
+            _remove_manifest(f, HDFDataset)
+        with tables.open_file(HDFFile, mode = "a") as h5:
+            _streamed_month_to_hdf5(h5, HDFDataset, inFolder, idArr, catalog, workers, _hdf5_filters(complevel, complib, bitshuffle), quantize, storage, stages,
+                                    report)
+            bytesOut = sum(leaf.size_in_memory for leaf in h5.get_node("/" + HDFDataset))
+        # the manifest is compressed like the data, otherwise the column of file names takes more space than a sparse month
+        with pd.HDFStore(HDFFile, mode = "a", complevel=complevel, complib=complib) as f:
+            _complete_manifest(f, HDFDataset, sources, _id_hash(idArr))
+        if report is not None:
+            report._record_dataset(HDFDataset, stages, bytesOut)
+        return
+    elif storage != 'frame':
+        raise ValueError("storage must be 'frame', 'chunked' or 'sparse', not %s." % storage)
+    
+    _check_bitshuffle(storage, bitshuffle)
     # Call function radolan_binaries_to_dataframe() to import, clip and convert RADOLAN binary files from inFolder to DataFrame
-    df, metadata = radolan_binaries_to_dataframe(inFolder, idArr)
-
-
+    t = _timer()
+    df, metadata = radolan_binaries_to_dataframe(inFolder, idArr, catalog, workers, report)
+    t = _lap(stages, 'read', t)
+    scale = None
+    if quantize:
+        df, scale = _quantize_frame(df, metadata)
+        t = _lap(stages, 'quantize', t)
 
     # Save DataFrame to HDF5 file in fixed format --> No slicing on disk, entire dataset has to be loaded into memory
     # Note: Saving in table format (which allows slicing datasets on disk) is not possible since HDF5 is a row oriented data format,
     # which offers only 64kb memory for column names (supporting up to about 2000 columns)    
     # pandas HDFStore is based on pytables and allows to save DataFrames to HDF5 with index and column names
     # Disadvantage: Opening this custom format without any problems is only possible using pandas functions    
-    with pd.HDFStore(HDFFile, mode = "a", complevel=complevel) as f:        
-        f.put(HDFDataset, df, data_columns = True, index = True)
+    with pd.HDFStore(HDFFile, mode = "a", complevel=complevel, complib=complib) as f:        
+        _put_month(f, HDFDataset, df, sources, _id_hash(idArr), scale)
+    _lap(stages, 'write', t)
+    if report is not None:
+        report._record_dataset(HDFDataset, stages, df.values.nbytes)
+
+
+def _iter_radolan_archive(tar):
+    """
+    Yield name and content (as memoryview) of every RADOLAN binary file in an opened tar archive.
+    Nested archives (e.g. daily archives of YW data) are read recursively. Nothing is extracted to disk.
+    """
+    for member in tar:
+        if not member.isfile():
+            continue
+        name = os.path.basename(member.name)
+        if name.endswith('.tar') or name.endswith('.tar.gz'):
+            # stream mode: the nested archive is read sequentially from the member of the outer archive
+            with _tarfile.open(fileobj=tar.extractfile(member), mode='r|*') as nestedTar:
+                for item in _iter_radolan_archive(nestedTar):
+                    yield item
+        elif _is_radolan_binary(name):
+            # gzip compression is detected by the reader, uncompressed data are decoded without copying
+            yield name, memoryview(tar.extractfile(member).read())
+
+
+def _archive_year_month(tarFile):
+    # Archive names contain year and month at end of basename: RWrea_200101.tar or RWrea_200101.tar.gz
+    if tarFile.endswith('.tar.gz'):
+        return tarFile[-13:-9], str(int(tarFile[-9:-7]))
+    elif tarFile.endswith('.tar'):
+        return tarFile[-10:-6], str(int(tarFile[-6:-4]))
+    else:
+        raise ValueError("No suitable archive name format! Year and month could not be found in %s!" % tarFile)
+
+
+def radolan_archive_to_dataframe(tarFile, idArr=None, report=None):
+    """
+    Import all RADOLAN binary files of a monthly .tar or .tar.gz archive into a pandas DataFrame without extracting the archive to disk,
+    optionally clipping the data to the extent of an investigation area specified by an ID array.
+    
+    The archive members are read one after another into memory and decoded directly into the output data array.
+    Daily archives contained in the monthly archive (e.g. for RADOLAN YW data) are read in the same way.
+    
+    :Parameters:
+    ------------
+        tarFile : string
+            Path to the monthly archive containing RADOLAN binary files, e.g. RWrea_200101.tar.gz or YWrea_200101.tar.
+            All members ending with '-bin' or '-bin.gz' are read in, members ending with '.tar' or '.tar.gz' are read as nested archives.
+        idArr : one-dimensional numpy array (optional, default: None)
+            containing ID values to select RADOLAN data of the cells located in the investigation area.
+            If no idArr is specified, the ID array is automatically generated from RADOLAN metadata
+            and RADOLAN precipitation data are not clipped to any investigation area.
+        report : :class:`radproc.raw.IngestReport` (optional, default: None)
+            Report recording the seconds spent reading every file. The file records are assigned to the next dataset recorded.
+        
+    :Returns:
+    ---------
+        (df, metadata) : tuple with two elements:            
+            df : pandas DataFrame
+                see :func:`radproc.raw.radolan_binaries_to_dataframe`
+            metadata : dictionary
+                containing metadata from the last imported RADOLAN binary file
+                
+        In case any binary files could not be read in due to processing errors,
+        these are skipped and the respective intervals are filled with NoData (NaN) values.
+        A textfile with the names and error messages is written one directory level above the directory of the archive for information.
+    """
+    clip = idArr is not None
+    dataArr = None
+    metadata = None
+    names = []
+    fileAttrs = []
+    
+    with _tarfile.open(tarFile, mode='r|*') as tar:
+        for name, f in _iter_radolan_archive(tar):
+            n = len(names)
+            if dataArr is None:
+                # the output array is created when the first file has been read in successfully
+                try:
+                    row, attrs = _wrl_io.read_RADOLAN_stack([f], missing=np.nan, flipud=True, idArr=idArr if clip else None,
+                                                            timings=report is not None)
+                except Exception as e:
+                    names.append(name)
+                    fileAttrs.append(e)
+                    continue
+                metadata = attrs[0]
+                if idArr is None:
+                    idArr = np.arange(0, metadata['nrow'] * metadata['ncol'])
+                # initial size: number of hourly or 5-minute intervals of the month, enlarged if the archive contains more files
+                capacity = _calendar.monthrange(metadata['datetime'].year, metadata['datetime'].month)[1] * 24
+                if metadata['producttype'] in ["RY", "RZ", "YW"]:
+                    capacity *= 12
+                dataArr = np.empty((max(capacity, n + 1), len(idArr)), dtype=np.float32)
+                # intervals of preceding files which could not be read in
+                dataArr[:n] = np.nan
+                dataArr[n] = row.reshape(-1)
+                del row
+            else:
+                if n == len(dataArr):
+                    enlarged = np.empty((2 * n, len(idArr)), dtype=np.float32)
+                    enlarged[:n] = dataArr
+                    dataArr = enlarged
+                dummy, attrs = _wrl_io.read_RADOLAN_stack([f], out=dataArr[n:n+1], missing=np.nan, flipud=True, skip_errors=True,
+                                                          idArr=idArr if clip else None, timings=report is not None)
+            names.append(name)
+            fileAttrs.append(attrs[0])
+    
+    if report is not None:
+        report._record_files(names, fileAttrs)
+    if dataArr is None:
+        print('No readable RADOLAN binary file in archive %s. Please check your input files and parameters.' % tarFile)
+        sys.exit()
+    
+    dataArr = dataArr[:len(names)]
+    # Like in radolan_binaries_to_dataframe(), every file is placed into the row of its interval in the expected timeline of the month
+    # and intervals without file are NoData, so archive and folder ingest of the same month result in the same DataFrame.
+    timeline = _month_timeline(names, metadata['producttype'])
+    if timeline is None:
+        # archive members are usually stored in chronological order. Otherwise, sort intervals by the dates in the file names.
+        order = np.argsort([name.split("-")[2] for name in names], kind='mergesort')
+        if (order != np.arange(len(names))).any():
+            dataArr = dataArr[order]
+            names = [names[i] for i in order]
+            fileAttrs = [fileAttrs[i] for i in order]
+    else:
+        rows, index = timeline
+        placed = np.empty((len(index), len(idArr)), dtype=np.float32)
+        placed[np.setdiff1d(np.arange(len(index)), rows)] = np.nan
+        placed[rows] = dataArr
+        dataArr = placed
+        del placed
+    
+    # a text file listing skipped files is written one directory level above the directory of the archive
+    one_dir_up = os.path.dirname(os.path.dirname(os.path.abspath(tarFile)))
+    return _radolan_stack_to_dataframe(dataArr, fileAttrs, names, idArr, metadata, one_dir_up, timeline)
+
+
+def radolan_archive_to_hdf5(tarFile, HDFFile, idArr=None, complevel=9, complib='zlib', quantize=False, report=None):
+    """
+    Wrapper for radolan_archive_to_dataframe() to import and **clip all RADOLAN binary files of a monthly archive** into a pandas DataFrame
+    and save the resulting DataFrame as a dataset to an HDF5 file without extracting the archive to disk.
+    The name for the HDF5 dataset is derived from the archive name (year and month).
+    
+    :Parameters:
+    ------------
+    
+        tarFile : string
+            Path to the monthly archive containing RADOLAN binary files.
+            Archive names must contain year and month at end of basename: RWrea_200101.tar or RWrea_200101.tar.gz
+            
+            In this example for January 2001, the output dataset will have the path '2001/1' within the HDF5 file.
+        HDFFile : string
+            Path and name of the HDF5 file.
+            If the specified HDF5 file already exists, the new dataset will be appended; if the HDF5 file doesn't exist, it will be created. 
+        idArr : one-dimensional numpy array (optional, default: None)
+            containing ID values to select RADOLAN data of the cells located in the investigation area.
+            If no idArr is specified, the ID array is automatically generated from RADOLAN metadata
+            and RADOLAN precipitation data are not clipped to any investigation area.
+        complevel : integer (optional, default: 9)
+            defines the level of compression for the output HDF5 file.
+            complevel may range from 0 to 9, where 9 is the highest compression possible.
+        complib : string (optional, default: 'zlib')
+            compression library for the output HDF5 file, see :func:`radproc.raw.radolan_binaries_to_hdf5`.
+        quantize : bool (optional, default: False)
+            If True, the data are stored as uint16 counts of the product precision instead of float32 values.
+            See :func:`radproc.raw.radolan_binaries_to_hdf5`.
+        report : :class:`radproc.raw.IngestReport` (optional, default: None)
+            Report recording timings, data volumes and memory usage of the import.
+        
+    :Returns:
+    ---------
+    
+        No return value
+        
+        Function creates dataset in HDF5 file specified in parameter HDFFile.
+    """
+    year, month = _archive_year_month(tarFile)
+    # Path (Group) and Label of HDF5 dataset to be created
+    HDFDataset = "/".join([year, month])
+    
+    # the archive is the source of the month in the manifest, recorded before the import like in radolan_binaries_to_hdf5()
+    sources = _file_sources([tarFile])
+    
+    stages = {}
+    t = _timer()
+    df, metadata = radolan_archive_to_dataframe(tarFile, idArr, report)
+    t = _lap(stages, 'read', t)
+    scale = None
+    if quantize:
+        df, scale = _quantize_frame(df, metadata)
+        t = _lap(stages, 'quantize', t)
+    
+    # Save DataFrame and manifest entry to HDF5 file in fixed format, see radolan_binaries_to_hdf5()
+    with pd.HDFStore(HDFFile, mode = "a", complevel=complevel, complib=complib) as f:        
+        _put_month(f, HDFDataset, df, sources, _id_hash(idArr), scale)
+    _lap(stages, 'write', t)
+    if report is not None:
+        report._record_dataset(HDFDataset, stages, df.values.nbytes)
 
 
 #--------Automization---------------------------------------------------
 
-def _process_year(yearFolder, HDFFile, idArr, complevel):
+def _month_folders(yearFolder):
     monthFolders = [os.path.join(yearFolder, monthDir) for monthDir in os.listdir(yearFolder)]
-    monthFolders = [monthDir for monthDir in monthFolders if os.path.isdir(monthDir)]
+    return [monthDir for monthDir in monthFolders if os.path.isdir(monthDir)]
+
+
+def _process_year(yearFolder, HDFFile, idArr, complevel, catalog=None, workers=1, incremental=True, storage='frame', complib='zlib', quantize=False,
+                  monthCatalogs=None, bitshuffle=False, report=None):
+    monthFolders = _month_folders(yearFolder)
     failed = []
     
     # create directory for every month
@@ -467,7 +1802,12 @@ def _process_year(yearFolder, HDFFile, idArr, complevel):
     # if an error occurs, the month will be skipped and added to a list of fails
     for monthFolder in monthFolders:
         try:
-            radolan_binaries_to_hdf5(inFolder=monthFolder, HDFFile=HDFFile, idArr=idArr, complevel=complevel)
+            if incremental and _month_is_complete(HDFFile, monthFolder, idArr):
+                print(monthFolder + " up to date")
+                continue
+            monthCatalog = None if catalog is None else _catalog_folder(catalog, monthFolder, monthCatalogs)
+            radolan_binaries_to_hdf5(inFolder=monthFolder, HDFFile=HDFFile, idArr=idArr, complevel=complevel, catalog=monthCatalog, workers=workers,
+                                     storage=storage, complib=complib, quantize=quantize, bitshuffle=bitshuffle, report=report)
             print(monthFolder + " processed")
         except:
             print("Error at " + monthFolder)
@@ -477,8 +1817,134 @@ def _process_year(yearFolder, HDFFile, idArr, complevel):
     return failed
 
 
+def _import_month(task):
+    """
+    Import the binary files of one month folder in a worker process of _process_months_parallel().
+    Returns month folder, name of the HDF5 dataset, DataFrame, manifest sources, scale of quantized data
+    and the file records and stages of the month for the ingest report (None if timings is False).
+    All but the month folder and the report records are None if the month could not be imported.
+    """
+    monthFolder, idArr, catalog, workers, quantize, timings = task
+    # file records of this month are collected in the worker process and sent to the writer
+    report = IngestReport() if timings else None
+    stages = {}
+    scale = None
+    try:
+        t = _timer()
+        HDFDataset = _hdf5_dataset_from_folder(monthFolder)
+        sources = _month_sources(monthFolder)
+        df, metadata = radolan_binaries_to_dataframe(monthFolder, idArr, catalog, workers, report)
+        t = _lap(stages, 'read', t)
+        if quantize:
+            # quantized DataFrames are also sent to the writer in half the time
+            df, scale = _quantize_frame(df, metadata)
+            _lap(stages, 'quantize', t)
+    except BaseException:
+        # also catch SystemExit raised by sys.exit(), which would terminate the worker process
+        return monthFolder, None, None, None, None, None
+    return monthFolder, HDFDataset, df, sources, scale, (report._pending, stages) if timings else None
+
+
+def _process_months_parallel(monthFolders, HDFFile, idArr, complevel, catalog=None, workers=1, processes=None, incremental=True, complib='zlib',
+                             quantize=False, report=None):
+    """
+    Import month folders in a pool of worker processes while the calling process writes the DataFrames to HDF5 one after another.
+    At most two months per process are imported in advance of the writer to limit memory usage.
+    Months are written in the order of monthFolders. Returns list of month folders which could not be processed.
+    """
+    if processes is None:
+        processes = cpu_count()
+    
+    failed = []
+    if incremental:
+        remaining = []
+        for monthFolder in monthFolders:
+            try:
+                if _month_is_complete(HDFFile, monthFolder, idArr):
+                    print(monthFolder + " up to date")
+                    continue
+            except:
+                print("Error at " + monthFolder)
+                failed.append(monthFolder)
+                continue
+            remaining.append(monthFolder)
+        monthFolders = remaining
+    idHash = _id_hash(idArr)
+    
+    # split the catalog only once instead of searching the entire catalog for every month
+    monthCatalogs = None if catalog is None else _split_catalog(catalog)
+    tasks = []
+    for monthFolder in monthFolders:
+        monthCatalog = None if catalog is None else _catalog_folder(catalog, monthFolder, monthCatalogs)
+        tasks.append((monthFolder, idArr, monthCatalog, workers, quantize, report is not None))
+    
+    pending = deque()
+    pool = Pool(processes)
+    try:
+        with pd.HDFStore(HDFFile, mode = "a", complevel=complevel, complib=complib) as f:
+            i = 0
+            while i < len(tasks) or pending:
+                # keep all processes busy, but limit the number of DataFrames waiting for the writer
+                while i < len(tasks) and len(pending) < 2 * processes:
+                    pending.append(pool.apply_async(_import_month, (tasks[i],)))
+                    i += 1
+                monthFolder, HDFDataset, df, sources, scale, records = pending.popleft().get()
+                try:
+                    if df is None:
+                        raise IOError("Month could not be imported.")
+                    t = _timer()
+                    _put_month(f, HDFDataset, df, sources, idHash, scale)
+                    if report is not None:
+                        fileRecords, stages = records
+                        report._pending.extend(fileRecords)
+                        _lap(stages, 'write', t)
+                        report._record_dataset(HDFDataset, stages, df.values.nbytes)
+                    print(monthFolder + " processed")
+                except:
+                    print("Error at " + monthFolder)
+                    failed.append(monthFolder)
+                del df
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    return failed
+
+
+def _process_year_folders(yearFolders, HDFFile, idArr, complevel, catalog, workers=1, processes=1, incremental=True, storage='frame', complib='zlib',
+                          quantize=False, aggregate=False, bitshuffle=False, report=None):
+    """
+    Import the month folders of all year folders into HDFFile, one after another or in parallel processes,
+    for process_radolan_data() and create_idraster_and_process_radolan_data().
+    """
+    if processes != 1 and storage != 'frame':
+        raise ValueError("Months can only be processed in parallel with storage='frame'.")
+    _check_bitshuffle(storage, bitshuffle)
+    
+    if processes == 1:
+        # split the catalog only once instead of searching the entire catalog for every month
+        monthCatalogs = _split_catalog(catalog)
+        # For every year folder...
+        for yearFolder in yearFolders:
+            _process_year(yearFolder=yearFolder, HDFFile=HDFFile, idArr=idArr, complevel=complevel, catalog=catalog, workers=workers,
+                          incremental=incremental, storage=storage, complib=complib, quantize=quantize, monthCatalogs=monthCatalogs,
+                          bitshuffle=bitshuffle, report=report)
+    else:
+        # import the months of all years in parallel processes
+        monthFolders = [monthFolder for yearFolder in yearFolders for monthFolder in _month_folders(yearFolder)]
+        _process_months_parallel(monthFolders, HDFFile, idArr, complevel, catalog=catalog, workers=workers, processes=processes, incremental=incremental,
+                                 complib=complib, quantize=quantize, report=report)
+    
+    if aggregate:
+        import radproc.core as _core
+        _core.build_aggregates(HDFFile, complevel=complevel, complib=complib)
+
+
 
-def create_idraster_and_process_radolan_data(inFolder, HDFFile, clipFeature=None, complevel=9):
+def create_idraster_and_process_radolan_data(inFolder, HDFFile, clipFeature=None, complevel=9, workers=1, processes=1, incremental=True, storage='frame', complib='zlib',
+                                             quantize=False, validation=None, aggregate=False, bitshuffle=False, report=None):
     """
     Convert all RADOLAN binary data in directory tree into an HDF5 file with monthly DataFrames for a given study area.
     
@@ -504,6 +1970,9 @@ def create_idraster_and_process_radolan_data(inFolder, HDFFile, clipFeature=None
     
     If necessary, a textfile containing all directories which could not be processed due to data format errors is created in directory of HDF5 file.
     
+    A catalog of all binary files (see :func:`radproc.raw.scan_radolan_directory`) is created in or reused from *<HDFFile name>_catalog.npy*
+    in the directory of HDFFile, so the input directory tree is not modified.
+    
     :Parameters:
     ------------
     
@@ -522,6 +1991,44 @@ def create_idraster_and_process_radolan_data(inFolder, HDFFile, clipFeature=None
             complevel may range from 0 to 9, where 9 is the highest compression possible.
             Using a high compression level reduces data size significantly,
             but writing data to HDF5 takes more time and data import from HDF5 is slighly slower.
+        complib : string (optional, default: 'zlib')
+            compression library for the output HDF5 file, e.g. 'zlib', 'blosc:lz4', 'blosc:zstd' or 'blosc:lz4hc'
+            (see tables.filters.all_complibs). Blosc codecs compress and especially decompress
+            precipitation data, which consist mostly of zeros, several times faster than zlib.
+            Use :func:`radproc.core.set_compression_threads` for multi-threaded Blosc compression and decompression.
+        workers : integer (optional, default: 1)
+            Number of threads reading and decompressing the binary files of each month in parallel.
+            If None, the number of CPUs is used.
+        processes : integer (optional, default: 1)
+            Number of processes importing months in parallel. The resulting DataFrames are written to the HDF5 file
+            one after another by the calling process. If None, the number of CPUs is used.
+            Memory for up to two monthly DataFrames per process is required.
+            On Windows, scripts calling this function with processes > 1 have to be protected by *if __name__ == '__main__':*
+        incremental : bool (optional, default: True)
+            If True, months are skipped if the manifest of the HDF5 file shows that their dataset has been written completely
+            from the same binary files (names, sizes and modification times) and with the same ID array.
+            Hence, an interrupted run can simply be restarted and only months with new or corrected binary files are processed again.
+            If False, all months are processed and existing datasets are overwritten.
+        storage : string (optional, default: 'frame')
+            Storage layout of the monthly datasets, 'frame', 'chunked' or 'sparse'. See :func:`radproc.raw.radolan_binaries_to_hdf5`.
+            With 'chunked' and 'sparse', months are streamed into the HDF5 file one after another, so processes has to be 1.
+        quantize : bool (optional, default: False)
+            If True, the data are stored as uint16 counts of the product precision instead of float32 values.
+            See :func:`radproc.raw.radolan_binaries_to_hdf5`.
+        validation : dictionary, string or bool (optional, default: None)
+            Report of :func:`radproc.raw.validate_radolan_directory` or path and name of its JSON file.
+            Files listed as invalid in the report are skipped without reading them, unless their size or modification time has changed since the validation.
+            Their intervals are filled with NoData (NaN) values and they are listed in the text file of skipped files.
+            If True, inFolder is validated before the import with one thread per CPU and the report is saved next to HDFFile
+            (e.g. *RW_validation.json* for *RW.h5*).
+        aggregate : bool (optional, default: False)
+            If True, hourly, daily and monthly sums of all new or changed months are precomputed with :func:`radproc.core.build_aggregates`
+            after the import, so :func:`radproc.core.load_years_and_resample` and its wrapper functions don't need to read the precipitation data.
+        bitshuffle : bool (optional, default: False)
+            If True, the bit shuffle filter is applied instead of the byte shuffle filter before Blosc compression,
+            see :func:`radproc.raw.radolan_binaries_to_hdf5`. Only supported with storage='chunked' or 'sparse'.
+        report : :class:`radproc.raw.IngestReport` (optional, default: None)
+            Report recording timings, data volumes and memory usage of the import.
         
     :Returns:
     ---------
@@ -587,20 +2094,16 @@ def create_idraster_and_process_radolan_data(inFolder, HDFFile, clipFeature=None
         print("ArcGIS not available! Exit script!")
         sys.exit()
     
-    # get RADOLAN binary file of first month in first year and read it in
-    # needed to obtain the RADOLAN metadata
     yearFolders = [os.path.join(inFolder, yearDir) for yearDir in os.listdir(inFolder)]
     yearFolders = [yearDir for yearDir in yearFolders if os.path.isdir(yearDir)]
     
-    firstMonthFolder = os.path.join(yearFolders[0], os.listdir(yearFolders[0])[0])
-    dummyFile = os.path.join(firstMonthFolder, os.listdir(firstMonthFolder)[0])
-    # Load first binary file to access header information
-    data, metadata = _wrl_io.read_RADOLAN_composite(dummyFile)
-    del data
+    # catalog of all binary files, needed to obtain the RADOLAN metadata
+    catalog = _import_catalog(inFolder, HDFFile, validation)
+    readable = catalog[catalog['nrow'] > -1]
     
     # different RADOLAN products have different grid sizes (e.g. 900*900 for the RADOLAN-Online national grid,
     # 1100*900 for the extended national grid used in the RADOLAN reanalysis)
-    gridSize = metadata['nrow'] * metadata['ncol']
+    gridSize = int(readable['nrow'][0]) * int(readable['ncol'][0])
     
     idRasGermany = os.path.join(os.path.split(HDFFile)[0], "idras_ger")
     idRas = os.path.join(os.path.split(HDFFile)[0], "idras")
@@ -614,14 +2117,14 @@ def create_idraster_and_process_radolan_data(inFolder, HDFFile, clipFeature=None
     
     idArr = _arcgis.create_idarray(projectionFile=projectionFile, idRasterGermany=idRasGermany, idRaster=idRas, clipFeature=clipFeature, extendedNationalGrid=extendedNationalGrid)
     
-    # For every year folder...
-    for yearFolder in yearFolders:
-        _process_year(yearFolder=yearFolder, HDFFile=HDFFile, idArr=idArr, complevel=complevel)
+    _process_year_folders(yearFolders, HDFFile, idArr, complevel, catalog, workers=workers, processes=processes, incremental=incremental,
+                          storage=storage, complib=complib, quantize=quantize, aggregate=aggregate, bitshuffle=bitshuffle, report=report)
 
 
 
 
-def process_radolan_data(inFolder, HDFFile, idArr=None, complevel=9):
+def process_radolan_data(inFolder, HDFFile, idArr=None, complevel=9, workers=1, processes=1, incremental=True, storage='frame', complib='zlib',
+                         quantize=False, validation=None, aggregate=False, bitshuffle=False, report=None):
     """
     Converts all RADOLAN binary data into an HDF5 file with monthly DataFrames for a given study area without generating a new ID raster.
     
@@ -641,6 +2144,9 @@ def process_radolan_data(inFolder, HDFFile, idArr=None, complevel=9):
     
     Additionally, a textfile containing all directories which could not be processed due to data format errors is created in directory of HDF5 file.
     
+    A catalog of all binary files (see :func:`radproc.raw.scan_radolan_directory`) is created in or reused from *<HDFFile name>_catalog.npy*
+    in the directory of HDFFile, so the input directory tree is not modified.
+    
     
     :Parameters:
     ------------
@@ -660,6 +2166,44 @@ def process_radolan_data(inFolder, HDFFile, idArr=None, complevel=9):
             complevel may range from 0 to 9, where 9 is the highest compression possible.
             Using a high compression level reduces data size significantly,
             but writing data to HDF5 takes more time and data import from HDF5 is slighly slower.
+        complib : string (optional, default: 'zlib')
+            compression library for the output HDF5 file, e.g. 'zlib', 'blosc:lz4', 'blosc:zstd' or 'blosc:lz4hc'
+            (see tables.filters.all_complibs). Blosc codecs compress and especially decompress
+            precipitation data, which consist mostly of zeros, several times faster than zlib.
+            Use :func:`radproc.core.set_compression_threads` for multi-threaded Blosc compression and decompression.
+        workers : integer (optional, default: 1)
+            Number of threads reading and decompressing the binary files of each month in parallel.
+            If None, the number of CPUs is used.
+        processes : integer (optional, default: 1)
+            Number of processes importing months in parallel. The resulting DataFrames are written to the HDF5 file
+            one after another by the calling process. If None, the number of CPUs is used.
+            Memory for up to two monthly DataFrames per process is required.
+            On Windows, scripts calling this function with processes > 1 have to be protected by *if __name__ == '__main__':*
+        incremental : bool (optional, default: True)
+            If True, months are skipped if the manifest of the HDF5 file shows that their dataset has been written completely
+            from the same binary files (names, sizes and modification times) and with the same ID array.
+            Hence, an interrupted run can simply be restarted and only months with new or corrected binary files are processed again.
+            If False, all months are processed and existing datasets are overwritten.
+        storage : string (optional, default: 'frame')
+            Storage layout of the monthly datasets, 'frame', 'chunked' or 'sparse'. See :func:`radproc.raw.radolan_binaries_to_hdf5`.
+            With 'chunked' and 'sparse', months are streamed into the HDF5 file one after another, so processes has to be 1.
+        quantize : bool (optional, default: False)
+            If True, the data are stored as uint16 counts of the product precision instead of float32 values.
+            See :func:`radproc.raw.radolan_binaries_to_hdf5`.
+        validation : dictionary, string or bool (optional, default: None)
+            Report of :func:`radproc.raw.validate_radolan_directory` or path and name of its JSON file.
+            Files listed as invalid in the report are skipped without reading them, unless their size or modification time has changed since the validation.
+            Their intervals are filled with NoData (NaN) values and they are listed in the text file of skipped files.
+            If True, inFolder is validated before the import with one thread per CPU and the report is saved next to HDFFile
+            (e.g. *RW_validation.json* for *RW.h5*).
+        aggregate : bool (optional, default: False)
+            If True, hourly, daily and monthly sums of all new or changed months are precomputed with :func:`radproc.core.build_aggregates`
+            after the import, so :func:`radproc.core.load_years_and_resample` and its wrapper functions don't need to read the precipitation data.
+        bitshuffle : bool (optional, default: False)
+            If True, the bit shuffle filter is applied instead of the byte shuffle filter before Blosc compression,
+            see :func:`radproc.raw.radolan_binaries_to_hdf5`. Only supported with storage='chunked' or 'sparse'.
+        report : :class:`radproc.raw.IngestReport` (optional, default: None)
+            Report recording timings, data volumes and memory usage of the import.
         
     :Returns:
     ---------
@@ -702,8 +2246,309 @@ def process_radolan_data(inFolder, HDFFile, idArr=None, complevel=9):
     # doesn't affect generation and access
     warnings.filterwarnings('ignore', category=tables.NaturalNameWarning)
    
-    # For every year folder...
+    # catalog of all binary files
+    catalog = _import_catalog(inFolder, HDFFile, validation)
+   
     yearFolders = [os.path.join(inFolder, yearDir) for yearDir in os.listdir(inFolder)]
     yearFolders = [yearDir for yearDir in yearFolders if os.path.isdir(yearDir)]
-    for yearFolder in yearFolders:
-        _process_year(yearFolder=yearFolder, HDFFile=HDFFile, idArr=idArr, complevel=complevel)
\ No newline at end of file
+    _process_year_folders(yearFolders, HDFFile, idArr, complevel, catalog, workers=workers, processes=processes, incremental=incremental,
+                          storage=storage, complib=complib, quantize=quantize, aggregate=aggregate, bitshuffle=bitshuffle, report=report)
+
+
+
+
+def process_radolan_archives(zipFolder, HDFFile, idArr=None, complevel=9, complib='zlib', quantize=False, aggregate=False, incremental=True,
+                             report=None):
+    """
+    Converts all monthly RADOLAN archives in a directory into an HDF5 file with monthly DataFrames for a given study area
+    without extracting the archives to disk.
+    
+    In contrast to unzipping the archives with :func:`radproc.raw.unzip_RW_binaries` or :func:`radproc.raw.unzip_YW_binaries`
+    and processing the extracted binary files with :func:`radproc.raw.process_radolan_data`,
+    the binary files are read directly from the archives into memory and no intermediate directory tree is written.
+    
+    :Parameters:
+    ------------
+    
+        zipFolder : string
+            Path of directory containing RADOLAN data as monthly tar / tar.gz archives, e.g. RWrea_200101.tar.gz.
+            Archives may contain binary files or daily archives with binary files (e.g. YWrea_200101.tar).
+            Archive names must contain year and month at end of basename: RWrea_200101.tar or RWrea_200101.tar.gz 
+        HDFFile : string
+            Path and name of the HDF5 file.
+            If the specified HDF5 file already exists, the new dataset will be appended; if the HDF5 file doesn't exist, it will be created. 
+        idArr : one-dimensional numpy array (optional, default: None)
+            containing ID values to select RADOLAN data of the cells located in the investigation area.
+            If no idArr is specified, the ID array is automatically generated from RADOLAN metadata
+            and RADOLAN precipitation data are not clipped to any investigation area.
+        complevel : integer (optional, default: 9)
+            defines the level of compression for the output HDF5 file.
+            complevel may range from 0 to 9, where 9 is the highest compression possible.
+        complib : string (optional, default: 'zlib')
+            compression library for the output HDF5 file, see :func:`radproc.raw.radolan_binaries_to_hdf5`.
+        quantize : bool (optional, default: False)
+            If True, the data are stored as uint16 counts of the product precision instead of float32 values.
+            See :func:`radproc.raw.radolan_binaries_to_hdf5`.
+        aggregate : bool (optional, default: False)
+            If True, hourly, daily and monthly sums of all new or changed months are precomputed with :func:`radproc.core.build_aggregates`
+            after the import, so :func:`radproc.core.load_years_and_resample` and its wrapper functions don't need to read the precipitation data.
+        incremental : bool (optional, default: True)
+            If True, archives are skipped if the manifest of the HDF5 file shows that their month has been written completely
+            from the same archive (name, size and modification time) and with the same ID array.
+            Hence, an interrupted run can simply be restarted and only new or changed archives are processed again.
+            If False, all archives are processed and existing datasets are overwritten.
+        report : :class:`radproc.raw.IngestReport` (optional, default: None)
+            Report recording timings, data volumes and memory usage of the import.
+        
+    :Returns:
+    ---------
+    
+        failed : list
+            containing the archives which could not be processed.
+        
+        Function creates datasets for every month in HDF5 file specified in parameter HDFFile.
+    """
+    # Ignore NaturalNameWarnings --> Group/Dataset names begin with number,
+    # doesn't affect generation and access
+    warnings.filterwarnings('ignore', category=tables.NaturalNameWarning)
+    
+    tarFiles = sorted([os.path.join(zipFolder, f) for f in os.listdir(zipFolder) if f.endswith('.tar') or f.endswith('.tar.gz')])
+    failed = []
+    
+    # import every archive, cut the data to study area and save it as monthly DataFrame
+    # if an error occurs, the month will be skipped and added to a list of fails
+    for tarFile in tarFiles:
+        try:
+            if incremental and _archive_is_complete(HDFFile, tarFile, idArr):
+                print(tarFile + " up to date")
+                continue
+            radolan_archive_to_hdf5(tarFile=tarFile, HDFFile=HDFFile, idArr=idArr, complevel=complevel, complib=complib, quantize=quantize,
+                                    report=report)
+            print(tarFile + " processed")
+        except:
+            print("Error at " + tarFile)
+            failed.append(tarFile)
+            continue
+    if aggregate:
+        import radproc.core as _core
+        _core.build_aggregates(HDFFile, complevel=complevel, complib=complib)
+    return failed
+
+
+
+#--------Near-real-time ingest------------------------------------------
+
+def _append_interval(h5, HDFDataset, row, timestamp, idArr, freq, filters, scale=None):
+    """
+    Write the data row of one interval into the extendable monthly dataset HDFDataset of the opened PyTables file h5.
+    The dataset is created on first use with its index starting at the first interval of the month.
+    Intervals missing between the last stored and the new one are filled with NaN, so the index stays regular.
+    Intervals which are already stored are overwritten.
+    If scale is given, the dataset stores uint16 counts of scale.
+    """
+    step = freq.nanos
+    t = pd.Timestamp(timestamp).value
+    node = "/" + HDFDataset
+    _remove_aggregates(h5, HDFDataset)
+    
+    if node not in h5:
+        year, month = HDFDataset.split("/")
+        monthStart = pd.Timestamp(datetime(int(year), int(month), 1)).value
+        group = h5.create_group("/" + year, month, createparents=True)
+        group._v_attrs.radproc_format = 'append'
+        group._v_attrs.freq = _freq_seconds(freq)
+        group._v_attrs.start = t - ((t - monthStart) // step) * step
+        h5.create_array(group, 'columns', np.asarray(idArr))
+        # nanoseconds since epoch (UTC)
+        h5.create_earray(group, 'index', atom=tables.Int64Atom(), shape=(0,))
+        if scale is not None:
+            group._v_attrs.radproc_scale = scale
+            group._v_attrs.radproc_nodata = _QUANTIZED_NODATA
+        h5.create_earray(group, 'data', atom=tables.Float32Atom() if scale is None else tables.UInt16Atom(), shape=(0, len(idArr)),
+                         filters=filters, expectedrows=_calendar.monthrange(int(year), int(month))[1] * 86400 * 10**9 // step)
+    else:
+        group = h5.get_node(node)
+        if getattr(group._v_attrs, 'radproc_format', None) != 'append':
+            raise ValueError("Dataset %s has not been written in append mode." % HDFDataset)
+        if group._v_attrs.freq != _freq_seconds(freq):
+            raise ValueError("Dataset %s has intervals of %s seconds, not %s." % (HDFDataset, group._v_attrs.freq, _freq_seconds(freq)))
+        if not np.array_equal(group.columns[:], idArr):
+            raise ValueError("Dataset %s has been written with a different ID array." % HDFDataset)
+        if getattr(group._v_attrs, 'radproc_scale', None) != scale:
+            raise ValueError("Dataset %s has been written with a different quantization." % HDFDataset)
+    
+    start = group._v_attrs.start
+    pos, offset = divmod(t - start, step)
+    if pos < 0 or offset != 0:
+        raise ValueError("%s does not fit into the intervals of dataset %s." % (timestamp, HDFDataset))
+    
+    if scale is not None:
+        row = _quantize(row.reshape(1, -1), scale)
+    
+    n = group.index.nrows
+    if pos < n:
+        group.data[pos] = row.reshape(-1)
+        return
+    # NaN rows are appended one by one to keep memory usage low for long gaps
+    if scale is None:
+        gap = np.full((1, len(idArr)), np.nan, dtype=np.float32)
+    else:
+        gap = np.full((1, len(idArr)), _QUANTIZED_NODATA, dtype=np.uint16)
+    for i in range(n, pos):
+        group.data.append(gap)
+    group.data.append(row.reshape(1, -1))
+    group.index.append(start + step * np.arange(n, pos + 1, dtype=np.int64))
+
+
+def append_radolan_binaries(binaryFiles, HDFFile, idArr=None, complevel=9, complib='zlib', quantize=False, bitshuffle=False, report=None):
+    """
+    Append single RADOLAN binary files to the monthly datasets of an HDF5 file, e.g. to add new intervals of the current month in near-real-time.
+    
+    In contrast to :func:`radproc.raw.radolan_binaries_to_hdf5`, which writes the DataFrame of a complete month at once,
+    the monthly datasets are stored as extendable arrays with a regular time index and every file is added
+    without rewriting the data already stored. The dataset of a month is derived from the date of each file
+    and created if it doesn't exist, yet. Its index starts at the first interval of the month.
+    Missing intervals are filled with NoData (NaN) values and intervals which are already stored are overwritten,
+    so files can be appended again or out of order.
+    
+    These datasets are loaded transparently by :func:`radproc.core.load_month`, :func:`radproc.core.load_months_from_hdf5`
+    and :func:`radproc.core.load_years_and_resample`.
+    
+    :Parameters:
+    ------------
+    
+        binaryFiles : list of strings
+            Paths of the RADOLAN binary files to append. Supported products: RW, RY, RZ and YW.
+        HDFFile : string
+            Path and name of the HDF5 file.
+            If the HDF5 file doesn't exist, it will be created. Monthly datasets written with :func:`radproc.raw.radolan_binaries_to_hdf5`
+            can not be appended to.
+        idArr : one-dimensional numpy array (optional, default: None)
+            containing ID values to select RADOLAN data of the cells located in the investigation area.
+            If no idArr is specified, RADOLAN precipitation data are not clipped to any investigation area.
+            All files of a month have to be appended with the same idArr.
+        complevel : integer (optional, default: 9)
+            defines the level of compression for new datasets in the output HDF5 file.
+            complevel may range from 0 to 9, where 9 is the highest compression possible.
+        complib : string (optional, default: 'zlib')
+            compression library for new datasets, see :func:`radproc.raw.radolan_binaries_to_hdf5`.
+        quantize : bool (optional, default: False)
+            If True, new datasets store uint16 counts of the product precision instead of float32 values.
+            See :func:`radproc.raw.radolan_binaries_to_hdf5`. All files of a month have to be appended with the same setting.
+        bitshuffle : bool (optional, default: False)
+            If True, new datasets apply the bit shuffle filter instead of the byte shuffle filter before Blosc compression.
+            See :func:`radproc.raw.radolan_binaries_to_hdf5`.
+        report : :class:`radproc.raw.IngestReport` (optional, default: None)
+            Report recording timings, data volumes and memory usage of every appended file.
+            Files which could not be appended are recorded with dataset None.
+        
+    :Returns:
+    ---------
+    
+        failed : list
+            containing the binary files which could not be appended.
+    """
+    # Ignore NaturalNameWarnings --> Group/Dataset names begin with number,
+    # doesn't affect generation and access
+    warnings.filterwarnings('ignore', category=tables.NaturalNameWarning)
+    
+    filters = _hdf5_filters(complevel, complib, bitshuffle)
+    failed = []
+    with tables.open_file(HDFFile, mode="a") as h5:
+        for binaryFile in binaryFiles:
+            stages = {}
+            t = _timer()
+            try:
+                # binary data block starts in the lower left corner --> flipud=True, see radolan_binaries_to_dataframe()
+                dataArr, attrs = _wrl_io.read_RADOLAN_stack([binaryFile], missing=np.nan, flipud=True, idArr=idArr,
+                                                            timings=report is not None)
+                if report is not None:
+                    report._record_files([binaryFile], attrs)
+                t = _lap(stages, 'read', t)
+                metadata = attrs[0]
+                freq = _product_freq(metadata['producttype'])
+                if freq is None:
+                    raise ValueError("Product %s can not be appended." % metadata['producttype'])
+                fileIDs = np.arange(dataArr[0].size) if idArr is None else idArr
+                HDFDataset = "%i/%i" % (metadata['datetime'].year, metadata['datetime'].month)
+                _append_interval(h5, HDFDataset, dataArr[0].ravel(), metadata['datetime'], fileIDs,
+                                 freq, filters, _quantization_scale(metadata) if quantize else None)
+            except Exception as e:
+                print("Error at " + binaryFile)
+                failed.append(binaryFile)
+                if report is not None:
+                    # files which could not be read or appended are recorded without dataset
+                    report._pending = []
+                    report._record_files([binaryFile], [e])
+                    report._record_dataset(None, stages, 0)
+                continue
+            # keep appended intervals on disk if the process is interrupted
+            h5.flush()
+            _lap(stages, 'write', t)
+            # quantized intervals are stored as uint16
+            if report is not None:
+                report._record_dataset(HDFDataset, stages, dataArr.nbytes // 2 if quantize else dataArr.nbytes)
+    return failed
+
+
+def watch_radolan_directory(dropFolder, HDFFile, idArr=None, complevel=9, interval=60, iterations=None, complib='zlib', quantize=False,
+                            bitshuffle=False, report=None):
+    """
+    Poll a directory for new RADOLAN binary files and append them to the monthly datasets of an HDF5 file
+    with :func:`radproc.raw.append_radolan_binaries`.
+    
+    Every file is appended once. Files are appended again if their size or modification time changes,
+    e.g. if a file which could not be read was still being copied into the directory.
+    After a restart, the files in the directory are appended again, which overwrites the stored intervals with the same data.
+    
+    :Parameters:
+    ------------
+    
+        dropFolder : string
+            Path to the directory receiving new RADOLAN binary files ending with '-bin' or '-bin.gz'.
+        HDFFile : string
+            Path and name of the HDF5 file.
+        idArr : one-dimensional numpy array (optional, default: None)
+            containing ID values to select RADOLAN data of the cells located in the investigation area.
+            See :func:`radproc.raw.append_radolan_binaries`.
+        complevel : integer (optional, default: 9)
+            defines the level of compression for new datasets in the output HDF5 file.
+        complib : string (optional, default: 'zlib')
+            compression library for new datasets, see :func:`radproc.raw.radolan_binaries_to_hdf5`.
+        quantize : bool (optional, default: False)
+            If True, new datasets store uint16 counts of the product precision, see :func:`radproc.raw.append_radolan_binaries`.
+        interval : float (optional, default: 60)
+            Seconds to wait between two polls of dropFolder.
+        iterations : integer (optional, default: None)
+            Number of polls. If None, the directory is polled until the process is interrupted.
+        bitshuffle : bool (optional, default: False)
+            If True, new datasets apply the bit shuffle filter, see :func:`radproc.raw.append_radolan_binaries`.
+        report : :class:`radproc.raw.IngestReport` (optional, default: None)
+            Report recording every appended file, see :func:`radproc.raw.append_radolan_binaries`.
+            Pass a report with a callback function to follow the progress while the directory is polled.
+        
+    :Returns:
+    ---------
+    
+        No return value
+    """
+    seen = set()
+    i = 0
+    while iterations is None or i < iterations:
+        if i > 0:
+            _time.sleep(interval)
+        i += 1
+        newFiles = []
+        for f in sorted(os.listdir(dropFolder)):
+            if not _is_radolan_binary(f):
+                continue
+            binaryFile = os.path.join(dropFolder, f)
+            st = os.stat(binaryFile)
+            key = (binaryFile, st.st_size, st.st_mtime)
+            if key not in seen:
+                seen.add(key)
+                newFiles.append(binaryFile)
+        if newFiles:
+            failed = append_radolan_binaries(newFiles, HDFFile, idArr=idArr, complevel=complevel, complib=complib, quantize=quantize,
+                                             bitshuffle=bitshuffle, report=report)
+            print("%i files appended to %s" % (len(newFiles) - len(failed), HDFFile))
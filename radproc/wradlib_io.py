@@ -21,6 +21,7 @@ and avoid conflicts arising between different GDAL installations required for ot
    :toctree: generated/
 
    read_RADOLAN_composite
+   read_RADOLAN_stack
 
    
 .. module:: radproc.wradlib_io
@@ -33,26 +34,92 @@ and avoid conflicts arising between different GDAL installations required for ot
 # standard libraries
 from __future__ import absolute_import
 import datetime as dt
+import mmap
+import re
 
 try:
     import io
 except ImportError:
     import io
 
+import os
 import warnings
+from multiprocessing import cpu_count
+from timeit import default_timer
+from multiprocessing.pool import ThreadPool
 
 # site packages
 import numpy as np
 import gzip
 
 
+# first bytes of gzip compressed files
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def _is_radolan_buffer(fname):
+    """True if fname is a bytes-like object instead of a file name or
+    file object. On Python 2, bytes are str and taken as file name."""
+    return isinstance(fname, (bytearray, memoryview, mmap.mmap)) or \
+        (isinstance(fname, bytes) and not isinstance(fname, str))
+
+
+def _is_seekable(fid):
+    """False for file objects of pipes, sockets or HTTP responses, which
+    can only be read sequentially. File objects of Python 2 have no
+    seekable method and are seekable."""
+    seekable = getattr(fid, 'seekable', None)
+    return seekable is None or seekable()
+
+
+def _rewind(fid):
+    """Rewind seekable file objects, others are read from their current
+    position"""
+    if _is_seekable(fid):
+        fid.seek(0, 0)
+
+
+class _PrefixedStream(object):
+    """Read-only wrapper of a non-seekable binary stream, which returns
+    the bytes already read from the stream (e.g. to detect the compression)
+    in front of the remaining data"""
+
+    def __init__(self, prefix, fid):
+        self._prefix = prefix
+        self._fid = fid
+        self.name = getattr(fid, 'name', fid)
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            data = self._prefix + self._fid.read()
+            self._prefix = b''
+            return data
+        data = self._prefix[:size]
+        self._prefix = self._prefix[size:]
+        if len(data) < size:
+            data += self._fid.read(size - len(data))
+        return data
+
+    def seekable(self):
+        return False
+
+    def close(self):
+        self._fid.close()
+
+
 def get_radolan_filehandle(fname):
     """Opens radolan file and returns file handle
 
+    Compression is detected from the gzip magic bytes.
+
     Parameters
     ----------
-    fname : string
-        filename
+    fname : string, bytes-like or file-like object
+        filename, composite in memory (bytes, bytearray, memoryview or
+        mmap; on Python 2 bytes are taken as filename) or binary file object,
+        which is rewound if it is seekable. Non-seekable streams like pipes,
+        sockets or HTTP responses are read from their current position.
+        Data may be gzip compressed.
 
     Returns
     -------
@@ -62,20 +129,87 @@ def get_radolan_filehandle(fname):
 
     #gzip = util.import_optional('gzip') --> um Funktion zu "sparen" direkter Import von gzip oben
 
-    # open file handle
-    try:
-        f = gzip.open(fname, 'rb')
-        f.read(1)
-    except IOError:
+    if _is_radolan_buffer(fname):
+        # e.g. buffers from archives, shared memory or message queues
+        f = io.BytesIO(fname)
+    elif hasattr(fname, 'read'):
+        # already opened, e.g. a member of a tar archive
+        f = fname
+    else:
         f = open(fname, 'rb')
-        f.read(1)
 
-    # rewind file
-    f.seek(0, 0)
+    # rewind file and check for gzip compression
+    if _is_seekable(f):
+        f.seek(0, 0)
+        magic = f.read(len(GZIP_MAGIC))
+        f.seek(0, 0)
+    else:
+        # the bytes read can't be put back, so they are returned by a wrapper
+        magic = f.read(len(GZIP_MAGIC))
+        f = _PrefixedStream(magic, f)
+    if magic == GZIP_MAGIC:
+        if hasattr(fname, 'read') or _is_radolan_buffer(fname):
+            f = gzip.GzipFile(fileobj=f, mode='rb')
+        else:
+            f.close()
+            f = gzip.open(fname, 'rb')
 
     return f
 
 
+def get_radolan_buffer(fname):
+    """Returns an uncompressed composite given as bytes-like object as
+    uint8 array sharing its memory, otherwise None
+
+    Parameters
+    ----------
+    fname : object
+        see :func:`get_radolan_filehandle`
+
+    Returns
+    -------
+    buf : :func:`numpy:numpy.array` or None
+        one-dimensional uint8 array without copy of the data
+    """
+    if not _is_radolan_buffer(fname):
+        return None
+    if isinstance(fname, memoryview):
+        # np.frombuffer doesn't accept memoryviews on Python 2
+        buf = np.asarray(fname).ravel().view(np.uint8)
+    else:
+        buf = np.frombuffer(fname, np.uint8)
+    if buf[:len(GZIP_MAGIC)].tobytes() == GZIP_MAGIC:
+        return None
+    return buf
+
+
+def get_radolan_mmap(fname):
+    """Maps an uncompressed composite file into memory and returns it as
+    uint8 array, or None if the file is gzip compressed
+
+    Data are only read from disk when the array is accessed, so nothing is
+    copied into Python bytes objects and only the pages of the accessed
+    rows are read.
+
+    Parameters
+    ----------
+    fname : string
+        filename
+
+    Returns
+    -------
+    buf : :func:`numpy:numpy.array` or None
+        one-dimensional read-only uint8 array backed by the file mapping
+    """
+    with open(fname, 'rb') as f:
+        if f.read(len(GZIP_MAGIC)) == GZIP_MAGIC:
+            return None
+        # the mapping stays valid after closing the file
+        # and is released with the last array referencing it
+        m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return get_radolan_buffer(m)
+
+
 def read_radolan_header(fid):
     """Reads radolan ASCII header and returns it as string
 
@@ -89,7 +223,7 @@ def read_radolan_header(fid):
     header : string
     """
     # rewind, just in case...
-    fid.seek(0, 0)
+    _rewind(fid)
 
     header = ''
     while True:
@@ -100,6 +234,73 @@ def read_radolan_header(fid):
     return header
 
 
+def read_radolan_header_block(fid, blocksize=4096):
+    """Reads radolan ASCII header blockwise and returns it as string
+    together with the data bytes read behind the header
+
+    In contrast to :func:`read_radolan_header`, the file is not read byte
+    by byte but in blocks of `blocksize` bytes until the end of text marker
+    (ETX) is found. This avoids one call of the (gzip) file handle per
+    header character.
+
+    Parameters
+    ----------
+    fid : object
+        file handle
+    blocksize : int
+        number of bytes to read at once
+
+    Returns
+    -------
+    header : string
+    rest : bytes
+        start of the binary data block following the header
+    """
+    # rewind, just in case...
+    _rewind(fid)
+
+    block = b''
+    while True:
+        chunk = fid.read(blocksize)
+        block += chunk
+        etx = block.find(b'\x03')
+        if etx > -1:
+            break
+        if not chunk:
+            raise IOError('{0}: No end of header found in {1}!'
+                          .format(__name__, getattr(fid, 'name', fid)))
+    header = str(block[:etx].decode())
+    return header, block[etx + 1:]
+
+
+def read_radolan_header_buffer(buf, blocksize=4096):
+    """Reads radolan ASCII header from a composite in memory and returns it
+    as string together with the position of the binary data block
+
+    Parameters
+    ----------
+    buf : :func:`numpy:numpy.array`
+        uint8 array as returned by :func:`get_radolan_buffer`
+    blocksize : int
+        number of bytes searched at once for the end of text marker (ETX)
+
+    Returns
+    -------
+    header : string
+    offset : int
+        position of the binary data block in `buf`
+    """
+    start = 0
+    while start < len(buf):
+        etx = buf[start:start + blocksize].tobytes().find(b'\x03')
+        if etx > -1:
+            etx += start
+            header = str(buf[:etx].tobytes().decode())
+            return header, etx + 1
+        start += blocksize
+    raise IOError('{0}: No end of header found in buffer!'.format(__name__))
+
+
 def get_radolan_header_token():
     """Return array with known header token of radolan composites
 
@@ -116,6 +317,11 @@ def get_radolan_header_token():
     return head
 
 
+_RADOLAN_HEADER_TOKEN_RE = re.compile(
+    '(?=(%s))' % '|'.join(sorted(get_radolan_header_token(), key=len,
+                                 reverse=True)))
+
+
 def get_radolan_header_token_pos(header):
     """Get Token and positions from DWD radolan header
 
@@ -130,27 +336,19 @@ def get_radolan_header_token_pos(header):
         with found header tokens and positions
     """
 
-    head_dict = get_radolan_header_token()
+    head = get_radolan_header_token()
 
-    for token in head_dict.keys():
-        d = header.rfind(token)
-        if d > -1:
-            head_dict[token] = d
-    head = {}
+    # one pass over the header, the lookahead also finds overlapping
+    # occurrences, so the last match of each token equals str.rfind
+    for match in _RADOLAN_HEADER_TOKEN_RE.finditer(header):
+        head[match.group(1)] = match.start()
 
-    result_dict = {}
-    result_dict.update((k, v) for k, v in head_dict.items() if v is not None)
-    for k, v in head_dict.items():
+    # every token value reaches up to the next token found in the header
+    found = sorted(v for v in head.values() if v is not None)
+    stops = dict(zip(found, found[1:] + [len(header)]))
+    for k, v in head.items():
         if v is not None:
-            start = v + len(k)
-            filt = [x for x in result_dict.values() if x > v]
-            if filt:
-                stop = min(filt)
-            else:
-                stop = len(header)
-            head[k] = (start, stop)
-        else:
-            head[k] = v
+            head[k] = (v + len(k), stops[v])
 
     return head
 
@@ -259,7 +457,7 @@ def parse_DWD_quant_composite_header(header):
 
 
 
-def read_radolan_binary_array(fid, size):
+def read_radolan_binary_array(fid, size, head=b''):
     """Read binary data from file given by filehandle
 
     Parameters
@@ -268,17 +466,92 @@ def read_radolan_binary_array(fid, size):
         file handle
     size : int
         number of bytes to read
+    head : bytes
+        data already read from the file handle, e.g. together with the
+        header by :func:`read_radolan_header_block`
 
     Returns
     -------
     binarr : string
         array of binary data
     """
-    binarr = fid.read(size)
+    binarr = head[:size]
+    if len(binarr) < size:
+        binarr += fid.read(size - len(binarr))
     fid.close()
     if len(binarr) != size:
         raise IOError('{0}: File corruption while reading {1}! \nCould not '
-                      'read enough data!'.format(__name__, fid.name))
+                      'read enough data!'.format(__name__,
+                                                 getattr(fid, 'name', fid)))
+    return binarr
+
+
+def read_radolan_binary_span(fid, start, stop, offset, head=b''):
+    """Read the bytes start:stop of the binary data block from file given
+    by filehandle
+
+    Bytes behind `stop` are not read. Bytes in front of `start` are skipped
+    by seeking, which doesn't need to read them for uncompressed files.
+    From non-seekable streams, they are read and discarded.
+
+    Parameters
+    ----------
+    fid : object
+        file handle
+    start : int
+        first byte to read, relative to the beginning of the data block
+    stop : int
+        byte behind the last byte to read
+    offset : int
+        position of the data block in the file (length of header + 1)
+    head : bytes
+        beginning of the data block already read from the file handle, e.g.
+        together with the header by :func:`read_radolan_header_block`
+
+    Returns
+    -------
+    binarr : string
+        array of binary data
+    """
+    binarr = head[start:stop]
+    pos = start + len(binarr)
+    if pos < stop:
+        if _is_seekable(fid):
+            fid.seek(offset + pos, 0)
+        else:
+            # streams are positioned behind head, skip the bytes up to pos
+            fid.read(pos - len(head))
+        binarr += fid.read(stop - pos)
+    fid.close()
+    if len(binarr) != stop - start:
+        raise IOError('{0}: File corruption while reading {1}! \nCould not '
+                      'read enough data!'.format(__name__,
+                                                 getattr(fid, 'name', fid)))
+    return binarr
+
+
+def read_radolan_binary_buffer(buf, offset, size):
+    """Return the binary data block of a composite in memory without
+    copying it
+
+    Parameters
+    ----------
+    buf : :func:`numpy:numpy.array`
+        uint8 array as returned by :func:`get_radolan_buffer`
+    offset : int
+        position of the data block in `buf`
+    size : int
+        number of bytes of the data block
+
+    Returns
+    -------
+    binarr : :func:`numpy:numpy.array`
+        uint8 view on the data block
+    """
+    binarr = buf[offset:offset + size]
+    if len(binarr) != size:
+        raise IOError('{0}: File corruption while reading buffer! \nCould '
+                      'not read enough data!'.format(__name__))
     return binarr
 
 
@@ -315,6 +588,106 @@ def decode_radolan_runlength_array(binarr, attrs):
     return np.flipud(arr)
 
 
+def decode_radolan_runlength_buffer(binarr, attrs):
+    """Decodes the binary runlength coded section from DWD composite
+    file in one pass and return decoded numpy array with correct shape
+
+    Vectorized replacement for :func:`decode_radolan_runlength_array`.
+    Lines are split by the byte offsets of their line feeds, run widths are
+    expanded with :func:`numpy:numpy.repeat` and all values are written into
+    one preallocated array. The result is identical to the one of
+    :func:`decode_radolan_runlength_array`, except for lines with offsets
+    coded with continuation bytes (255) which exceed 255 columns.
+    These are decoded correctly, whereas the offset overflows in
+    :func:`decode_radolan_runlength_line`. Lines which decode to more than
+    ncol values are clipped to ncol columns and corrupt lines raise IOError.
+
+    Parameters
+    ----------
+    binarr : string
+        Buffer
+    attrs : dict
+        Attribute dict of file header
+
+    Returns
+    -------
+    arr : :func:`numpy:numpy.array`
+        of decoded values
+    """
+    buf = np.frombuffer(binarr, np.uint8)
+    ncol = attrs['ncol']
+    nodata = attrs['nodataflag']
+
+    # every line ends with lf (10), the trailing eot (4) is not a line
+    ends = np.flatnonzero(buf == 10)
+    starts = np.empty_like(ends)
+    starts[:1] = 0
+    starts[1:] = ends[:-1] + 1
+    nlines = len(ends)
+
+    # same dtype as the line-by-line decoder (uint8 values mixed with nodata),
+    # independent of value-based casting which has been removed in numpy 2.
+    # Float nodata values would lose precision in the minimal float type.
+    if np.issubdtype(type(nodata), np.floating):
+        dtype = np.float64
+    else:
+        dtype = np.result_type(np.uint8, np.min_scalar_type(nodata))
+    arr = np.empty((nlines, ncol), dtype=dtype)
+    arr.fill(nodata)
+
+    # byte '0' is line number, so the offset starts at byte 1.
+    # line empty condition, lf directly behind line number
+    lo = starts + 1
+    full = np.flatnonzero(lo < ends)
+    lo = lo[full]
+    ends = ends[full]
+    offset = buf[lo].astype(np.intp) - 16
+
+    # offset byte 255 means that the next byte belongs to the offset, too.
+    # This is rare, so these lines are handled one by one.
+    for i in np.flatnonzero(buf[lo] == 255):
+        while buf[lo[i]] == 255:
+            lo[i] += 1
+            offset[i] += int(buf[lo[i]]) - 16
+
+    # data bytes of each line are located between offset bytes and lf.
+    # A line ending within its offset bytes or with an offset byte below 16 is corrupt.
+    nbytes = ends - lo - 1
+    corrupt = (nbytes < 0) | (offset < 0)
+    if corrupt.any():
+        raise IOError('{0}: File corruption while decoding runlength coded '
+                      'line {1}!'.format(__name__, full[corrupt][0]))
+    mark = np.zeros(len(buf) + 1, dtype=np.int8)
+    mark[lo + 1] += 1
+    mark[ends] -= 1
+    data = buf[np.cumsum(mark[:-1]).astype(bool)]
+    width = data >> 4
+
+    # number of decoded values per line from the cumulative run widths
+    # at the last data byte of every line
+    lastbyte = np.cumsum(nbytes) - 1
+    total = np.zeros(len(full), dtype=np.intp)
+    total[lastbyte >= 0] = np.cumsum(width, dtype=np.intp)[lastbyte[lastbyte >= 0]]
+    count = total.copy()
+    count[1:] -= total[:-1]
+
+    # expand runs and compute the position of every decoded value in the
+    # flattened array, values of a line follow each other behind its offset
+    values = np.repeat(data & 0x0F, width)
+    flat = np.repeat(full * ncol + offset - total + count, count) + \
+        np.arange(len(values))
+
+    # values of lines which are longer than ncol are clipped
+    if (offset + count > ncol).any():
+        inside = flat - np.repeat(full * ncol, count) < ncol
+        flat = flat[inside]
+        values = values[inside]
+    arr.reshape(-1)[flat] = values
+
+    # return upside down because first line read is top line
+    return np.flipud(arr)
+
+
 
 
 def read_radolan_runlength_line(fid):
@@ -402,7 +775,8 @@ def decode_radolan_runlength_line(line, attrs):
 
 
 
-def read_RADOLAN_composite(fname, missing=-9999, loaddata=True):
+def read_RADOLAN_composite(fname, missing=-9999, loaddata=True,
+                           flagmasks='index'):
     """Read quantitative radar composite format of the German Weather Service
 
     The quantitative composite format of the DWD (German Weather Service) was
@@ -427,12 +801,23 @@ def read_RADOLAN_composite(fname, missing=-9999, loaddata=True):
 
     Parameters
     ----------
-    fname : string
-        path to the composite file
+    fname : string, bytes-like or file-like object
+        path to the composite file, composite in memory or binary file
+        object, optionally gzip compressed (see
+        :func:`get_radolan_filehandle`). The binary data block of an
+        uncompressed composite in memory is decoded without copying it.
     missing : int
         value assigned to no-data cells
     loaddata : bool
         True | False, If False function returns (None, attrs)
+    flagmasks : string or None
+        'index' | 'packed' | None, format of the flag masks of secondary
+        data and clutter in attrs. 'index' returns the flattened indices of
+        the flagged cells as int64 arrays, 'packed' returns boolean masks of
+        the flattened grid packed into uint8 arrays by
+        :func:`numpy:numpy.packbits` (unpack with
+        ``np.unpackbits(mask)[:nrow * ncol]``). If None, the masks are not
+        computed and attrs contains neither secondary nor cluttermask.
 
     Returns
     -------
@@ -445,16 +830,19 @@ def read_RADOLAN_composite(fname, missing=-9999, loaddata=True):
     """
 
     NODATA = missing
-    mask = 0xFFF  # max value integer
 
-    f = get_radolan_filehandle(fname)
-
-    header = read_radolan_header(f)
+    buf = get_radolan_buffer(fname)
+    if buf is None:
+        f = get_radolan_filehandle(fname)
+        header, rest = read_radolan_header_block(f)
+    else:
+        header, offset = read_radolan_header_buffer(buf)
 
     attrs = parse_DWD_quant_composite_header(header)
 
     if not loaddata:
-        f.close()
+        if buf is None:
+            f.close()
         return None, attrs
 
     attrs["nodataflag"] = NODATA
@@ -467,26 +855,70 @@ def read_RADOLAN_composite(fname, missing=-9999, loaddata=True):
                       "of the results")
 
     # read the actual data
-    indat = read_radolan_binary_array(f, attrs['datasize'])
+    if buf is None:
+        indat = read_radolan_binary_array(f, attrs['datasize'], rest)
+    else:
+        indat = read_radolan_binary_buffer(buf, offset, attrs['datasize'])
+
+    arr = decode_radolan_data(indat, attrs, flagmasks)
+
+    return arr, attrs
+
+
+def decode_radolan_data(indat, attrs, flagmasks='index'):
+    """Decodes the binary data block of a DWD composite file and returns
+    decoded numpy array with correct shape
+
+    Parameters
+    ----------
+    indat : string
+        binary data block
+    attrs : dict
+        Attribute dict of file header including the nodataflag,
+        the flag masks are added
+    flagmasks : string or None
+        'index' | 'packed' | None, format of the flag masks secondary and
+        cluttermask added to attrs, see :func:`read_RADOLAN_composite`
+
+    Returns
+    -------
+    arr : :func:`numpy:numpy.array`
+        of decoded values
+    """
+    NODATA = attrs['nodataflag']
+    mask = 0xFFF  # max value integer
+
+    if flagmasks not in ['index', 'packed', None]:
+        raise ValueError('{0}: flagmasks has to be "index", "packed" or '
+                         'None!'.format(__name__))
+
+    def flagmask(flags):
+        # flags is a boolean array of the flattened grid
+        if flagmasks == 'index':
+            return np.flatnonzero(flags)
+        return np.packbits(flags)
 
     if attrs['producttype'] in ['RX', 'EX', 'WX']:
         # convert to 8bit integer
         arr = np.frombuffer(indat, np.uint8).astype(np.uint8)
         arr = np.where(arr == 250, NODATA, arr)
-        attrs['cluttermask'] = np.where(arr == 249)[0]
+        if flagmasks is not None:
+            attrs['cluttermask'] = flagmask(arr == 249)
     elif attrs['producttype'] in ['PG', 'PC']:
-        arr = decode_radolan_runlength_array(indat, attrs)
+        arr = decode_radolan_runlength_buffer(indat, attrs)
     else:
         # convert to 16-bit integers
         arr = np.frombuffer(indat, np.uint16).astype(np.uint16)
         # evaluate bits 13, 14, 15 and 16
-        attrs['secondary'] = np.where(arr & 0x1000)[0]
-        nodata = np.where(arr & 0x2000)[0]
-        negative = np.where(arr & 0x4000)[0]
-        attrs['cluttermask'] = np.where(arr & 0x8000)[0]
+        if flagmasks is not None:
+            attrs['secondary'] = flagmask((arr & 0x1000) != 0)
+            attrs['cluttermask'] = flagmask((arr & 0x8000) != 0)
+        nodata = (arr & 0x2000) != 0
+        # consider negative flag if product is RD (differences from adjustment)
+        if attrs['producttype'] == 'RD':
+            negative = (arr & 0x4000) != 0
         # mask out the last 4 bits
         arr &= mask
-        # consider negative flag if product is RD (differences from adjustment)
         if attrs['producttype'] == 'RD':
             # NOT TESTED, YET
             arr[negative] = -arr[negative]
@@ -499,5 +931,273 @@ def read_RADOLAN_composite(fname, missing=-9999, loaddata=True):
     # anyway, bring it into right shape
     arr = arr.reshape((attrs['nrow'], attrs['ncol']))
 
-    return arr, attrs
+    return arr
+
+
+def _source_size(fname):
+    """Size of a composite file or composite in memory in bytes, None for
+    file objects"""
+    if _is_radolan_buffer(fname):
+        return memoryview(fname).nbytes
+    elif hasattr(fname, 'read'):
+        return None
+    return os.path.getsize(fname)
+
+
+def _read_radolan_stack_rows(files, indices, out, attrs, missing, flipud,
+                             skip_errors, idArr, use_mmap=False,
+                             timings=False):
+    """Read the files with the given indices into the rows of out
 
+    Helper for :func:`read_RADOLAN_stack`, which may be called in several
+    threads on distinct indices. Creates out if it is None and returns it.
+    If timings is True, the durations of the processing stages and the
+    number of bytes read are added to the metadata of every file.
+    """
+    # scratch buffers reused for all files of the same grid size
+    counts = None
+    flags = None
+    # rows of the data block and positions of the cells in idArr
+    # for the current grid size
+    span = None
+
+    for i in indices:
+        fname = files[i]
+        # seconds spent in the stages open, header, read or decompress,
+        # clip and decode
+        stages = {}
+        try:
+            t = default_timer()
+            buf = get_radolan_buffer(fname)
+            if buf is None and use_mmap and not hasattr(fname, 'read'):
+                buf = get_radolan_mmap(fname)
+            f = get_radolan_filehandle(fname) if buf is None else None
+            stages['open'], t = default_timer() - t, default_timer()
+            # reading data from gzip files includes their decompression
+            stage = 'decompress' if isinstance(f, gzip.GzipFile) else 'read'
+            try:
+                if buf is None:
+                    header, rest = read_radolan_header_block(f)
+                else:
+                    header, offset = read_radolan_header_buffer(buf)
+                fattrs = parse_DWD_quant_composite_header(header)
+                stages['header'], t = default_timer() - t, default_timer()
+                fattrs["nodataflag"] = missing
+                shape = (fattrs['nrow'], fattrs['ncol'])
+
+                if out is None:
+                    if idArr is None:
+                        out = np.empty((len(files),) + shape,
+                                       dtype=np.float32)
+                    else:
+                        out = np.empty((len(files), len(idArr)),
+                                       dtype=np.float32)
+                # view on the row of out, raises if a copy would be needed
+                dest = out[i].view()
+                if idArr is None:
+                    if dest.size != shape[0] * shape[1]:
+                        raise ValueError('{0}: Grid size {1} of {2} does not '
+                                         'match output array!'
+                                         .format(__name__, shape, fname))
+                    dest.shape = shape
+                    if flipud:
+                        dest = dest[::-1]
+                elif dest.shape != (len(idArr),):
+                    raise ValueError('{0}: Output array does not match '
+                                     'idArr!'.format(__name__))
+
+                if buf is not None:
+                    # composite in memory or mapped file, the data block is
+                    # not copied
+                    indat = read_radolan_binary_buffer(buf, offset,
+                                                       fattrs['datasize'])
+                elif fattrs['producttype'] in ['RX', 'EX', 'WX', 'PG', 'PC'] \
+                        or idArr is None:
+                    indat = read_radolan_binary_array(f, fattrs['datasize'],
+                                                      rest)
+                stages[stage], t = default_timer() - t, default_timer()
+
+                if fattrs['producttype'] not in ['RX', 'EX', 'WX', 'PG',
+                                                 'PC']:
+                    if idArr is None:
+                        arr = np.frombuffer(indat, np.uint16).reshape(shape)
+                    else:
+                        if span is None or span[0] != shape:
+                            rows, cols = np.divmod(idArr, shape[1])
+                            if flipud:
+                                rows = shape[0] - 1 - rows
+                            first, last = rows.min(), rows.max() + 1
+                            span = (shape, first, last,
+                                    (rows - first) * shape[1] + cols)
+                        rowbytes = shape[1] * 2
+                        if buf is not None:
+                            indat = indat[span[1] * rowbytes:
+                                          span[2] * rowbytes]
+                        else:
+                            # only read the rows containing cells of idArr,
+                            # but still detect truncated uncompressed files
+                            if not isinstance(f, gzip.GzipFile) and \
+                                    _is_seekable(f):
+                                f.seek(0, 2)
+                                if f.tell() < len(header) + 1 + \
+                                        fattrs['datasize']:
+                                    raise IOError(
+                                        '{0}: File corruption while reading '
+                                        '{1}! \nCould not read enough '
+                                        'data!'.format(__name__, fname))
+                            indat = read_radolan_binary_span(
+                                f, span[1] * rowbytes, span[2] * rowbytes,
+                                len(header) + 1, rest)
+                        stages[stage] += default_timer() - t
+                        t = default_timer()
+                        arr = np.frombuffer(indat, np.uint16)[span[3]]
+                        stages['clip'], t = default_timer() - t, default_timer()
+            finally:
+                if f is not None:
+                    f.close()
+
+            if fattrs['producttype'] in ['RX', 'EX', 'WX', 'PG', 'PC']:
+                # no 12-bit data with flags, decode as single composite
+                arr = decode_radolan_data(indat, fattrs, flagmasks=None)
+                if idArr is not None:
+                    # dest is already flipped if no idArr is given
+                    if flipud:
+                        arr = arr[::-1]
+                    arr = arr.reshape(-1)[idArr]
+                dest[...] = arr
+            else:
+                if counts is None or counts.shape != arr.shape:
+                    counts = np.empty(arr.shape, dtype=np.uint16)
+                    flags = np.empty(arr.shape, dtype=bool)
+                # mask out the last 4 bits and apply precision factor.
+                # The product is computed in double precision as in
+                # read_RADOLAN_composite and cast to the output dtype.
+                np.bitwise_and(arr, 0xFFF, out=counts)
+                np.multiply(counts, fattrs['precision'], out=dest,
+                            casting='unsafe')
+                # consider negative flag if product is RD
+                if fattrs['producttype'] == 'RD':
+                    np.not_equal(np.bitwise_and(arr, 0x4000, out=counts), 0,
+                                 out=flags)
+                    np.negative(dest, out=dest, where=flags)
+                # set nodata value
+                np.not_equal(np.bitwise_and(arr, 0x2000, out=counts), 0,
+                             out=flags)
+                np.copyto(dest, missing, where=flags)
+            stages['decode'] = default_timer() - t
+            if timings:
+                fattrs['timings'] = stages
+                fattrs['filebytes'] = _source_size(fname)
+            attrs[i] = fattrs
+        except Exception as e:
+            if not skip_errors:
+                raise
+            attrs[i] = e
+            if out is not None:
+                out[i] = missing
+
+    return out
+
+
+def read_RADOLAN_stack(files, out=None, missing=np.nan, flipud=False,
+                       skip_errors=False, idArr=None, workers=1,
+                       use_mmap=False, timings=False):
+    """Read a list of RADOLAN composites into one preallocated 3-D array
+
+    In contrast to calling :func:`read_RADOLAN_composite` for every file,
+    the data of all files are decoded directly into the rows of one float32
+    array. Flag extraction, precision factor and nodata value are applied
+    in place, so no temporary full-grid float arrays are created per file.
+
+    If `idArr` is given, only the selected cells are decoded and only the
+    rows of the binary data block covering these cells are read.
+
+    With `workers` > 1, contiguous blocks of files are read in parallel
+    threads. Every file is still written to its own row of `out`.
+
+    Parameters
+    ----------
+    files : list
+        paths to the composite files, composites in memory or binary file
+        objects, see :func:`read_RADOLAN_composite`
+    out : :func:`numpy:numpy.array`
+        optional float array of shape (number of files, number of rows,
+        number of columns) or (number of files, number of cells) to write
+        the data into. If None, a float32 array of the first shape is
+        created. If `idArr` is given, the shape has to be
+        (number of files, length of idArr).
+    missing : float
+        value assigned to no-data cells
+    flipud : bool
+        True | False, If True the row order of every grid is reversed, so
+        the first row is the northern instead of the southern one
+    skip_errors : bool
+        True | False, If True files which can not be read are skipped and
+        their rows are filled with `missing`. Otherwise the error is raised.
+    idArr : :func:`numpy:numpy.array`
+        optional one-dimensional array of the cell indices to read. Indices
+        refer to the flattened grid after applying `flipud`.
+    workers : int
+        number of threads reading the files. Only gzip decompression and
+        parts of the decoding release the GIL, so the speedup is limited by
+        the number of CPUs and the per-file work in Python. Measure it with
+        benchmarks/worker_scaling.py before using more than one thread.
+        If None, the number of CPUs is used.
+    use_mmap : bool
+        True | False, If True uncompressed files are mapped into memory
+        instead of being read. Flags and precision factor are applied
+        directly to the mapped data block and with `idArr`, only the pages
+        of the required rows are read from disk. Gzip compressed files are
+        read as usual.
+    timings : bool
+        True | False, If True the metadata of every file contain the keys
+        'timings' with the seconds spent in the processing stages ('open',
+        'header', 'read' or 'decompress' for gzip compressed files, 'clip'
+        and 'decode') and 'filebytes' with the size of the file or
+        composite in memory (None for file objects).
+
+    Returns
+    -------
+    output : tuple
+        tuple of two items (data, attrs):
+
+            - data : numpy array `out`
+            - attrs : list with the dictionary of metadata information from
+              the file header of every file. For skipped files, the list
+              contains the exception raised instead.
+
+    """
+    attrs = [None] * len(files)
+    todo = list(range(len(files)))
+
+    # read files one by one until the output array has been created
+    while out is None and todo:
+        out = _read_radolan_stack_rows(files, [todo.pop(0)], out, attrs,
+                                       missing, flipud, skip_errors, idArr,
+                                       use_mmap, timings)
+
+    if workers is None:
+        workers = cpu_count()
+    if workers > 1 and len(todo) > 1:
+        chunks = [list(c) for c in np.array_split(todo, workers) if len(c)]
+        pool = ThreadPool(len(chunks))
+        try:
+            pool.map(lambda indices: _read_radolan_stack_rows(
+                files, indices, out, attrs, missing, flipud, skip_errors,
+                idArr, use_mmap, timings), chunks)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        _read_radolan_stack_rows(files, todo, out, attrs, missing, flipud,
+                                 skip_errors, idArr, use_mmap, timings)
+
+    if out is None:
+        raise IOError('{0}: None of the files could be read!'
+                      .format(__name__))
+    # files which failed before the output array was created
+    for i, a in enumerate(attrs):
+        if isinstance(a, Exception):
+            out[i] = missing
+
+    return out, attrs
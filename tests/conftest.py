@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""Synthetic RADOLAN composites for the tests."""
+
+import gzip
+import os
+
+import numpy as np
+import pytest
+
+
+def radolan_header(product, when, nrow, ncol, datasize, interval=60, precision='E-02'):
+    """ASCII header of a RADOLAN composite with the given data block size (without ETX)."""
+    head = product + when.strftime('%d%H%M') + '10000' + when.strftime('%m%y')
+    rest = 'VS 3SW   2.13.1PR %sINT%4iGP%4ix%4iMS 10<boo,ros>' % (precision, interval, nrow, ncol)
+    # BY counts header, ETX and data block
+    size = len(head) + 9 + len(rest) + 1 + datasize
+    return head + 'BY%7i' % size + rest
+
+
+def composite_bytes(product, when, data, nrow, ncol, interval=60):
+    """RADOLAN composite consisting of header, ETX and the binary data block."""
+    return radolan_header(product, when, nrow, ncol, len(data), interval).encode() + b'\x03' + data
+
+
+def runlength_block(lines, ncol):
+    """
+    Run-length coded data block of PG/PC composites.
+    lines is a list of (offset, [(width, value), ...]) from the top line to the bottom line.
+    Offsets of 239 or more are coded with continuation bytes 255.
+    """
+    block = b''
+    for i, (offset, runs) in enumerate(lines):
+        # line number byte, must not be a line feed
+        line = [32 + i]
+        while offset >= 239:
+            line.append(255)
+            offset -= 239
+        line.append(offset + 16)
+        line += [(width << 4) | value for width, value in runs]
+        block += bytes(bytearray(line)) + b'\n'
+    return block + b'\x04'
+
+
+@pytest.fixture
+def write_composite(tmp_path):
+    """Factory writing a composite to a file in tmp_path and returning its path."""
+    def write(name, product, when, data, nrow, ncol, gz=False, interval=60):
+        path = os.path.join(str(tmp_path), name)
+        content = composite_bytes(product, when, data, nrow, ncol, interval)
+        with (gzip.open if gz else open)(path, 'wb') as f:
+            f.write(content)
+        return path
+    return write
+
+
+@pytest.fixture
+def rw_counts():
+    """Random 12-bit counts of a 10 x 12 RW grid with some NoData cells."""
+    rng = np.random.RandomState(0)
+    counts = (rng.rand(10, 12) < 0.3) * rng.randint(0, 400, (10, 12))
+    counts[0, :3] |= 0x2000
+    return counts.astype('<u2')
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+import os
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import radproc.core as core
+import radproc.raw as raw
+
+
+# RW intervals at the turn of May and June 2020, 02:50 is missing
+TURN_OF_MONTH = [datetime(2020, 5, 31, 21, 50), datetime(2020, 5, 31, 22, 50), datetime(2020, 5, 31, 23, 50),
+                 datetime(2020, 6, 1, 0, 50), datetime(2020, 6, 1, 1, 50), datetime(2020, 6, 1, 3, 50)]
+
+
+def _turn_of_month(write_composite, rw_counts, tmp_path, storages=('frame',)):
+    """
+    Import RW files of the turn of May and June 2020 with every storage layout into its own HDF5 file.
+    Returns the HDF5 files and the DataFrame of both months.
+    """
+    for when in TURN_OF_MONTH:
+        folder = os.path.join('2020', str(when.month))
+        if not os.path.isdir(os.path.join(str(tmp_path), folder)):
+            os.makedirs(os.path.join(str(tmp_path), folder))
+        name = os.path.join(folder, 'raa01-rw_10000-%s-dwd---bin' % when.strftime('%y%m%d%H%M'))
+        # different values in every interval
+        write_composite(name, 'RW', when, (rw_counts + (rw_counts < 0x2000) * when.hour).astype('<u2').tobytes(), 10, 12)
+    expected = pd.concat([raw.radolan_binaries_to_dataframe(os.path.join(str(tmp_path), '2020', month))[0] for month in ['5', '6']])
+    outFolder = os.path.join(str(tmp_path), 'out')
+    os.makedirs(outFolder)
+    HDFFiles = {}
+    for storage in storages:
+        HDFFiles[storage] = os.path.join(outFolder, '%s.h5' % storage)
+        raw.process_radolan_data(str(tmp_path), HDFFiles[storage], storage=storage)
+    return HDFFiles, expected
+
+
+def test_load_months_selects_cells_and_rows(write_composite, rw_counts, tmp_path):
+    HDFFiles, expected = _turn_of_month(write_composite, rw_counts, tmp_path, ('frame', 'chunked', 'sparse'))
+    cells = [0, 5, 17, 119]
+    for storage, HDFFile in HDFFiles.items():
+        df = core.load_months_from_hdf5(HDFFile, 2020, [5, 6])
+        pd.testing.assert_frame_equal(df, expected, check_names=False)
+        assert df.index.freq == pd.tseries.frequencies.to_offset('h')
+        df = core.load_months_from_hdf5(HDFFile, 2020, [5, 6], cells=cells, start='2020-05-31 22:50', end='2020-06-01 01:50')
+        assert list(df.columns) == cells
+        assert len(df) == 4
+        pd.testing.assert_frame_equal(df, expected.loc['2020-05-31 22:50':'2020-06-01 01:50', cells], check_names=False, check_freq=False)
+        # time zones are converted to UTC
+        df = core.load_months_from_hdf5(HDFFile, 2020, [6], start=pd.Timestamp('2020-06-01 02:50', tz='Europe/Berlin'))
+        assert df.index[0] == pd.Timestamp('2020-06-01 00:50', tz='UTC')
+
+
+def test_load_period_across_months(write_composite, rw_counts, tmp_path):
+    HDFFiles, expected = _turn_of_month(write_composite, rw_counts, tmp_path, ('frame', 'chunked'))
+    for storage, HDFFile in HDFFiles.items():
+        df = core.load_period(HDFFile, '2020-05-31 21:50', '2020-06-01 03:50')
+        assert len(df) == 7 and df.index.freq == pd.tseries.frequencies.to_offset('h')
+        pd.testing.assert_frame_equal(df, expected.loc['2020-05-31 21:50':'2020-06-01 03:50'], check_names=False, check_freq=False)
+        # the interval without file is NoData
+        assert df.loc['2020-06-01 02:50'].isnull().all()
+        df = core.load_period(HDFFile, '2020-05-31 23:00', '2020-06-01 01:00', cells=[3, 42])
+        pd.testing.assert_frame_equal(df, expected.loc['2020-05-31 23:50':'2020-06-01 00:50', [3, 42]], check_names=False, check_freq=False)
+        # months missing in the HDF5 file are skipped
+        df = core.load_period(HDFFile, '2020-06-30 23:50', '2020-07-01 02:50')
+        assert len(df) == 1 and df.index[0] == pd.Timestamp('2020-06-30 23:50', tz='UTC')
+        with pytest.raises(KeyError):
+            core.load_period(HDFFile, '2020-07-01', '2020-07-02')
+        with pytest.raises(ValueError):
+            core.load_period(HDFFile, '2020-06-01', '2020-05-31')
+
+
+def test_parallel_resampling_equals_serial(write_composite, rw_counts, tmp_path):
+    HDFFiles, expected = _turn_of_month(write_composite, rw_counts, tmp_path, ('frame', 'sparse'))
+    for storage, HDFFile in HDFFiles.items():
+        for freq in ['years', 'months', 'days', 'hours']:
+            serial = core.load_years_and_resample(HDFFile, 2020, freq=freq)
+            pd.testing.assert_frame_equal(core.load_years_and_resample(HDFFile, 2020, freq=freq, processes=2), serial)
+            pd.testing.assert_frame_equal(core.load_years_and_resample(HDFFile, 2020, freq=freq, processes=None), serial)
+        # sums of the days at the turn of the month, labels are at the right, and of both months
+        days = core.load_years_and_resample(HDFFile, 2020, freq='days', processes=2)
+        for day, label in [('2020-05-31', '2020-06-01'), ('2020-06-01', '2020-06-02')]:
+            pd.testing.assert_series_equal(days.loc[label], expected.loc[day].sum(), check_names=False)
+        months = core.load_years_and_resample(HDFFile, 2020, freq='months', processes=2)
+        assert list(months.index.month) == [5, 6]
+        pd.testing.assert_series_equal(months.sum(), expected.sum(), check_names=False, rtol=1e-5)
+
+
+def _no_data_access(*args, **kwargs):
+    raise AssertionError("precipitation data must not be read")
+
+
+def test_aggregate_pyramid(write_composite, rw_counts, tmp_path, monkeypatch, capsys):
+    HDFFiles, expected = _turn_of_month(write_composite, rw_counts, tmp_path, ('frame', 'sparse'))
+    wrappers = [core.hdf5_to_years, core.hdf5_to_months, core.hdf5_to_days]
+    for storage, HDFFile in HDFFiles.items():
+        reference = [wrapper(HDFFile, 2020) for wrapper in wrappers]
+        core.build_aggregates(HDFFile)
+        with pd.HDFStore(HDFFile, 'r') as f:
+            assert 'aggregates/days/2020/5' in f and 'aggregates/months/2020/6' in f
+            # hourly sums are only created for data with intervals shorter than one hour
+            assert 'aggregates/hours/2020/5' not in f
+        capsys.readouterr()
+        core.build_aggregates(HDFFile)
+        assert 'aggregated' not in capsys.readouterr().out
+        # the wrappers read the sums instead of the precipitation data and return the same results
+        with monkeypatch.context() as m:
+            m.setattr(core, '_read_dataset', _no_data_access)
+            m.setattr(core, '_sparse_entries', _no_data_access)
+            for wrapper, df in zip(wrappers, reference):
+                pd.testing.assert_frame_equal(wrapper(HDFFile, 2020), df)
+    
+    # appended datasets: aggregates of a changed month are removed and built again
+    mayFolder = os.path.join(str(tmp_path), '2020', '5')
+    mayFiles = sorted(os.path.join(mayFolder, f) for f in os.listdir(mayFolder))
+    os.makedirs(os.path.join(str(tmp_path), 'corrected'))
+    corrected = write_composite(os.path.join('corrected', 'raa01-rw_10000-2005312250-dwd---bin'), 'RW', datetime(2020, 5, 31, 22, 50),
+                                (rw_counts + (rw_counts < 0x2000) * 7).astype('<u2').tobytes(), 10, 12)
+    appendFile = os.path.join(str(tmp_path), 'append.h5')
+    referenceFile = os.path.join(str(tmp_path), 'reference.h5')
+    raw.append_radolan_binaries(mayFiles, appendFile)
+    raw.append_radolan_binaries(mayFiles + [corrected], referenceFile)
+    core.build_aggregates(appendFile)
+    before = core.hdf5_to_days(appendFile, 2020)
+    raw.append_radolan_binaries([corrected], appendFile)
+    with pd.HDFStore(appendFile, 'r') as f:
+        assert 'aggregates/days/2020/5' not in f
+    after = core.hdf5_to_days(appendFile, 2020)
+    assert not after.equals(before)
+    pd.testing.assert_frame_equal(after, core.hdf5_to_days(referenceFile, 2020))
+    capsys.readouterr()
+    core.build_aggregates(appendFile)
+    assert '2020/5 aggregated' in capsys.readouterr().out
+    pd.testing.assert_frame_equal(core.hdf5_to_days(appendFile, 2020), after)
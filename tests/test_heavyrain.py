@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import radproc.core as core
+import radproc.heavyrain as heavyrain
+import radproc.raw as raw
+
+
+def test_sparse_storage_equals_frame_storage(write_composite, rw_counts, tmp_path):
+    # two YW intervals at the beginning of every month of 2020
+    for month in range(1, 13):
+        os.makedirs(os.path.join(str(tmp_path), '2020', str(month)))
+        for minute in [0, 5]:
+            when = datetime(2020, month, 1, 0, minute)
+            name = os.path.join('2020', str(month), 'raa01-yw_10000-%s-dwd---bin' % when.strftime('%y%m%d%H%M'))
+            write_composite(name, 'YW', when, rw_counts.tobytes(), 10, 12, interval=5)
+    outFolder = os.path.join(str(tmp_path), 'out')
+    os.makedirs(outFolder)
+    frame = os.path.join(outFolder, 'frame.h5')
+    sparse = os.path.join(outFolder, 'sparse.h5')
+    raw.process_radolan_data(str(tmp_path), frame)
+    raw.process_radolan_data(str(tmp_path), sparse, storage='sparse')
+    expected = core.load_month(frame, 2020, 5)
+    pd.testing.assert_frame_equal(core.load_month(sparse, 2020, 5), expected, check_freq=False)
+    df = core.load_month(sparse, 2020, 5, sparse=True)
+    assert all(isinstance(dtype, pd.SparseDtype) for dtype in df.dtypes)
+    np.testing.assert_array_equal(df.sparse.to_dense().values, expected.values)
+    # exceedances are counted on the stored values of the sparse layout
+    for thresholdValue, minArea in [(1, 2), (2, 10)]:
+        heavy = heavyrain.find_heavy_rainfalls(sparse, 2020, 2020, thresholdValue, minArea, season=[5, 6])
+        assert len(heavy) == 4
+        pd.testing.assert_frame_equal(heavy, heavyrain.find_heavy_rainfalls(frame, 2020, 2020, thresholdValue, minArea, season=[5, 6]),
+                                      check_freq=False)
+    heavyrain.duration_sum(sparse, 15, 2020, 2020, os.path.join(outFolder, 'sparse_D15.h5'))
+    heavyrain.duration_sum(frame, 15, 2020, 2020, os.path.join(outFolder, 'frame_D15.h5'))
+    for month in [1, 6]:
+        pd.testing.assert_frame_equal(core.load_month(os.path.join(outFolder, 'sparse_D15.h5'), 2020, month),
+                                      core.load_month(os.path.join(outFolder, 'frame_D15.h5'), 2020, month), check_freq=False)
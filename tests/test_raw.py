@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import tarfile
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+import tables
+
+import radproc.core as core
+import radproc.raw as raw
+from conftest import composite_bytes
+
+
+def _partial_month(write_composite, rw_counts, tmp_path, hours=(0, 1, 2, 5, 9)):
+    """RW files of some hours of May 2020 in the month folder 2020/5 of tmp_path, returns the folder and the file paths"""
+    os.makedirs(os.path.join(str(tmp_path), '2020', '5'))
+    paths = []
+    for h in hours:
+        when = datetime(2020, 5, 1, 0, 50) + timedelta(hours=h)
+        name = os.path.join('2020', '5', 'raa01-rw_10000-%s-dwd---bin' % when.strftime('%y%m%d%H%M'))
+        paths.append(write_composite(name, 'RW', when, rw_counts.tobytes(), 10, 12))
+    return os.path.dirname(paths[0]), paths
+
+
+def test_archive_and_folder_ingest_same_shape(write_composite, rw_counts, tmp_path):
+    folder, paths = _partial_month(write_composite, rw_counts, tmp_path)
+    tarFile = os.path.join(str(tmp_path), 'RW-202005.tar')
+    with tarfile.open(tarFile, 'w') as tar:
+        # members in reversed order
+        for path in paths[::-1]:
+            tar.add(path, arcname=os.path.basename(path))
+    dfFolder, meta = raw.radolan_binaries_to_dataframe(folder)
+    dfArchive, meta = raw.radolan_archive_to_dataframe(tarFile)
+    # whole month of hourly intervals, intervals without file are NoData
+    assert len(dfArchive) == 31 * 24
+    assert dfArchive.index.freq == pd.tseries.frequencies.to_offset('h')
+    pd.testing.assert_frame_equal(dfArchive, dfFolder)
+    assert dfArchive.iloc[3].isnull().all()
+    assert not dfArchive.iloc[9].isnull().all()
+
+
+def test_catalog_rescans_changed_files(write_composite, rw_counts, tmp_path):
+    folder, paths = _partial_month(write_composite, rw_counts, tmp_path, hours=(0, 1))
+    # without catalog file, nothing is written to the directory tree
+    catalog = raw.scan_radolan_directory(str(tmp_path))
+    assert os.listdir(str(tmp_path)) == ['2020']
+    catalogFile = os.path.join(str(tmp_path), 'catalog.npy')
+    catalog = raw.scan_radolan_directory(str(tmp_path), catalogFile=catalogFile)
+    assert list(catalog['nrow']) == [10, 10]
+    # the second file is replaced by a composite with a different grid
+    write_composite(paths[1], 'RW', datetime(2020, 5, 1, 1, 50), rw_counts[:5].tobytes(), 5, 12)
+    os.utime(paths[1], (0, 0))
+    catalog = raw.scan_radolan_directory(str(tmp_path), catalogFile=catalogFile)
+    assert list(catalog['nrow']) == [10, 5]
+    assert catalog['mtime'][1] == 0
+    monthCatalogs = raw._split_catalog(catalog)
+    assert len(raw._catalog_folder(catalog, folder, monthCatalogs)) == 2
+    assert len(raw._catalog_folder(catalog, str(tmp_path), monthCatalogs)) == 0
+    # the ingest saves the catalog next to the HDF5 file
+    outFolder = os.path.join(str(tmp_path), 'out')
+    os.makedirs(outFolder)
+    raw.process_radolan_data(str(tmp_path), os.path.join(outFolder, 'RW.h5'))
+    assert sorted(os.listdir(outFolder)) == ['RW.h5', 'RW_catalog.npy']
+
+
+def test_workers_equal_serial_ingest(write_composite, rw_counts, tmp_path):
+    monthFolder, paths = _partial_month(write_composite, rw_counts, tmp_path)
+    expected, meta = raw.radolan_binaries_to_dataframe(monthFolder)
+    idArr = np.array([0, 5, 17, 60, 119])
+    expectedClipped, meta = raw.radolan_binaries_to_dataframe(monthFolder, idArr)
+    for workers in [2, None]:
+        df, meta = raw.radolan_binaries_to_dataframe(monthFolder, workers=workers)
+        pd.testing.assert_frame_equal(df, expected)
+        df, meta = raw.radolan_binaries_to_dataframe(monthFolder, idArr, workers=workers)
+        pd.testing.assert_frame_equal(df, expectedClipped)
+
+
+def test_parallel_processes_equal_serial_import(write_composite, rw_counts, tmp_path):
+    monthFolder, paths = _partial_month(write_composite, rw_counts, tmp_path)
+    # a second month folder of the same year
+    os.makedirs(os.path.join(str(tmp_path), '2020', '6'))
+    for when in [datetime(2020, 6, 1, 0, 50), datetime(2020, 6, 2, 3, 50)]:
+        name = os.path.join('2020', '6', 'raa01-rw_10000-%s-dwd---bin' % when.strftime('%y%m%d%H%M'))
+        write_composite(name, 'RW', when, rw_counts.tobytes(), 10, 12)
+    inFolder = str(tmp_path)
+    outFolder = os.path.join(str(tmp_path), 'out')
+    os.makedirs(outFolder)
+    serial = os.path.join(outFolder, 'serial.h5')
+    parallel = os.path.join(outFolder, 'parallel.h5')
+    raw.process_radolan_data(inFolder, serial)
+    raw.process_radolan_data(inFolder, parallel, processes=2)
+    for month in [5, 6]:
+        pd.testing.assert_frame_equal(core.load_month(parallel, 2020, month), core.load_month(serial, 2020, month))
+    with pytest.raises(ValueError):
+        raw.process_radolan_data(inFolder, parallel, processes=2, storage='chunked')
+
+
+def test_chunked_time_series_in_one_chunk(write_composite, rw_counts, tmp_path, monkeypatch):
+    monthFolder, paths = _partial_month(write_composite, rw_counts, tmp_path)
+    expected, meta = raw.radolan_binaries_to_dataframe(monthFolder)
+    HDFFile = os.path.join(str(tmp_path), 'chunked.h5')
+    # the whole month of all cells fits into one block, so every chunk spans the whole month
+    raw.radolan_binaries_to_hdf5(monthFolder, HDFFile, storage='chunked')
+    with tables.open_file(HDFFile) as h5:
+        assert h5.get_node('/2020/5/data').chunkshape[0] == 31 * 24
+        np.testing.assert_array_equal(h5.get_node('/2020/5/data')[:], expected.values)
+    # blocks limited to 100 intervals of all cells
+    monkeypatch.setattr(raw, '_SLAB_BYTES', 4 * 120 * 100)
+    raw.radolan_binaries_to_hdf5(monthFolder, HDFFile, storage='chunked')
+    with tables.open_file(HDFFile) as h5:
+        assert h5.get_node('/2020/5/data').chunkshape[0] == 100
+        np.testing.assert_array_equal(h5.get_node('/2020/5/data')[:], expected.values)
+
+
+def test_bitshuffle(write_composite, rw_counts, tmp_path):
+    monthFolder, paths = _partial_month(write_composite, rw_counts, tmp_path)
+    HDFFile = os.path.join(str(tmp_path), 'bitshuffle.h5')
+    raw.radolan_binaries_to_hdf5(monthFolder, HDFFile, storage='chunked', complib='blosc:zstd', bitshuffle=True)
+    with tables.open_file(HDFFile) as h5:
+        filters = h5.get_node('/2020/5/data').filters
+        assert filters.complib == 'blosc:zstd' and filters.bitshuffle and not filters.shuffle
+    expected, meta = raw.radolan_binaries_to_dataframe(monthFolder)
+    pd.testing.assert_frame_equal(core.load_month(HDFFile, 2020, 5), expected, check_names=False, check_freq=False)
+    # pandas DataFrames and non-Blosc codecs don't support bit shuffle
+    with pytest.raises(ValueError):
+        raw.radolan_binaries_to_hdf5(monthFolder, HDFFile, storage='frame', complib='blosc:zstd', bitshuffle=True)
+    with pytest.raises(ValueError):
+        raw.radolan_binaries_to_hdf5(monthFolder, HDFFile, storage='chunked', complib='zlib', bitshuffle=True)
+    with pytest.raises(ValueError):
+        raw.process_radolan_data(str(tmp_path), HDFFile, complib='blosc:zstd', bitshuffle=True)
+    # appended datasets
+    appendFile = os.path.join(str(tmp_path), 'append.h5')
+    assert raw.append_radolan_binaries(paths, appendFile, complib='blosc:lz4', bitshuffle=True) == []
+    with tables.open_file(appendFile) as h5:
+        assert h5.get_node('/2020/5/data').filters.bitshuffle
+
+
+def test_month_manifest_skips_and_reprocesses(write_composite, rw_counts, tmp_path, capsys):
+    monthFolder, paths = _partial_month(write_composite, rw_counts, tmp_path, hours=(0, 1))
+    HDFFile = os.path.join(str(tmp_path), 'RW.h5')
+    raw.process_radolan_data(str(tmp_path), HDFFile)
+    assert raw._month_is_complete(HDFFile, monthFolder, None)
+    with pd.HDFStore(HDFFile, 'r') as f:
+        assert sorted(f['manifest/2020/5']['file']) == sorted(os.path.basename(p) for p in paths)
+    capsys.readouterr()
+    raw.process_radolan_data(str(tmp_path), HDFFile)
+    assert 'up to date' in capsys.readouterr().out
+    # another ID array, a changed and a new file make the month out of date
+    assert not raw._month_is_complete(HDFFile, monthFolder, np.arange(10))
+    os.utime(paths[0], (0, 0))
+    assert not raw._month_is_complete(HDFFile, monthFolder, None)
+    raw.process_radolan_data(str(tmp_path), HDFFile)
+    assert 'processed' in capsys.readouterr().out
+    assert raw._month_is_complete(HDFFile, monthFolder, None)
+    write_composite(os.path.join('2020', '5', 'raa01-rw_10000-2005010750-dwd---bin'), 'RW', datetime(2020, 5, 1, 7, 50),
+                    rw_counts.tobytes(), 10, 12)
+    assert not raw._month_is_complete(HDFFile, monthFolder, None)
+    # without incremental import, up to date months are processed again
+    raw.process_radolan_data(str(tmp_path), HDFFile)
+    capsys.readouterr()
+    raw.process_radolan_data(str(tmp_path), HDFFile, incremental=False)
+    assert 'processed' in capsys.readouterr().out
+    assert not core.load_month(HDFFile, 2020, 5).iloc[7].isnull().all()
+
+
+def test_append_out_of_order_equals_full_ingest(write_composite, rw_counts, tmp_path):
+    monthFolder, paths = _partial_month(write_composite, rw_counts, tmp_path)
+    expected, meta = raw.radolan_binaries_to_dataframe(monthFolder)
+    HDFFile = os.path.join(str(tmp_path), 'append.h5')
+    # reversed order and one file appended twice
+    assert raw.append_radolan_binaries(paths[::-1] + [paths[2]], HDFFile) == []
+    appended = core.load_month(HDFFile, 2020, 5)
+    # the dataset ends with the last interval of the appended files
+    assert len(appended) == 10
+    pd.testing.assert_frame_equal(appended, expected.iloc[:10], check_names=False, check_freq=False)
+    # files which can't be read are returned
+    assert raw.append_radolan_binaries([os.path.join(monthFolder, 'missing-bin')], HDFFile) == [os.path.join(monthFolder, 'missing-bin')]
+
+
+def test_quantized_storage_round_trip(write_composite, rw_counts, tmp_path):
+    monthFolder, paths = _partial_month(write_composite, rw_counts, tmp_path)
+    expected, meta = raw.radolan_binaries_to_dataframe(monthFolder)
+    for storage in ['frame', 'chunked', 'sparse']:
+        HDFFile = os.path.join(str(tmp_path), 'quantized_%s.h5' % storage)
+        raw.radolan_binaries_to_hdf5(monthFolder, HDFFile, storage=storage, quantize=True)
+        df = core.load_month(HDFFile, 2020, 5)
+        assert df.dtypes.unique().tolist() == [np.float32]
+        pd.testing.assert_frame_equal(df, expected, check_names=False, check_freq=False)
+    with pd.HDFStore(os.path.join(str(tmp_path), 'quantized_frame.h5'), 'r') as f:
+        assert f['2020/5'].dtypes.unique().tolist() == [np.uint16]
+        assert f.get_storer('2020/5').attrs.radproc_scale == meta['precision']
+    # values which are no multiples of the precision can't be quantized without loss
+    with pytest.raises(ValueError):
+        raw._quantize(np.array([[0.1, 0.123]], dtype=np.float32), 0.1)
+    np.testing.assert_array_equal(raw._quantize(np.array([[0.1, np.nan]], dtype=np.float32), 0.1), [[1, raw._QUANTIZED_NODATA]])
+
+
+def test_archive_manifest_and_resume(write_composite, rw_counts, tmp_path, capsys):
+    monthFolder, paths = _partial_month(write_composite, rw_counts, tmp_path)
+    zipFolder = os.path.join(str(tmp_path), 'zip')
+    os.makedirs(zipFolder)
+    tarFile = os.path.join(zipFolder, 'RWrea_202005.tar')
+    with tarfile.open(tarFile, 'w') as tar:
+        for path in paths:
+            tar.add(path, arcname=os.path.basename(path))
+    HDFFile = os.path.join(str(tmp_path), 'archives.h5')
+    assert raw.process_radolan_archives(zipFolder, HDFFile) == []
+    assert raw._archive_is_complete(HDFFile, tarFile, None)
+    with pd.HDFStore(HDFFile, 'r') as f:
+        assert list(f['manifest/2020/5']['file']) == ['RWrea_202005.tar']
+    # the archive is up to date, unless it has been changed or another ID array is used
+    capsys.readouterr()
+    raw.process_radolan_archives(zipFolder, HDFFile)
+    assert 'up to date' in capsys.readouterr().out
+    assert not raw._archive_is_complete(HDFFile, tarFile, np.arange(10))
+    os.utime(tarFile, (0, 0))
+    assert not raw._archive_is_complete(HDFFile, tarFile, None)
+    raw.process_radolan_archives(zipFolder, HDFFile)
+    assert 'processed' in capsys.readouterr().out
+    assert raw._archive_is_complete(HDFFile, tarFile, None)
+
+
+def test_ingest_report(write_composite, rw_counts, tmp_path):
+    monthFolder, paths = _partial_month(write_composite, rw_counts, tmp_path)
+    # one unreadable file
+    with open(os.path.join(monthFolder, 'raa01-rw_10000-2005010350-dwd---bin'), 'wb') as f:
+        f.write(b'RW')
+    reportFile = os.path.join(str(tmp_path), 'report.json')
+    records = []
+    with raw.IngestReport(reportFile, callback=records.append) as report:
+        raw.radolan_binaries_to_hdf5(monthFolder, os.path.join(str(tmp_path), 'frame.h5'), report=report)
+        raw.radolan_binaries_to_hdf5(monthFolder, os.path.join(str(tmp_path), 'chunked.h5'), storage='chunked', report=report)
+    with open(reportFile) as f:
+        summary = json.load(f)
+    assert set(['started', 'seconds', 'files', 'skipped', 'bytes_in', 'bytes_out', 'files_per_second', 'peak_memory', 'stages', 'file_stages',
+                'dataset_records', 'file_records']) <= set(summary)
+    assert (summary['files'], summary['skipped']) == (12, 2)
+    assert set(summary['stages']) == set(['read', 'write'])
+    dataset = summary['dataset_records'][0]
+    assert dataset['dataset'] == '2020/5' and (dataset['files'], dataset['skipped']) == (6, 1)
+    assert dataset['bytes_out'] == 31 * 24 * 120 * 4
+    assert dataset['bytes_in'] == sum(os.path.getsize(p) for p in paths)
+    fileRecord = [r for r in summary['file_records'] if 'error' not in r][0]
+    assert set(['file', 'dataset', 'bytes_in', 'seconds', 'open', 'header', 'decode']) <= set(fileRecord)
+    # every record is passed to the callback
+    assert len(records) == 12 + 2
+    # files which could not be appended are recorded without dataset
+    report = raw.IngestReport()
+    missing = os.path.join(monthFolder, 'missing-bin')
+    raw.append_radolan_binaries(paths[:2] + [missing], os.path.join(str(tmp_path), 'append.h5'), report=report)
+    summary = report.summary()
+    assert [r['dataset'] for r in summary['dataset_records']] == ['2020/5', '2020/5', None]
+    assert summary['file_records'][-1]['file'] == missing and 'error' in summary['file_records'][-1]
+
+
+def test_validation_report_skips_invalid_files(write_composite, rw_counts, tmp_path):
+    monthFolder, paths = _partial_month(write_composite, rw_counts, tmp_path)
+    # the file of 03:50 contains the interval of 02:50 and the file of 04:50 is truncated
+    duplicate = write_composite(os.path.join('2020', '5', 'raa01-rw_10000-2005010350-dwd---bin'), 'RW', datetime(2020, 5, 1, 2, 50),
+                                rw_counts.tobytes(), 10, 12)
+    truncated = os.path.join(monthFolder, 'raa01-rw_10000-2005010450-dwd---bin')
+    with open(truncated, 'wb') as f:
+        f.write(composite_bytes('RW', datetime(2020, 5, 1, 4, 50), rw_counts.tobytes(), 10, 12)[:-10])
+    report = raw.validate_radolan_directory(str(tmp_path))
+    # nothing is written to the directory tree
+    assert os.listdir(str(tmp_path)) == ['2020']
+    assert (report['files'], report['invalid']) == (7, 2)
+    assert [e['path'] for e in report['errors']] == [duplicate, truncated]
+    assert 'also contained in' in report['errors'][0]['error']
+    assert 'bytes' in report['errors'][1]['error']
+    assert [(g['before'][11:16], g['after'][11:16], g['missing']) for g in report['gaps']] == [('02:50', '05:50', 2), ('05:50', '09:50', 3)]
+    # the duplicate can be read, but is skipped with the validation report
+    outFolder = os.path.join(str(tmp_path), 'out')
+    os.makedirs(outFolder)
+    raw.process_radolan_data(str(tmp_path), os.path.join(outFolder, 'plain.h5'))
+    assert not core.load_month(os.path.join(outFolder, 'plain.h5'), 2020, 5).iloc[3].isnull().all()
+    reportFile = os.path.join(str(tmp_path), 'validation.json')
+    raw.validate_radolan_directory(str(tmp_path), reportFile=reportFile)
+    for validation, HDFFile in [(report, 'report.h5'), (reportFile, 'file.h5'), (True, 'RW.h5')]:
+        raw.process_radolan_data(str(tmp_path), os.path.join(outFolder, HDFFile), validation=validation)
+        df = core.load_month(os.path.join(outFolder, HDFFile), 2020, 5)
+        assert df.iloc[3].isnull().all() and df.iloc[4].isnull().all()
+        assert not df.iloc[2].isnull().all()
+    # validation=True saves the report next to the HDF5 file
+    with open(os.path.join(outFolder, 'RW_validation.json')) as f:
+        assert json.load(f)['invalid'] == 2
+    # changed files are read again
+    write_composite(duplicate, 'RW', datetime(2020, 5, 1, 3, 50), rw_counts.tobytes(), 10, 12)
+    raw.process_radolan_data(str(tmp_path), os.path.join(outFolder, 'changed.h5'), validation=report)
+    assert not core.load_month(os.path.join(outFolder, 'changed.h5'), 2020, 5).iloc[3].isnull().all()
+
+
+def test_unzip_is_idempotent(write_composite, rw_counts, tmp_path, capsys):
+    monthFolder, paths = _partial_month(write_composite, rw_counts, tmp_path)
+    zipFolder = os.path.join(str(tmp_path), 'zip')
+    os.makedirs(zipFolder)
+    for tarName, members in [('RWrea_202005.tar', paths[:3]), ('RWrea_202006.tar.gz', paths[3:])]:
+        with tarfile.open(os.path.join(zipFolder, tarName), 'w:gz' if tarName.endswith('.gz') else 'w') as tar:
+            for path in members:
+                tar.add(path, arcname=os.path.basename(path))
+    # a corrupt archive is returned, the others are unzipped
+    with open(os.path.join(zipFolder, 'RWrea_202007.tar.gz'), 'wb') as f:
+        f.write(b'no archive')
+    for processes in [1, 2]:
+        outFolder = os.path.join(str(tmp_path), 'unzipped%i' % processes)
+        assert raw.unzip_radolan_binaries(zipFolder, outFolder, processes=processes) == [os.path.join(zipFolder, 'RWrea_202007.tar.gz')]
+        files = dict((os.path.join(d, f), os.path.getmtime(os.path.join(d, f))) for d, dirs, fs in os.walk(outFolder) for f in fs)
+        assert sorted(os.path.basename(f) for f in files) == sorted(os.path.basename(p) + '.gz' for p in paths)
+        capsys.readouterr()
+        # a second run writes nothing
+        assert raw.unzip_radolan_binaries(zipFolder, outFolder, processes=processes) == [os.path.join(zipFolder, 'RWrea_202007.tar.gz')]
+        assert '3 files already existed' in capsys.readouterr().out
+        assert dict((os.path.join(d, f), os.path.getmtime(os.path.join(d, f))) for d, dirs, fs in os.walk(outFolder) for f in fs) == files
+    # uncompressed and gzip compressed binary files contain the same data
+    dfGzip, meta = raw.radolan_binaries_to_dataframe(os.path.join(str(tmp_path), 'unzipped1', '2020', '6'))
+    assert raw.unzip_radolan_binaries(zipFolder, os.path.join(str(tmp_path), 'plain'), processes=1, compression=None) != []
+    dfPlain, meta = raw.radolan_binaries_to_dataframe(os.path.join(str(tmp_path), 'plain', '2020', '6'))
+    pd.testing.assert_frame_equal(dfPlain, dfGzip)
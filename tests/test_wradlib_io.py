@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+import gzip
+import os
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+import radproc.wradlib_io as wrl_io
+from conftest import composite_bytes, runlength_block
+
+
+def test_header_block_equals_bytewise_header(write_composite, rw_counts):
+    data = rw_counts.tobytes()
+    path = write_composite('raa01-rw_10000-2005010050-dwd---bin.gz', 'RW', datetime(2020, 5, 1, 0, 50), data, 10, 12, gz=True)
+    f = wrl_io.get_radolan_filehandle(path)
+    try:
+        expected = wrl_io.read_radolan_header(f)
+        # blocks ending within the header and behind the ETX
+        for blocksize in [7, 4096]:
+            header, rest = wrl_io.read_radolan_header_block(f, blocksize)
+            assert header == expected
+            assert rest + f.read() == data
+    finally:
+        f.close()
+    # the regex pass finds the last occurrence of every token like str.rfind
+    head = wrl_io.get_radolan_header_token_pos(expected)
+    for token, pos in head.items():
+        if pos is None:
+            assert expected.rfind(token) == -1
+        else:
+            assert pos[0] == expected.rfind(token) + len(token)
+    attrs = wrl_io.parse_DWD_quant_composite_header(expected)
+    assert (attrs['nrow'], attrs['ncol'], attrs['datasize']) == (10, 12, len(data))
+
+
+def test_stack_rx_flipud_unclipped_equals_clipped(write_composite):
+    # 8-bit products are decoded as whole composites, the grid must be flipped exactly once
+    values = np.arange(120, dtype=np.uint8).reshape(10, 12)
+    path = write_composite('raa01-rx_10000-2005010050-dwd---bin', 'RX', datetime(2020, 5, 1, 0, 50), values.tobytes(), 10, 12)
+    composite, attrs = wrl_io.read_RADOLAN_composite(path)
+    full, attrs = wrl_io.read_RADOLAN_stack([path], flipud=True)
+    clipped, attrs = wrl_io.read_RADOLAN_stack([path], flipud=True, idArr=np.arange(120))
+    np.testing.assert_array_equal(full[0], composite[::-1])
+    np.testing.assert_array_equal(full[0].ravel(), clipped[0])
+
+
+def test_mmap_reads_equal_file_reads(write_composite, rw_counts):
+    when = datetime(2020, 5, 1, 0, 50)
+    plain = write_composite('raa01-rw_10000-2005010050-dwd---bin', 'RW', when, rw_counts.tobytes(), 10, 12)
+    gz = write_composite('raa01-rw_10000-2005010150-dwd---bin.gz', 'RW', when, rw_counts[::-1].tobytes(), 10, 12, gz=True)
+    # gzip compressed files can't be mapped
+    assert wrl_io.get_radolan_mmap(gz) is None
+    with open(plain, 'rb') as f:
+        np.testing.assert_array_equal(wrl_io.get_radolan_mmap(plain), np.frombuffer(f.read(), np.uint8))
+    expected, attrs = wrl_io.read_RADOLAN_stack([plain, gz, plain], flipud=True)
+    stack, attrs = wrl_io.read_RADOLAN_stack([plain, gz, plain], flipud=True, use_mmap=True)
+    np.testing.assert_array_equal(stack, expected)
+    composite, attrs = wrl_io.read_RADOLAN_composite(plain, missing=np.nan)
+    np.testing.assert_array_equal(stack[0], composite[::-1].astype(np.float32))
+
+
+def test_packed_flag_masks_and_clipped_mmap_reads(write_composite, rw_counts):
+    counts = rw_counts.copy()
+    # secondary data and clutter flags of some cells
+    counts[2, 4] |= 0x1000
+    counts[7, :2] |= 0x8000
+    path = write_composite('raa01-rw_10000-2005010050-dwd---bin', 'RW', datetime(2020, 5, 1, 0, 50), counts.tobytes(), 10, 12)
+    data, attrs = wrl_io.read_RADOLAN_composite(path)
+    np.testing.assert_array_equal(attrs['secondary'], [2 * 12 + 4])
+    np.testing.assert_array_equal(attrs['cluttermask'], [7 * 12, 7 * 12 + 1])
+    packed, packedAttrs = wrl_io.read_RADOLAN_composite(path, flagmasks='packed')
+    np.testing.assert_array_equal(packed, data)
+    for key in ['secondary', 'cluttermask']:
+        assert packedAttrs[key].dtype == np.uint8
+        np.testing.assert_array_equal(np.flatnonzero(np.unpackbits(packedAttrs[key])[:120]), attrs[key])
+    unflagged, unflaggedAttrs = wrl_io.read_RADOLAN_composite(path, flagmasks=None)
+    np.testing.assert_array_equal(unflagged, data)
+    assert 'secondary' not in unflaggedAttrs and 'cluttermask' not in unflaggedAttrs
+    with pytest.raises(ValueError):
+        wrl_io.read_RADOLAN_composite(path, flagmasks='bool')
+    # only the rows of the selected cells are decoded from the mapped file
+    idArr = np.array([3, 30, 31, 100, 119])
+    full, attrs = wrl_io.read_RADOLAN_stack([path], flipud=True)
+    for use_mmap in [False, True]:
+        clipped, attrs = wrl_io.read_RADOLAN_stack([path], flipud=True, idArr=idArr, use_mmap=use_mmap)
+        np.testing.assert_array_equal(clipped[0], full[0].ravel()[idArr])
+
+
+def _pipe(content):
+    """Binary file object of a pipe containing content, which can't seek"""
+    r, w = os.pipe()
+    os.write(w, content)
+    os.close(w)
+    return os.fdopen(r, 'rb')
+
+
+def test_read_from_non_seekable_stream(rw_counts):
+    content = composite_bytes('RW', datetime(2020, 5, 1, 0, 50), rw_counts.tobytes(), 10, 12)
+    expected, attrs = wrl_io.read_RADOLAN_composite(content)
+    for data in [content, gzip.compress(content)]:
+        with _pipe(data) as f:
+            assert not f.seekable()
+            arr, attrs = wrl_io.read_RADOLAN_composite(f)
+        np.testing.assert_array_equal(arr, expected)
+        # only the rows of the selected cells are read from the stream
+        with _pipe(data) as f:
+            stack, attrs = wrl_io.read_RADOLAN_stack([f], idArr=np.array([30, 100, 119]))
+        np.testing.assert_array_equal(stack[0], expected.ravel()[[30, 100, 119]].astype(np.float32))
+
+
+def test_runlength_continuation_offset(write_composite):
+    # offsets of more than 239 columns are coded with continuation bytes 255
+    block = runlength_block([(292, [(3, 5), (2, 1)]), (0, [(4, 2)]), (250, [(15, 0)])], 300)
+    path = write_composite('raa01-pg_10000-2005010050-dwd---bin', 'PG', datetime(2020, 5, 1, 0, 50), block, 3, 300)
+    arr, attrs = wrl_io.read_RADOLAN_composite(path)
+    nodata = attrs['nodataflag']
+    assert arr.shape == (3, 300)
+    # first line read is the top line
+    top, middle, bottom = arr[2], arr[1], arr[0]
+    np.testing.assert_array_equal(np.flatnonzero(top != nodata), np.arange(292, 297))
+    np.testing.assert_array_equal(top[292:297], [5, 5, 5, 1, 1])
+    np.testing.assert_array_equal(middle[:4], [2, 2, 2, 2])
+    assert (middle[4:] == nodata).all()
+    np.testing.assert_array_equal(np.flatnonzero(bottom != nodata), np.arange(250, 265))
+
+
+def _random_runlength_lines(rng, nrow, ncol):
+    """(offset, runs) of nrow random lines for runlength_block(), some lines are empty or shorter than ncol"""
+    lines = []
+    for i in range(nrow):
+        offset = rng.randint(0, ncol)
+        runs = []
+        # the line decoder requires at least one run behind the offset
+        remaining = max(1, ncol - offset - rng.randint(0, 3))
+        while remaining > 0:
+            width = min(rng.randint(1, 16), remaining)
+            runs.append((width, rng.randint(0, 10)))
+            remaining -= width
+        lines.append((offset, runs))
+    return lines
+
+
+def test_runlength_buffer_equals_array_decoder():
+    rng = np.random.RandomState(0)
+    for ncol in [20, 200, 255]:
+        block = runlength_block(_random_runlength_lines(rng, 30, ncol), ncol)
+        # empty line: lf directly behind the line number
+        block = b' \n' + block
+        for nodata in [255, 0, -9999.0]:
+            attrs = {'ncol': ncol, 'nrow': 31, 'nodataflag': nodata}
+            expected = wrl_io.decode_radolan_runlength_array(block, attrs)
+            arr = wrl_io.decode_radolan_runlength_buffer(block, attrs)
+            assert arr.dtype == expected.dtype
+            np.testing.assert_array_equal(arr, expected)
+
+
+def test_runlength_long_and_corrupt_lines():
+    attrs = {'ncol': 10, 'nrow': 2, 'nodataflag': -9999}
+    # the first line decodes to 3 + 12 values, which are clipped to 10 columns
+    block = runlength_block([(3, [(7, 1), (5, 2)]), (0, [(2, 3)])], 10)
+    arr = wrl_io.decode_radolan_runlength_buffer(block, attrs)
+    np.testing.assert_array_equal(arr[1], [-9999] * 3 + [1] * 7)
+    np.testing.assert_array_equal(arr[0], [3, 3] + [-9999] * 8)
+    # line ending within its offset continuation bytes
+    with pytest.raises(IOError):
+        wrl_io.decode_radolan_runlength_buffer(b' \xff\n\x04', attrs)